@@ -0,0 +1,80 @@
+# Benchmark of the two drift backends on synthetic windows shaped like the prediction log (30 float features
+# and the predicted class). Both backends get the same in-memory frames, so the timings cover only the drift
+# tests (Evidently's Report.run + as_dict vs monitoring.numpy_drift), not reading the log. Also checks that
+# both publish the same tests, verdicts and scores.
+#
+#   python -m benchmarks.drift_backends --rows 1000000
+
+import argparse
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from app.schema import FEATURE_NAMES
+from app.drift_scores import scores_from_report_dict
+from monitoring import numpy_drift
+
+def make_window(n_rows: int, shift: float, seed: int) -> pd.DataFrame:
+    """Normal features (a few of them shifted by `shift` standard deviations) and a rare positive class."""
+    rng = np.random.default_rng(seed)
+    features = rng.normal(size=(n_rows, len(FEATURE_NAMES)))
+    features[:, :3] += shift
+    frame = pd.DataFrame(features, columns=FEATURE_NAMES)
+    frame["prediction"] = (rng.random(n_rows) < 0.002 + shift / 100).astype(int)
+    return frame
+
+def run_evidently(reference: pd.DataFrame, current: pd.DataFrame) -> dict:
+    from evidently.report import Report
+    from evidently.metric_preset import DataDriftPreset
+
+    report = Report(metrics=[DataDriftPreset()])
+    report.run(reference_data=reference, current_data=current)
+    return scores_from_report_dict(report.as_dict())
+
+def run_numpy(reference: pd.DataFrame, current: pd.DataFrame) -> dict:
+    return numpy_drift.drift_scores(reference, current)
+
+def benchmark(n_rows: int, repeats: int = 1) -> dict:
+    reference, current = make_window(n_rows, 0.0, 0), make_window(n_rows, 0.1, 1)
+    timings, scores = {}, {}
+    for name, func in (("evidently", run_evidently), ("numpy", run_numpy)):
+        runs = []
+        for _ in range(repeats):
+            started = time.perf_counter()
+            scores[name] = func(reference, current)
+            runs.append(time.perf_counter() - started)
+        timings[name] = min(runs)
+
+    expected, actual = scores["evidently"], scores["numpy"]
+    mismatched = [column for column in expected
+                  if actual[column]["stattest"] != expected[column]["stattest"]
+                  or actual[column]["drift_detected"] != expected[column]["drift_detected"]]
+    max_relative_error = max(
+        abs(actual[column]["drift_score"] - expected[column]["drift_score"]) / max(abs(expected[column]["drift_score"]), 1e-12)
+        for column in expected
+    )
+    return {
+        "rows": n_rows,
+        "columns": len(reference.columns),
+        "evidently_seconds": timings["evidently"],
+        "numpy_seconds": timings["numpy"],
+        "speedup": timings["evidently"] / timings["numpy"],
+        "mismatched_columns": mismatched,
+        "max_relative_error": max_relative_error,
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the Evidently and NumPy drift backends")
+    parser.add_argument("--rows", type=int, nargs="+", default=[100000, 1000000], help="Rows in each of the reference and current windows")
+    parser.add_argument("--repeats", type=int, default=1, help="Report the best of this many runs")
+
+    args = parser.parse_args()
+
+    warnings.filterwarnings("ignore")
+    for n_rows in args.rows:
+        result = benchmark(n_rows, args.repeats)
+        print(f"{result['rows']:>9} rows x {result['columns']} columns: evidently {result['evidently_seconds']:.2f}s, "
+              f"numpy {result['numpy_seconds']:.2f}s ({result['speedup']:.1f}x), "
+              f"max relative score difference {result['max_relative_error']:.1e}, mismatched columns {result['mismatched_columns']}")
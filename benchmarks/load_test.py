@@ -0,0 +1,244 @@
+# Load-test harness for the inference API. Starts the app under uvicorn on localhost (or targets a running
+# server with --url), drives it with the asyncio load generator from simulate_incoming_data.py through a set
+# of fixed scenarios and writes client-side latency percentiles, throughput and error rates as JSON tagged
+# with the git commit, so runs can be compared across commits.
+#
+#   python -m benchmarks.load_test --model_path models/rfc_model.pkl
+#   python -m benchmarks.load_test --model_path models/rfc_model.pkl --compare benchmarks/results/<baseline>.json
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import httpx
+import numpy as np
+
+from simulate_incoming_data import iter_rows, send_async
+
+SCENARIOS = ["single", "batch", "burst", "ramp"]
+PERCENTILES = {"p50": 50, "p95": 95, "p99": 99, "p999": 99.9}
+
+########################################################### Results ###########################################################
+
+def summarize(result: dict, rows_per_request: int = 1) -> dict:
+    """Reduce a send_async result to latency percentiles (ms), throughput and error rate."""
+    latencies = np.frombuffer(result["latencies"]) * 1000.0 if result["requests"] else np.zeros(0)
+    summary = {
+        "requests": result["requests"],
+        "errors": result["errors"],
+        "error_rate": result["errors"] / result["requests"] if result["requests"] else 0.0,
+        "statuses": {str(status): count for status, count in result["statuses"].items()},
+        "elapsed_seconds": result["elapsed_seconds"],
+        "throughput_rps": result["throughput_rps"],
+        "rows_per_second": result["throughput_rps"] * rows_per_request,
+        "latency_ms": {},
+    }
+    if len(latencies):
+        values = np.percentile(latencies, list(PERCENTILES.values()))
+        summary["latency_ms"] = {name: float(value) for name, value in zip(PERCENTILES, values)}
+        summary["latency_ms"]["mean"] = float(latencies.mean())
+        summary["latency_ms"]["max"] = float(latencies.max())
+    return summary
+
+def git_commit() -> dict:
+    """Commit hash of the working tree and whether it has uncommitted changes."""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"],
+                                    capture_output=True, text=True, check=True).stdout.strip())
+    except (OSError, subprocess.CalledProcessError):
+        return {"commit": None, "dirty": None}
+    return {"commit": commit, "dirty": dirty}
+
+def compare(baseline: dict, current: dict):
+    """Print the change in p50/p99 latency and throughput per scenario against a baseline result file."""
+    print(f"Comparing against {baseline.get('commit', '?')[:10]} ({baseline.get('timestamp')})")
+    for name, scenario in current["scenarios"].items():
+        before = baseline.get("scenarios", {}).get(name)
+        if before is None:
+            continue
+        for step, after in _steps(scenario):
+            previous = dict(_steps(before)).get(step)
+            if not previous or not previous["latency_ms"] or not after["latency_ms"]:
+                continue
+            label = f"{name}/{step}" if step else name
+            changes = [
+                f"{key} {previous['latency_ms'][key]:.2f} -> {after['latency_ms'][key]:.2f} ms"
+                for key in ("p50", "p99")
+            ]
+            changes.append(f"throughput {previous['throughput_rps']:.1f} -> {after['throughput_rps']:.1f} req/s")
+            print(f"  {label:<16} " + ", ".join(changes))
+
+def _steps(scenario: dict) -> list:
+    if "steps" in scenario:
+        return [(f"{step['target_rps']:g}", step) for step in scenario["steps"]]
+    return [("", scenario)]
+
+########################################################### Scenarios ###########################################################
+
+async def run_scenarios(base_url: str, rows: list, args, transport=None) -> dict:
+    """Run the selected scenarios one after another against `base_url`."""
+    results = {}
+    source = itertools.cycle(rows)
+    predict_url = f"{base_url}/predict"
+
+    if "single" in args.scenarios:
+        # Closed loop: `concurrency` clients each send one row as soon as the previous answer arrives
+        result = await send_async(itertools.islice(source, args.requests), predict_url,
+                                  concurrency=args.concurrency, transport=transport)
+        results["single"] = summarize(result)
+
+    if "batch" in args.scenarios:
+        batches = (
+            {"transactions": list(itertools.islice(source, args.batch_size))}
+            for _ in range(max(1, args.requests // args.batch_size))
+        )
+        result = await send_async(batches, f"{base_url}/predict_batch", concurrency=args.concurrency, transport=transport)
+        results["batch"] = {"batch_size": args.batch_size, **summarize(result, rows_per_request=args.batch_size)}
+
+    if "burst" in args.scenarios:
+        # Open loop: a sudden spike at a fixed rate with Poisson arrivals
+        n_requests = int(args.burst_rps * args.burst_seconds)
+        result = await send_async(itertools.islice(source, n_requests), predict_url, concurrency=args.max_concurrency,
+                                  rps=args.burst_rps, arrival="poisson", seed=0, transport=transport)
+        results["burst"] = {"target_rps": args.burst_rps, **summarize(result)}
+
+    if "ramp" in args.scenarios:
+        # Open loop: sustained load, stepping the rate up to find where latency breaks down
+        steps = []
+        for target_rps in args.ramp_rps:
+            n_requests = int(target_rps * args.ramp_step_seconds)
+            result = await send_async(itertools.islice(source, n_requests), predict_url, concurrency=args.max_concurrency,
+                                      rps=target_rps, arrival="constant", transport=transport)
+            steps.append({"target_rps": target_rps, **summarize(result)})
+        results["ramp"] = {"steps": steps}
+
+    return results
+
+########################################################### Server ###########################################################
+
+def start_server(args, workdir: str) -> subprocess.Popen:
+    """Start the API under uvicorn with the prediction log redirected to `workdir`."""
+    env = dict(os.environ)
+    env["MODEL_PATH"] = args.model_path
+    env["LOG_FILE_PATH"] = os.path.join(workdir, "predictions.csv")
+    env["PREDICTION_STORE_PATH"] = os.path.join(workdir, "predictions.csv")
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [os.path.abspath("src"), env.get("PYTHONPATH")]))
+    command = [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(args.port),
+               "--log-level", "warning", "--no-access-log", "--workers", str(args.workers)]
+    return subprocess.Popen(command, env=env)
+
+def wait_until_healthy(base_url: str, server: subprocess.Popen, timeout: float = 60.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server is not None and server.poll() is not None:
+            raise RuntimeError(f"Server exited with code {server.returncode} during start-up")
+        try:
+            if httpx.get(f"{base_url}/health", timeout=1.0).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"Server at {base_url} did not become healthy within {timeout:.0f}s")
+
+def stop_server(server: subprocess.Popen):
+    server.terminate()
+    try:
+        server.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        server.kill()
+        server.wait()
+
+########################################################### Main ###########################################################
+
+def run_benchmark(args) -> dict:
+    rows = list(itertools.islice(iter_rows(args.input_file), args.max_rows))
+    if not rows:
+        raise ValueError(f"No valid rows in {args.input_file}")
+
+    with tempfile.TemporaryDirectory(prefix="load-test-") as workdir:
+        server = None
+        base_url = args.url
+        if base_url is None:
+            base_url = f"http://127.0.0.1:{args.port}"
+            server = start_server(args, workdir)
+        try:
+            wait_until_healthy(base_url, server)
+            # Warm up connections, the model and the log writer before measuring
+            asyncio.run(send_async(itertools.islice(itertools.cycle(rows), args.warmup), f"{base_url}/predict",
+                                   concurrency=args.concurrency))
+            scenarios = asyncio.run(run_scenarios(base_url, rows, args))
+        finally:
+            if server is not None:
+                stop_server(server)
+
+    return {
+        **git_commit(),
+        "timestamp": datetime.utcnow().isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": {
+            "url": args.url, "workers": args.workers, "input_file": args.input_file, "concurrency": args.concurrency,
+            "max_concurrency": args.max_concurrency, "requests": args.requests, "batch_size": args.batch_size,
+            "burst_rps": args.burst_rps, "burst_seconds": args.burst_seconds, "ramp_rps": args.ramp_rps,
+            "ramp_step_seconds": args.ramp_step_seconds,
+            "server_env": {key: os.environ[key] for key in sorted(os.environ)
+                           if key.startswith(("MICROBATCH_", "PREDICTION_", "INFERENCE_", "MODEL_MMAP_"))},
+        },
+        "scenarios": scenarios,
+    }
+
+def write_results(results: dict, output_dir: str) -> str:
+    os.makedirs(output_dir, exist_ok=True)
+    stamp = datetime.utcnow().strftime("%Y%m%dT%H%M%S")
+    path = os.path.join(output_dir, f"{stamp}-{(results['commit'] or 'nocommit')[:10]}.json")
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2)
+    return path
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark the inference API with fixed load scenarios.")
+    parser.add_argument("--input_file", type=str, default="data/predictions.csv", help="CSV with the feature columns to replay")
+    parser.add_argument("--model_path", type=str, default="models/rfc_model.pkl", help="Model loaded by the local server")
+    parser.add_argument("--url", type=str, default=None, help="Benchmark a running server instead of starting one")
+    parser.add_argument("--port", type=int, default=8765, help="Port of the local server")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes of the local server")
+    parser.add_argument("--scenarios", type=str, nargs="+", choices=SCENARIOS, default=SCENARIOS)
+    parser.add_argument("--max_rows", type=int, default=10000, help="Distinct rows loaded from the input and cycled")
+    parser.add_argument("--warmup", type=int, default=200, help="Unmeasured requests sent before the scenarios")
+    parser.add_argument("--requests", type=int, default=2000, help="Rows sent by the single and batch scenarios")
+    parser.add_argument("--concurrency", type=int, default=32, help="Clients in the closed-loop scenarios")
+    parser.add_argument("--max_concurrency", type=int, default=512, help="In-flight cap for the open-loop scenarios")
+    parser.add_argument("--batch_size", type=int, default=100)
+    parser.add_argument("--burst_rps", type=float, default=2000)
+    parser.add_argument("--burst_seconds", type=float, default=2)
+    parser.add_argument("--ramp_rps", type=float, nargs="+", default=[100, 250, 500, 1000])
+    parser.add_argument("--ramp_step_seconds", type=float, default=5)
+    parser.add_argument("--output_dir", type=str, default="benchmarks/results")
+    parser.add_argument("--compare", type=str, default=None, help="Earlier result file to compare against")
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    args = parse_args()
+    results = run_benchmark(args)
+    path = write_results(results, args.output_dir)
+
+    for name, scenario in results["scenarios"].items():
+        for step, summary in _steps(scenario):
+            latency = summary["latency_ms"]
+            label = f"{name}/{step}" if step else name
+            print(f"{label:<16} {summary['throughput_rps']:8.1f} req/s  p50 {latency.get('p50', 0):7.2f} ms  "
+                  f"p99 {latency.get('p99', 0):7.2f} ms  p999 {latency.get('p999', 0):7.2f} ms  errors {summary['error_rate']:.2%}")
+    print(f"Results written to {path}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(json.load(f), results)
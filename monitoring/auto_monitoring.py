@@ -1,40 +1,154 @@
-# This script spawns subprocesses to periodically refresh the drift reports.
+# Long-running scheduler that periodically refreshes the drift reports in-process.
+# Libraries are imported once, both reports run concurrently in a thread or process pool, and the
+# cadence is fixed: a job whose previous run is still going is skipped for that tick.
 
-import subprocess
-import time
 import argparse
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from datetime import datetime
+
+from app.constants import DRIFT_STORE_PATH
+from monitoring.generate_data_drift_report import generate_drift_report
+from monitoring.generate_prediction_drift_report import generate_prediction_drift_report
+from monitoring.streaming_drift import follow_log
+
+class DriftJob:
+    """A named report function and the keyword arguments it is called with on every tick."""
+
+    def __init__(self, name: str, func, kwargs: dict):
+        self.name = name
+        self.func = func
+        self.kwargs = kwargs
+        self.stats = {"runs": 0, "failures": 0, "skipped": 0, "last_runtime_seconds": None,
+                      "total_runtime_seconds": 0.0, "last_error": None, "last_finished_at": None}
+        self.future = None
+
+def timed_call(func, kwargs: dict) -> float:
+    """Run `func(**kwargs)` and return its wall-clock runtime (module-level so process pools can pickle it)."""
+    started = time.perf_counter()
+    func(**kwargs)
+    return time.perf_counter() - started
+
+class DriftScheduler:
+    """Runs every job once per `interval` seconds on a shared executor."""
+
+    def __init__(self, jobs: list, interval: float, executor: str = "thread", status_path: str = None):
+        self.jobs = jobs
+        self.interval = interval
+        self.status_path = status_path
+        if executor == "thread":
+            self.executor = ThreadPoolExecutor(max_workers=len(jobs), thread_name_prefix="drift-job")
+        elif executor == "process":
+            self.executor = ProcessPoolExecutor(max_workers=len(jobs))
+        else:
+            raise ValueError(f"Invalid executor: {executor}. Please choose 'thread' or 'process'.")
+        self._lock = threading.Lock()
+
+    def tick(self):
+        """Submit every job that is not still running from the previous tick."""
+        for job in self.jobs:
+            if job.future is not None and not job.future.done():
+                with self._lock:
+                    job.stats["skipped"] += 1
+                print(f"Skipping {job.name}: previous run is still in progress.")
+                continue
+            job.future = self.executor.submit(timed_call, job.func, job.kwargs)
+            job.future.add_done_callback(lambda future, job=job: self._record(job, future))
+
+    def run(self, cycles: int = None):
+        """Tick on a fixed cadence (aligned to the start time) for `cycles` ticks, or forever."""
+        next_tick = time.monotonic()
+        completed = 0
+        try:
+            while cycles is None or completed < cycles:
+                self.tick()
+                completed += 1
+                self.write_status()
+
+                # Advance to the next slot on the original grid, skipping slots we already missed
+                next_tick += self.interval
+                now = time.monotonic()
+                if next_tick < now:
+                    next_tick += self.interval * ((now - next_tick) // self.interval + 1)
+                if cycles is None or completed < cycles:
+                    print(f"Next refresh in {next_tick - now:.1f} seconds...")
+                    time.sleep(max(0.0, next_tick - now))
+        finally:
+            self.executor.shutdown(wait=True)
+            self.write_status()
+
+    def status(self) -> dict:
+        with self._lock:
+            return {job.name: dict(job.stats) for job in self.jobs}
+
+    def write_status(self):
+        """Persist per-job run counts, failures and runtimes as JSON for dashboards."""
+        if not self.status_path:
+            return
+        directory = os.path.dirname(self.status_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.status_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"updated_at": datetime.utcnow().isoformat(), "jobs": self.status()}, f, indent=2)
+        os.replace(tmp_path, self.status_path)
+
+    def _record(self, job: DriftJob, future):
+        error = future.exception()
+        with self._lock:
+            job.stats["last_finished_at"] = datetime.utcnow().isoformat()
+            if error is not None:
+                job.stats["failures"] += 1
+                job.stats["last_error"] = repr(error)
+            else:
+                runtime = future.result()
+                job.stats["runs"] += 1
+                job.stats["last_runtime_seconds"] = runtime
+                job.stats["total_runtime_seconds"] += runtime
+        if error is not None:
+            print(f"Drift job {job.name} failed: {error!r}")
+        else:
+            print(f"Drift job {job.name} finished in {job.stats['last_runtime_seconds']:.2f}s.")
 
-def refresh_drift_reports(reference_data_path, current_data_path, reference_prediction_path, current_prediction_path, drift_report_path, prediction_drift_report_path):
-    # Refresh data drift report
-    subprocess.run([
-        "python", "monitoring/generate_data_drift_report.py",
-        "--reference_path", reference_data_path,
-        "--current_path", current_data_path,
-        "--output_path", drift_report_path
-    ])
-
-    # Refresh prediction drift report
-    subprocess.run([
-        "python", "monitoring/generate_prediction_drift_report.py",
-        "--reference_path", reference_prediction_path,
-        "--current_path", current_prediction_path,
-        "--output_path", prediction_drift_report_path
-    ])
-
-    print("Drift reports refreshed.")
+def build_jobs(args) -> list:
+    jobs = [
+        DriftJob("data_drift", generate_drift_report, {
+            "reference_path": args.reference_data_path,
+            "current_path": args.current_data_path,
+            "output_path": None if args.lazy_html else args.drift_report_path,
+            "profile_cache_dir": args.profile_cache_dir,
+            "sample_size": args.sample_size,
+            "stratify": args.stratify,
+            "drift_store_path": args.drift_store_path,
+            "backend": args.backend,
+        }),
+        DriftJob("prediction_drift", generate_prediction_drift_report, {
+            "reference_path": args.reference_prediction_path,
+            "current_path": args.current_prediction_path,
+            "output_path": None if args.lazy_html else args.prediction_drift_report_path,
+            "profile_cache_dir": args.profile_cache_dir,
+            "sample_size": args.sample_size,
+            "stratify": args.stratify,
+            "drift_store_path": args.drift_store_path,
+            "backend": args.backend,
+        }),
+    ]
+    if args.streaming_checkpoint_path:
+        # Only parses the rows appended to the CSV log since the previous tick
+        jobs.append(DriftJob("streaming_drift", follow_log, {
+            "reference_path": args.reference_prediction_path,
+            "current_path": args.current_prediction_path,
+            "checkpoint_path": args.streaming_checkpoint_path,
+            "profile_cache_dir": args.profile_cache_dir,
+        }))
+    return jobs
 
 def automate_drift_report_generation(args):
-    while True:
-        refresh_drift_reports(
-            args.reference_data_path,
-            args.current_data_path,
-            args.reference_prediction_path,
-            args.current_prediction_path,
-            args.drift_report_path,
-            args.prediction_drift_report_path
-        )
-        print(f"Sleeping for {args.interval} seconds before next refresh...")
-        time.sleep(args.interval)
+    scheduler = DriftScheduler(build_jobs(args), args.interval, executor=args.executor, status_path=args.status_path)
+    scheduler.run(cycles=args.cycles)
 
 def parse_args():
     parser = argparse.ArgumentParser()
@@ -45,6 +159,16 @@ def parse_args():
     parser.add_argument("--drift_report_path", type=str, required=True, help="Path to the drift report output")
     parser.add_argument("--prediction_drift_report_path", type=str, required=True, help="Path to the prediction drift report output")
     parser.add_argument("--interval", type=int, default=3600, help="Interval in seconds to refresh the reports")
+    parser.add_argument("--executor", type=str, choices=["thread", "process"], default="thread", help="Run the jobs in a thread or process pool")
+    parser.add_argument("--profile_cache_dir", type=str, default=None, help="Reuse cached reference profiles from this directory")
+    parser.add_argument("--sample_size", type=int, default=None, help="Run the drift tests on a sample of at most this many rows")
+    parser.add_argument("--stratify", action="store_true", help="Sample each predicted class in proportion to its share of the rows")
+    parser.add_argument("--drift_store_path", type=str, default=DRIFT_STORE_PATH, help="Append-only store of structured drift results (empty to skip)")
+    parser.add_argument("--backend", type=str, choices=["evidently", "numpy"], default="evidently", help="Compute the drift tests with Evidently or directly with NumPy (implies --lazy_html)")
+    parser.add_argument("--lazy_html", action="store_true", help="Only store structured results; HTML is rendered when requested through /drift")
+    parser.add_argument("--streaming_checkpoint_path", type=str, default=None, help="Also refresh the streaming drift scores from the new log rows, checkpointed here")
+    parser.add_argument("--status_path", type=str, default="monitoring/drift_reports/scheduler_status.json", help="Where to write per-job runtime and failure stats")
+    parser.add_argument("--cycles", type=int, default=None, help="Stop after this many refreshes (default: run forever)")
     return parser.parse_args()
 
 if __name__ == "__main__":
@@ -0,0 +1,157 @@
+# Drift statistics computed with NumPy on per-column histograms.
+# Every function takes count arrays of shape (..., n_bins) and is vectorized over the leading axes,
+# so all features are scored in one call. The per-sample tests (ECDF distances, KS p-value) and the
+# table of drift tests shared by the NumPy backend and the parallel engine are at the end.
+
+import numpy as np
+from scipy import stats
+
+# Test name -> (name published with the scores, default threshold), as registered in Evidently
+STAT_TESTS = {
+    "ks": ("K-S p_value", 0.05),
+    "wasserstein": ("Wasserstein distance (normed)", 0.1),
+    "psi": ("PSI", 0.1),
+    "jensenshannon": ("Jensen-Shannon distance", 0.1),
+    "chisquare": ("chi-square p_value", 0.05),
+    "z": ("Z-test p_value", 0.05),
+}
+
+def histogram_edges(values: np.ndarray, n_bins: int) -> np.ndarray:
+    """
+    Interior bin edges (length n_bins - 1) for one column of reference values.
+    Columns with few distinct values (e.g. the predicted class) get one bin per value;
+    continuous columns get quantile edges. Unused trailing edges are padded with +inf.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    values = values[~np.isnan(values)]
+    edges = np.full(n_bins - 1, np.inf)
+    if len(values) == 0:
+        return edges
+
+    distinct = np.unique(values)
+    if len(distinct) <= n_bins:
+        interior = (distinct[:-1] + distinct[1:]) / 2
+    else:
+        interior = np.unique(np.quantile(values, np.linspace(0, 1, n_bins + 1)[1:-1]))
+    edges[:len(interior)] = interior
+    return edges
+
+def bin_indices(values: np.ndarray, edges: np.ndarray) -> np.ndarray:
+    """Bin index of every value for a (n_rows, n_columns) matrix given (n_columns, n_bins - 1) edges. NaN maps to -1."""
+    values = np.asarray(values, dtype=np.float64)
+    indices = np.empty(values.shape, dtype=np.int64)
+    for column in range(values.shape[1]):
+        indices[:, column] = np.searchsorted(edges[column], values[:, column], side="right")
+    indices[np.isnan(values)] = -1
+    return indices
+
+def histogram_counts(values: np.ndarray, edges: np.ndarray) -> np.ndarray:
+    """Per-column histogram counts of a (n_rows, n_columns) matrix, shape (n_columns, n_bins)."""
+    n_columns, n_bins = edges.shape[0], edges.shape[1] + 1
+    indices = bin_indices(values, edges)
+    flat = indices + np.arange(n_columns) * n_bins
+    flat = flat[indices >= 0]
+    return np.bincount(flat, minlength=n_columns * n_bins).reshape(n_columns, n_bins)
+
+def sorted_histogram_counts(sorted_values: np.ndarray, edges: np.ndarray) -> np.ndarray:
+    """Histogram counts of one already sorted, NaN-free column (same bins as histogram_counts) by bisecting the edges."""
+    below = np.searchsorted(sorted_values, edges, side="left")
+    return np.diff(np.concatenate([[0], below, [len(sorted_values)]]))
+
+def _proportions(counts: np.ndarray, eps: float) -> np.ndarray:
+    counts = np.asarray(counts, dtype=np.float64)
+    totals = counts.sum(axis=-1, keepdims=True)
+    proportions = np.divide(counts, totals, out=np.zeros_like(counts), where=totals > 0)
+    return np.maximum(proportions, eps) if eps else proportions
+
+def psi(reference_counts: np.ndarray, current_counts: np.ndarray, eps: float = 1e-4) -> np.ndarray:
+    """Population Stability Index; empty bins are floored at `eps` to keep the log finite."""
+    reference = _proportions(reference_counts, eps)
+    current = _proportions(current_counts, eps)
+    return np.sum((current - reference) * np.log(current / reference), axis=-1)
+
+def jensen_shannon(reference_counts: np.ndarray, current_counts: np.ndarray) -> np.ndarray:
+    """Jensen-Shannon distance (natural log, same convention as scipy.spatial.distance.jensenshannon)."""
+    reference = _proportions(reference_counts, 0)
+    current = _proportions(current_counts, 0)
+    middle = (reference + current) / 2
+
+    def kl(p, q):
+        ratio = np.divide(p, q, out=np.ones_like(p), where=(p > 0) & (q > 0))
+        return np.sum(p * np.log(ratio), axis=-1)
+
+    return np.sqrt(np.maximum((kl(reference, middle) + kl(current, middle)) / 2, 0))
+
+def chi_square_pvalues(reference_counts: np.ndarray, current_counts: np.ndarray) -> np.ndarray:
+    """
+    p-value of the chi-square test of homogeneity of two histograms (the 2 x n_bins contingency table,
+    bins empty on both sides left out). Unlike PSI, it accounts for the sample sizes: a few hundred rows
+    spread over 20 bins move the shares by chance far more than a million rows do. 1 when either side is empty.
+    """
+    reference = np.asarray(reference_counts, dtype=np.float64)
+    current = np.asarray(current_counts, dtype=np.float64)
+    n_reference = reference.sum(axis=-1, keepdims=True)
+    n_current = current.sum(axis=-1, keepdims=True)
+    total = n_reference + n_current
+    both = reference + current
+    with np.errstate(divide="ignore", invalid="ignore"):
+        expected_reference = both * n_reference / total
+        expected_current = both * n_current / total
+        terms = (reference - expected_reference) ** 2 / expected_reference + (current - expected_current) ** 2 / expected_current
+    statistic = np.sum(np.where(both > 0, terms, 0.0), axis=-1)
+    dof = np.count_nonzero(both, axis=-1) - 1
+    pvalues = stats.chi2.sf(statistic, np.maximum(dof, 1))
+    return np.where((dof > 0) & (n_reference[..., 0] > 0) & (n_current[..., 0] > 0), pvalues, 1.0)
+
+def ks_from_histograms(reference_counts: np.ndarray, current_counts: np.ndarray) -> np.ndarray:
+    """
+    Kolmogorov-Smirnov statistic evaluated at the bin edges only. This is a lower bound on the
+    exact statistic that converges to it as bins get finer.
+    """
+    reference = np.cumsum(_proportions(reference_counts, 0), axis=-1)
+    current = np.cumsum(_proportions(current_counts, 0), axis=-1)
+    return np.max(np.abs(reference - current), axis=-1)
+
+def ecdf_distances(reference: np.ndarray, current: np.ndarray) -> tuple:
+    """
+    (KS statistic, first Wasserstein distance) of two 1-D samples without NaNs, from one merge of the
+    sorted samples. The Wasserstein distance is the area between the two empirical CDFs, the same value
+    as scipy.stats.wasserstein_distance.
+    """
+    a = np.sort(np.asarray(reference, dtype=np.float64))
+    b = np.sort(np.asarray(current, dtype=np.float64))
+    if len(a) == 0 or len(b) == 0:
+        return 0.0, 0.0
+    # A stable sort of two sorted runs is a linear merge; from_a marks where each merged value came from
+    order = np.argsort(np.concatenate([a, b]), kind="stable")
+    values = np.concatenate([a, b])[order]
+    count_a = np.cumsum(order < len(a))
+    count_b = np.arange(1, len(values) + 1) - count_a
+    # Both CDFs are evaluated after the last copy of every distinct value
+    last = np.append(values[1:] != values[:-1], True)
+    difference = np.abs(count_a[last] / len(a) - count_b[last] / len(b))
+    return float(difference.max()), float(np.sum(difference[:-1] * np.diff(values[last])))
+
+def ks_pvalue(reference: np.ndarray, current: np.ndarray, statistic: float) -> float:
+    """
+    Two-sided p-value of the KS test, as scipy.stats.ks_2samp computes it. Large samples use its asymptotic
+    distribution directly from the statistic instead of sorting both columns again.
+    """
+    if max(len(reference), len(current)) <= 10000:
+        return float(stats.ks_2samp(reference, current).pvalue)
+    n_effective = len(reference) * len(current) / (len(reference) + len(current))
+    return float(np.clip(stats.kstwo.sf(statistic, np.round(n_effective)), 0, 1))
+
+def ks_statistic(reference: np.ndarray, current: np.ndarray) -> np.ndarray:
+    """
+    Exact two-sample Kolmogorov-Smirnov statistic per column of two (n_rows, n_columns) matrices.
+    NaNs are dropped column by column; a column with no values on either side scores 0.
+    """
+    reference = np.asarray(reference, dtype=np.float64)
+    current = np.asarray(current, dtype=np.float64)
+    statistics = np.zeros(reference.shape[1])
+    for column in range(reference.shape[1]):
+        a = reference[:, column]
+        b = current[:, column]
+        statistics[column] = ecdf_distances(a[~np.isnan(a)], b[~np.isnan(b)])[0]
+    return statistics
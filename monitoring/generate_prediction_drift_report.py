@@ -1,36 +1,131 @@
-import pandas as pd
-from evidently.report import Report
-from evidently.metric_preset import TargetDriftPreset
 import os
 import argparse
+from app.prediction_store import read_predictions, pin_window_end
+from app.drift_scores import scores_from_report_dict, save_drift_scores
+from app.drift_store import DriftStore
+from app.constants import DRIFT_SCORES_DIR, DRIFT_STORE_PATH
+from monitoring.reference_profile import load_reference_profile
+from monitoring.sampling import draw_sample, sampling_bounds, bounds_path, save_sampling_bounds
+from monitoring import numpy_drift
 
-def generate_prediction_drift_report(reference_path: str, current_path: str, output_path: str):
-    # Load datasets
-    reference = pd.read_csv(reference_path)
-    current = pd.read_csv(current_path)
+PREDICTION_COLUMNS = ["prediction", "probability"]
+PREDICTION_COLUMN = "prediction"
+BACKENDS = ["evidently", "numpy"]
 
-    # Create Evidently report
-    report = Report(metrics=[TargetDriftPreset()])
+def generate_prediction_drift_report(reference_path: str, current_path: str, output_path: str,
+                                     start: str = None, end: str = None,
+                                     reference_start: str = None, reference_end: str = None,
+                                     columns: list = None, profile_cache_dir: str = None, scores_dir: str = DRIFT_SCORES_DIR,
+                                     sample_size: int = None, stratify: bool = False, drift_store_path: str = DRIFT_STORE_PATH,
+                                     backend: str = "evidently"):
+    # Load datasets: only the prediction columns, and only the requested time windows.
+    # With a profile cache, the reference comes from the cached profile instead of being re-read.
+    # With a sample size, both sides are reservoir-sampled while being read in chunks.
+    # An open window ends now; that end is stored with the run, so a report rendered later covers the same rows.
+    columns = columns or PREDICTION_COLUMNS
+    end = pin_window_end(current_path, end)
+    if profile_cache_dir:
+        profile = load_reference_profile(reference_path, profile_cache_dir, columns=columns,
+                                         start=reference_start, end=reference_end)
+        reference, reference_rows = profile.sample_frame(), profile.n_rows
+    elif sample_size:
+        reference, reference_rows = draw_sample(reference_path, columns, sample_size, stratify=stratify,
+                                                start=reference_start, end=reference_end)
+    else:
+        reference = read_predictions(reference_path, columns=columns, start=reference_start, end=reference_end, drop_duplicates=True)
+        reference_rows = len(reference)
+    if sample_size:
+        current, current_rows = draw_sample(current_path, columns, sample_size, stratify=stratify, start=start, end=end)
+    else:
+        current = read_predictions(current_path, columns=columns, start=start, end=end, drop_duplicates=True)
+        current_rows = len(current)
 
-    # Run the comparison
-    report.run(reference_data=reference, current_data=current)
+    if backend == "numpy":
+        # Evidently's target drift preset tests the prediction column; the same test and score are computed
+        # on the arrays, and the HTML report is left to the API to render on request
+        scores = numpy_drift.drift_scores(reference, current, columns=[column for column in columns if column == PREDICTION_COLUMN])
+        output_path = None
+    elif backend == "evidently":
+        from evidently.report import Report
+        from evidently.metric_preset import TargetDriftPreset
+
+        # Create Evidently report
+        report = Report(metrics=[TargetDriftPreset()])
+
+        # Run the comparison
+        report.run(reference_data=reference, current_data=current)
+        scores = scores_from_report_dict(report.as_dict())
+    else:
+        raise ValueError(f"Invalid backend: {backend}. Please choose one of {BACKENDS}.")
+
+    # Publish the per-column drift scores for the API's /metrics endpoint
+    if scores_dir:
+        save_drift_scores("prediction_drift", scores, scores_dir)
+
+    # Record how far the sampled results can be from the full-data ones; the bounds are stored with the run
+    bounds = None
+    if len(reference) < reference_rows or len(current) < current_rows:
+        bounds = sampling_bounds(reference, current, reference_rows, current_rows)
+
+    # Append the structured results to the drift store served on /drift. Without an output path the HTML
+    # is not rendered now; the stored settings let the API render it when someone asks for it.
+    if drift_store_path:
+        run_id = DriftStore(drift_store_path).append_run(
+            "prediction_drift", scores, window_start=start, window_end=end, reference_rows=reference_rows,
+            current_rows=current_rows, report_path=output_path,
+            params={"reference_path": reference_path, "current_path": current_path, "start": start, "end": end,
+                    "reference_start": reference_start, "reference_end": reference_end, "columns": columns,
+                    "profile_cache_dir": profile_cache_dir, "sample_size": sample_size, "stratify": stratify,
+                    "backend": backend, "sampling_bounds": bounds}
+        )
+        print(f"Drift results stored as run {run_id} in {drift_store_path}")
+
+    if output_path is None:
+        return
 
     # Save the report
     os.makedirs(os.path.dirname(output_path), exist_ok=True)
     report.save_html(output_path)
 
+    # Keep the bounds next to the report as well
+    if bounds is not None:
+        save_sampling_bounds(bounds, bounds_path(output_path))
+        print(f"Sampled {len(current)} of {current_rows} current rows; bounds at {bounds_path(output_path)}")
+
     print(f"✅ Prediction drift report generated at: {output_path}")
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Generate Prediction Drift Report")
-    parser.add_argument("--reference_path", type=str, required=True)
-    parser.add_argument("--current_path", type=str, required=True)
-    parser.add_argument("--output_path", type=str, required=True)
+    parser.add_argument("--reference_path", type=str, required=True, help="CSV prediction log or Parquet prediction store directory")
+    parser.add_argument("--current_path", type=str, required=True, help="CSV prediction log or Parquet prediction store directory")
+    parser.add_argument("--output_path", type=str, default=None, help="HTML report to write (omit to only store the structured results)")
+    parser.add_argument("--start", type=str, default=None, help="Only use current predictions logged at or after this ISO timestamp")
+    parser.add_argument("--end", type=str, default=None, help="Only use current predictions logged before this ISO timestamp")
+    parser.add_argument("--reference_start", type=str, default=None, help="Only use reference predictions logged at or after this ISO timestamp")
+    parser.add_argument("--reference_end", type=str, default=None, help="Only use reference predictions logged before this ISO timestamp")
+    parser.add_argument("--columns", type=str, nargs="+", default=PREDICTION_COLUMNS, help="Columns to compare")
+    parser.add_argument("--profile_cache_dir", type=str, default=None, help="Reuse the cached reference profile stored in this directory")
+    parser.add_argument("--scores_dir", type=str, default=DRIFT_SCORES_DIR, help="Directory where the latest per-column drift scores are published")
+    parser.add_argument("--drift_store_path", type=str, default=DRIFT_STORE_PATH, help="Append-only store of structured drift results (empty to skip)")
+    parser.add_argument("--sample_size", type=int, default=None, help="Run the drift tests on a reservoir sample of at most this many rows")
+    parser.add_argument("--stratify", action="store_true", help="Sample each predicted class in proportion to its share of the rows")
+    parser.add_argument("--backend", type=str, choices=BACKENDS, default="evidently", help="Compute the drift tests with Evidently or directly with NumPy (no HTML report)")
 
     args = parser.parse_args()
 
     generate_prediction_drift_report(
         reference_path=args.reference_path,
         current_path=args.current_path,
-        output_path=args.output_path
+        output_path=args.output_path,
+        start=args.start,
+        end=args.end,
+        reference_start=args.reference_start,
+        reference_end=args.reference_end,
+        columns=args.columns,
+        profile_cache_dir=args.profile_cache_dir,
+        scores_dir=args.scores_dir,
+        sample_size=args.sample_size,
+        stratify=args.stratify,
+        drift_store_path=args.drift_store_path,
+        backend=args.backend
     )
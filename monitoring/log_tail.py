@@ -0,0 +1,182 @@
+# Tail-following reader for the CSV prediction log. A durable checkpoint records where the previous cycle
+# stopped (file identity, byte offset and header), so each cycle parses only the rows appended since, and
+# the cost of a refresh follows new traffic instead of the size of the log.
+#
+# The checkpoint is only advanced by commit(), after the caller has processed the rows, and it can carry
+# the caller's own state so that both are replaced in one atomic write. Rotation (the log renamed away and
+# a new one started) and truncation (the log cut back in place) are detected from the file's inode and size.
+#
+#   python -m monitoring.log_tail --path data/predictions.csv --checkpoint_path monitoring/drift_reports/tail.json
+
+import argparse
+import io
+import json
+import os
+
+import pandas as pd
+
+class LogCheckpoint:
+    """Position in the log: the file's (device, inode), the byte offset of the next unread row and its header."""
+
+    def __init__(self, device: int = None, inode: int = None, offset: int = 0, header: list = None, state: dict = None):
+        self.device = device
+        self.inode = inode
+        self.offset = offset
+        self.header = header
+        self.state = state
+
+    @classmethod
+    def load(cls, path: str) -> "LogCheckpoint":
+        """The saved checkpoint, or an empty one (start of the log) when there is none yet."""
+        if not os.path.exists(path):
+            return cls()
+        with open(path) as f:
+            return cls(**json.load(f))
+
+    def to_dict(self) -> dict:
+        return {"device": self.device, "inode": self.inode, "offset": self.offset, "header": self.header, "state": self.state}
+
+    def save(self, path: str):
+        """Atomically replace the checkpoint file (written and fsynced under a temporary name first)."""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.to_dict(), f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+class LogTailer:
+    """
+    Reads the rows appended to the CSV log at `path` since the checkpoint stored at `checkpoint_path`.
+
+        tailer = LogTailer("data/predictions.csv", "tail.json")
+        for frame in tailer.read():
+            process(frame)
+        tailer.commit()
+
+    A trailing line without its newline is still being written and is left for the next cycle.
+    Without a `checkpoint_path`, the tailer starts from `checkpoint` and commit() only updates
+    self.checkpoint, for callers that save it together with their own state.
+    """
+
+    def __init__(self, path: str, checkpoint_path: str = None, chunk_bytes: int = 64 * 1024 * 1024,
+                 checkpoint: LogCheckpoint = None):
+        self.path = path
+        self.checkpoint_path = checkpoint_path
+        self.chunk_bytes = chunk_bytes
+        if checkpoint_path is not None:
+            checkpoint = LogCheckpoint.load(checkpoint_path)
+        self.checkpoint = checkpoint or LogCheckpoint()
+        self._position = None  # (device, inode, offset, header) reached by read(), committed by commit()
+        self.stats = {"rows": 0, "bytes": 0, "rotations": 0, "truncations": 0}
+
+    @property
+    def state(self) -> dict:
+        """Caller state saved with the last committed checkpoint (None before the first commit)."""
+        return self.checkpoint.state
+
+    def read(self):
+        """Yield DataFrames of the rows appended since the checkpoint, oldest first."""
+        checkpoint = self.checkpoint
+        device, inode, offset, header = checkpoint.device, checkpoint.inode, checkpoint.offset, checkpoint.header
+        if not os.path.exists(self.path):
+            # Between a rotation and the first write to the new log: keep following the old file
+            rotated = self._find_rotated(device, inode) if inode is not None else None
+            if rotated is not None:
+                self._position = (device, inode, offset, header)
+                yield from self._read_file(rotated, offset, header, final=False)
+            return
+        stat = os.stat(self.path)
+
+        if inode is not None and (stat.st_dev, stat.st_ino) != (device, inode):
+            # Rotated: finish the old file if it is still next to the log, then start the new one from the top
+            rotated = self._find_rotated(device, inode)
+            if rotated is not None:
+                yield from self._read_file(rotated, offset, header, final=True)
+            print(f"{self.path} was rotated; reading the new file from the start")
+            self.stats["rotations"] += 1
+            offset, header = 0, None
+        elif stat.st_size < offset or (header is not None and self._read_header(self.path)[0] != header):
+            # Truncated in place (or rewritten with other columns): everything in the file is new
+            print(f"{self.path} was truncated; reading it again from the start")
+            self.stats["truncations"] += 1
+            offset, header = 0, None
+
+        self._position = (stat.st_dev, stat.st_ino, offset, header)
+        yield from self._read_file(self.path, offset, header, final=False)
+
+    def commit(self, state: dict = None):
+        """Make everything read so far durable, together with `state` (e.g. what the rows were aggregated into)."""
+        if self._position is None:
+            return
+        device, inode, offset, header = self._position
+        self.checkpoint = LogCheckpoint(device, inode, offset, header, state)
+        if self.checkpoint_path is not None:
+            self.checkpoint.save(self.checkpoint_path)
+
+    @staticmethod
+    def _read_header(path: str) -> tuple:
+        """(columns, byte offset of the first row) of a CSV file, or (None, 0) while its header is incomplete."""
+        with open(path, "rb") as f:
+            line = f.readline()
+        if not line.endswith(b"\n"):
+            return None, 0
+        return line.decode().strip().split(","), len(line)
+
+    def _find_rotated(self, device: int, inode: int) -> str:
+        """The file a rotation renamed the log to (same inode, e.g. predictions.csv.1), if it is still there."""
+        directory = os.path.dirname(self.path) or "."
+        name = os.path.basename(self.path)
+        for entry in os.scandir(directory):
+            if entry.name != name and entry.name.startswith(name.split(".")[0]) and entry.is_file():
+                stat = entry.stat()
+                if (stat.st_dev, stat.st_ino) == (device, inode):
+                    return entry.path
+        return None
+
+    def _read_file(self, path: str, offset: int, header: list, final: bool):
+        """Parse complete rows of `path` from `offset` on in chunks of about `chunk_bytes`, tracking the position."""
+        if header is None:
+            header, offset = self._read_header(path)
+            if header is None:
+                return
+            if not final:
+                self._position = (*self._position[:2], offset, header)
+
+        with open(path, "rb") as f:
+            f.seek(offset)
+            pending = b""
+            while True:
+                block = f.read(self.chunk_bytes)
+                if not block and not (final and pending):
+                    break
+                data = pending + block
+                # Only parse up to the last newline; a rotated file is complete, so its last line counts too
+                end = len(data) if final and not block else data.rfind(b"\n") + 1
+                pending = data[end:]
+                if end == 0:
+                    continue
+                frame = pd.read_csv(io.BytesIO(data[:end]), header=None, names=header)
+                offset += end
+                self.stats["rows"] += len(frame)
+                self.stats["bytes"] += end
+                if not final:
+                    self._position = (*self._position[:2], offset, header)
+                yield frame
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Print the rows appended to a CSV prediction log since the last run")
+    parser.add_argument("--path", type=str, required=True, help="CSV prediction log")
+    parser.add_argument("--checkpoint_path", type=str, required=True, help="Where the read position is kept between runs")
+    parser.add_argument("--dry_run", action="store_true", help="Do not advance the checkpoint")
+
+    args = parser.parse_args()
+
+    tailer = LogTailer(args.path, args.checkpoint_path)
+    n_rows = sum(len(frame) for frame in tailer.read())
+    if not args.dry_run:
+        tailer.commit(tailer.state)
+    print(f"{n_rows} new rows ({tailer.stats['bytes']} bytes) in {args.path}")
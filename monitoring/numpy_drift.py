@@ -0,0 +1,146 @@
+# Drift tests computed directly on NumPy arrays, as a lightweight alternative to Evidently's Report.
+# Each column is sorted once; the KS statistic and the Wasserstein distance come from one merge of the sorted
+# samples, and histograms and value counts from bisecting the sorted values. The test chosen for a column, its
+# threshold and its score follow Evidently's defaults (the same scores as the Evidently reports produce), so
+# runs of either backend can be compared in the drift store and on /metrics. No HTML is rendered; /drift can
+# still render the Evidently report of a run on request.
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+from scipy.spatial import distance
+
+from monitoring.drift_stats import STAT_TESTS, ecdf_distances, ks_pvalue
+
+# Integer columns with at most this many distinct values are categorical (Evidently's NUMBER_UNIQUE_AS_CATEGORICAL)
+CATEGORICAL_MAX_UNIQUE = 5
+
+def _distinct(sorted_values: np.ndarray) -> np.ndarray:
+    if len(sorted_values) == 0:
+        return sorted_values
+    return sorted_values[np.append(True, sorted_values[1:] != sorted_values[:-1])]
+
+def _value_counts(sorted_values: np.ndarray, keys: np.ndarray) -> np.ndarray:
+    """Occurrences of every key (sorted) in a sorted column."""
+    return np.searchsorted(sorted_values, keys, side="right") - np.searchsorted(sorted_values, keys, side="left")
+
+def default_stattest(n_reference: int, n_values: int, categorical: bool) -> str:
+    """Evidently's default test for a column: by reference size, number of distinct values and column type."""
+    if n_reference <= 1000:
+        if categorical or n_values <= CATEGORICAL_MAX_UNIQUE:
+            return "chisquare" if n_values > 2 else "z"
+        return "ks"
+    if categorical or n_values <= CATEGORICAL_MAX_UNIQUE:
+        return "jensenshannon"
+    return "wasserstein"
+
+def binned_proportions(reference: np.ndarray, current: np.ndarray, categorical: bool, fill_zeroes: bool = True) -> tuple:
+    """
+    Shares of two sorted columns per bin, binned the way Evidently's PSI and Jensen-Shannon tests bin them:
+    Sturges-rule histogram over both columns for numerical columns with more than 20 distinct reference
+    values, one bin per distinct value otherwise. With `fill_zeroes`, empty bins get a small share.
+    """
+    if not categorical and len(_distinct(reference)) > 20:
+        edges = np.histogram_bin_edges(np.concatenate([reference, current]), bins="sturges")
+
+        def counts(values):
+            # np.histogram's bins: [edge, next edge), the last one closed on the right
+            below = np.searchsorted(values, edges, side="left")
+            below[-1] = np.searchsorted(values, edges[-1], side="right")
+            return np.diff(below)
+
+        reference_counts, current_counts = counts(reference), counts(current)
+    else:
+        keys = np.union1d(_distinct(reference), _distinct(current))
+        reference_counts, current_counts = _value_counts(reference, keys), _value_counts(current, keys)
+    reference_shares = reference_counts / len(reference)
+    current_shares = current_counts / len(current)
+
+    if fill_zeroes:
+        for shares in (reference_shares, current_shares):
+            smallest = shares[shares != 0].min()
+            shares[shares == 0] = smallest / 10**6 if smallest <= 0.0001 else 0.0001
+    return reference_shares, current_shares
+
+def z_test_pvalue(reference: np.ndarray, current: np.ndarray, keys: np.ndarray) -> float:
+    """Two-sided z-test for the difference of the share of the first key (Evidently's binary categorical test)."""
+    if len(keys) == 1:
+        return 1.0
+    p1 = 1 - _value_counts(reference, keys[:1])[0] / len(reference)
+    p2 = 1 - _value_counts(current, keys[:1])[0] / len(current)
+    pooled = (p1 * len(reference) + p2 * len(current)) / (len(reference) + len(current))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        z = (p1 - p2) / np.sqrt(pooled * (1 - pooled) * (1 / len(reference) + 1 / len(current)))
+    return float(2 * (1 - stats.norm.cdf(np.abs(z))))
+
+def chi_square_pvalue(reference: np.ndarray, current: np.ndarray, keys: np.ndarray) -> float:
+    """Chi-square goodness of fit of the current class counts to the reference ones, scaled to the current size."""
+    expected = _value_counts(reference, keys) * (len(current) / len(reference))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return float(stats.chisquare(_value_counts(current, keys), expected)[1])
+
+def column_drift(reference: np.ndarray, current: np.ndarray, categorical: bool = False, stat_test: str = "auto",
+                 threshold: float = None) -> dict:
+    """
+    Drift score and verdict of one column (NaNs and infinities dropped, as Evidently drops them), with the
+    test Evidently would pick for it unless `stat_test` names one.
+    """
+    reference = np.asarray(reference, dtype=np.float64)
+    current = np.asarray(current, dtype=np.float64)
+    reference = np.sort(reference[np.isfinite(reference)])
+    current = np.sort(current[np.isfinite(current)])
+    if len(reference) == 0 or len(current) == 0:
+        raise ValueError("Cannot test drift on a column without values")
+
+    # Only the distinct values of small columns are ever needed, so avoid merging large ones
+    reference_distinct, current_distinct = _distinct(reference), _distinct(current)
+    keys = np.union1d(reference_distinct, current_distinct) if max(len(reference_distinct), len(current_distinct)) <= 1000 else None
+    n_values = len(keys) if keys is not None else max(len(reference_distinct), len(current_distinct))
+    if stat_test == "auto":
+        stat_test = default_stattest(len(reference), n_values, categorical)
+    name, default_threshold = STAT_TESTS[stat_test]
+    threshold = default_threshold if threshold is None else threshold
+
+    if stat_test in ("chisquare", "z") and keys is None:
+        keys = np.union1d(reference_distinct, current_distinct)
+    if stat_test == "ks":
+        score = ks_pvalue(reference, current, ecdf_distances(reference, current)[0])
+        drifted = score <= threshold
+    elif stat_test == "wasserstein":
+        score = ecdf_distances(reference, current)[1] / max(float(np.std(reference)), 0.001)
+        drifted = score >= threshold
+    elif stat_test == "psi":
+        reference_shares, current_shares = binned_proportions(reference, current, categorical)
+        score = float(np.sum((reference_shares - current_shares) * np.log(reference_shares / current_shares)))
+        drifted = score >= threshold
+    elif stat_test == "jensenshannon":
+        score = float(distance.jensenshannon(*binned_proportions(reference, current, categorical, fill_zeroes=False)))
+        drifted = score >= threshold
+    elif stat_test == "chisquare":
+        score = chi_square_pvalue(reference, current, keys)
+        drifted = score < threshold
+    else:
+        score = z_test_pvalue(reference, current, keys)
+        drifted = score < threshold
+    return {"drift_score": float(score), "stattest": name, "threshold": threshold, "drift_detected": bool(drifted)}
+
+def is_categorical(reference: pd.Series) -> bool:
+    """Evidently's type inference for an unmapped column: integers with few distinct values (or booleans)."""
+    return pd.api.types.is_bool_dtype(reference) or (
+        pd.api.types.is_integer_dtype(reference) and reference.nunique() <= CATEGORICAL_MAX_UNIQUE
+    )
+
+def drift_scores(reference: pd.DataFrame, current: pd.DataFrame, columns: list = None, categorical: list = None,
+                 stat_test: str = "auto") -> dict:
+    """
+    {column: {drift_score, stattest, drift_detected, threshold}} for every column, in the format of
+    app.drift_scores.scores_from_report_dict. Columns are typed like Evidently types them unless
+    `categorical` lists the categorical ones.
+    """
+    columns = columns or list(current.columns)
+    scores = {}
+    for column in columns:
+        column_categorical = column in categorical if categorical is not None else is_categorical(reference[column])
+        scores[column] = column_drift(reference[column].to_numpy(dtype=np.float64), current[column].to_numpy(dtype=np.float64),
+                                      categorical=column_categorical, stat_test=stat_test)
+    return scores
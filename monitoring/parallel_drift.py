@@ -0,0 +1,182 @@
+# Per-feature drift tests spread over a process pool. The reference and current columns are copied once
+# into shared memory as column-major float64 matrices; workers attach to the blocks by name and read
+# their columns in place, so no DataFrame is pickled to a worker and only the small per-column results
+# come back. Every column is an independent task, so the pool stays busy until the last feature is done.
+# Columns are scored by monitoring.numpy_drift.column_drift, with the same tests and rules as the NumPy backend.
+#
+#   python -m monitoring.parallel_drift --reference_path data/incoming_data.csv --current_path data/predictions.csv \
+#       --output_path monitoring/drift_reports/data_drift_summary.json --n_workers 16
+
+import argparse
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+
+from app.schema import FEATURE_NAMES
+from app.prediction_store import read_predictions, pin_window_end
+from app.drift_scores import save_drift_scores
+from app.drift_store import DriftStore
+from app.constants import DRIFT_SCORES_DIR, DRIFT_STORE_PATH
+from monitoring.drift_stats import STAT_TESTS
+from monitoring.numpy_drift import column_drift, is_categorical
+from monitoring.sampling import draw_sample
+
+# Share of drifted columns at which the whole dataset counts as drifted (Evidently's DataDriftPreset default)
+DATASET_DRIFT_SHARE = 0.5
+
+######################################################### SHARED MEMORY #########################################################
+
+class SharedMatrix:
+    """A (n_columns, n_rows) float64 matrix in a named shared memory block."""
+
+    def __init__(self, values: np.ndarray):
+        values = np.asarray(values, dtype=np.float64)
+        self.shape = (values.shape[1], values.shape[0])
+        self.shm = SharedMemory(create=True, size=max(values.nbytes, 1))
+        self.array = np.ndarray(self.shape, dtype=np.float64, buffer=self.shm.buf)
+        self.array[:] = values.T
+
+    @property
+    def spec(self) -> tuple:
+        """What a worker needs to attach: (block name, shape)."""
+        return self.shm.name, self.shape
+
+    def close(self):
+        del self.array
+        self.shm.close()
+        self.shm.unlink()
+
+_worker_blocks = {}  # Attached blocks of this worker process: key -> (SharedMemory, array)
+
+def _attach(specs: dict):
+    """Pool initializer: map the shared matrices into this worker."""
+    for key, (name, shape) in specs.items():
+        # Pool workers share the parent's resource tracker, so attaching does not change who unlinks the block
+        shm = SharedMemory(name=name)
+        _worker_blocks[key] = (shm, np.ndarray(shape, dtype=np.float64, buffer=shm.buf))
+
+def _score_shared_column(task: tuple) -> dict:
+    column, categorical, stat_test, threshold = task
+    reference = _worker_blocks["reference"][1][column]
+    current = _worker_blocks["current"][1][column]
+    return column_drift(reference, current, categorical=categorical, stat_test=stat_test, threshold=threshold)
+
+########################################################### DRIFT TESTS ###########################################################
+
+def parallel_drift(reference: np.ndarray, current: np.ndarray, columns: list, n_workers: int = None,
+                   stat_test: str = "auto", threshold: float = None, categorical: list = None) -> dict:
+    """
+    Score every column of two (n_rows, n_columns) matrices in a pool of `n_workers` processes (one per
+    CPU by default) and merge the results. `categorical` lists the categorical columns (none by default).
+    With a single worker the columns are scored in this process.
+    """
+    n_workers = n_workers or os.cpu_count()
+    categorical = set(categorical or [])
+    tasks = [(i, column in categorical, stat_test, threshold) for i, column in enumerate(columns)]
+
+    if n_workers == 1:
+        results = [column_drift(np.asarray(reference[:, i], dtype=np.float64), np.asarray(current[:, i], dtype=np.float64),
+                                categorical=column_categorical, stat_test=stat_test, threshold=threshold)
+                   for i, column_categorical, *_ in tasks]
+    else:
+        blocks = {"reference": SharedMatrix(reference), "current": SharedMatrix(current)}
+        try:
+            specs = {key: block.spec for key, block in blocks.items()}
+            with ProcessPoolExecutor(max_workers=min(n_workers, len(columns)), initializer=_attach, initargs=(specs,)) as pool:
+                results = list(pool.map(_score_shared_column, tasks))
+        finally:
+            for block in blocks.values():
+                block.close()
+
+    by_column = dict(zip(columns, results))
+    n_drifted = sum(result["drift_detected"] for result in results)
+    share = n_drifted / len(columns) if columns else 0.0
+    return {
+        "reference_rows": int(len(reference)),
+        "current_rows": int(len(current)),
+        "n_columns": len(columns),
+        "n_drifted_columns": n_drifted,
+        "share_of_drifted_columns": share,
+        "dataset_drift": share >= DATASET_DRIFT_SHARE,
+        "columns": by_column,
+    }
+
+def generate_parallel_drift_summary(reference_path: str, current_path: str, output_path: str, columns: list = None,
+                                    start: str = None, end: str = None, n_workers: int = None, stat_test: str = "auto",
+                                    sample_size: int = None, stratify: bool = False, scores_dir: str = DRIFT_SCORES_DIR,
+                                    drift_store_path: str = DRIFT_STORE_PATH) -> dict:
+    """
+    Load both datasets, run parallel_drift and write the JSON summary. The scores are published and stored
+    like the Evidently data drift report's, marked with engine "parallel"; an open window ends now.
+    """
+    columns = columns or FEATURE_NAMES
+    end = pin_window_end(current_path, end)
+    if sample_size:
+        reference, reference_rows = draw_sample(reference_path, columns, sample_size, stratify=stratify)
+        current, current_rows = draw_sample(current_path, columns, sample_size, stratify=stratify, start=start, end=end)
+    else:
+        reference = read_predictions(reference_path, columns=columns, drop_duplicates=True)
+        current = read_predictions(current_path, columns=columns, start=start, end=end, drop_duplicates=True)
+        reference_rows, current_rows = len(reference), len(current)
+
+    # Typed before the frames become float matrices, like numpy_drift.drift_scores types them
+    categorical = [column for column in columns if is_categorical(reference[column])]
+    summary = parallel_drift(reference.to_numpy(dtype=np.float64), current.to_numpy(dtype=np.float64), columns,
+                             n_workers=n_workers, stat_test=stat_test, categorical=categorical)
+    summary["generated_at"] = datetime.utcnow().isoformat()
+
+    scores = summary["columns"]
+    if scores_dir:
+        save_drift_scores("data_drift", scores, scores_dir)
+    if drift_store_path:
+        summary["run_id"] = DriftStore(drift_store_path).append_run(
+            "data_drift", scores, window_start=start, window_end=end, reference_rows=reference_rows,
+            current_rows=current_rows,
+            params={"reference_path": reference_path, "current_path": current_path, "start": start, "end": end,
+                    "sample_size": sample_size, "stratify": stratify, "engine": "parallel"}
+        )
+
+    directory = os.path.dirname(output_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(output_path, "w") as f:
+        json.dump(summary, f, indent=2)
+
+    print(f"✅ Drift summary generated at: {output_path} ({summary['n_drifted_columns']}/{summary['n_columns']} columns drifted)")
+    return summary
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Per-feature drift tests on a process pool")
+    parser.add_argument("--reference_path", type=str, required=True)
+    parser.add_argument("--current_path", type=str, required=True, help="CSV prediction log or Parquet prediction store directory")
+    parser.add_argument("--output_path", type=str, required=True, help="JSON summary to write")
+    parser.add_argument("--columns", type=str, nargs="+", default=FEATURE_NAMES)
+    parser.add_argument("--start", type=str, default=None, help="Only use current predictions logged at or after this ISO timestamp")
+    parser.add_argument("--end", type=str, default=None, help="Only use current predictions logged before this ISO timestamp")
+    parser.add_argument("--n_workers", type=int, default=None, help="Worker processes (default: one per CPU)")
+    parser.add_argument("--stat_test", type=str, choices=["auto", *STAT_TESTS], default="auto")
+    parser.add_argument("--sample_size", type=int, default=None, help="Run the tests on a reservoir sample of at most this many rows")
+    parser.add_argument("--stratify", action="store_true", help="Sample each predicted class in proportion to its share of the rows")
+    parser.add_argument("--scores_dir", type=str, default=DRIFT_SCORES_DIR, help="Directory where the latest per-column drift scores are published")
+    parser.add_argument("--drift_store_path", type=str, default=DRIFT_STORE_PATH, help="Append-only store of structured drift results (empty to skip)")
+
+    args = parser.parse_args()
+
+    generate_parallel_drift_summary(
+        reference_path=args.reference_path,
+        current_path=args.current_path,
+        output_path=args.output_path,
+        columns=args.columns,
+        start=args.start,
+        end=args.end,
+        n_workers=args.n_workers,
+        stat_test=args.stat_test,
+        sample_size=args.sample_size,
+        stratify=args.stratify,
+        scores_dir=args.scores_dir,
+        drift_store_path=args.drift_store_path
+    )
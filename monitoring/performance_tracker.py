@@ -0,0 +1,303 @@
+# Online model performance tracking. Ground-truth labels arrive late and in bulk; each one is joined to its
+# logged prediction through an in-memory index keyed by request id, and its outcome is folded into
+# per-window counters: confusion counts, fraud-score histograms of both classes (for a streaming AUC)
+# and fraud amounts (for the fraud-capture rate). Only new rows are read and joined on every run (followed
+# with monitoring.log_tail, so rotated or truncated files are handled), and the tracker state is saved
+# between runs together with the read position in both files.
+
+import argparse
+import itertools
+import json
+import os
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from monitoring.log_tail import LogTailer, LogCheckpoint
+
+STATE_VERSION = 1
+CONFUSION = ("tp", "fp", "fn", "tn")
+
+class PerformanceTracker:
+    """
+    Joins labels to predictions and keeps performance counters per time window.
+
+    Predictions are added with add_predictions() and wait in the index until their label arrives through
+    add_labels(); labels that arrive before their prediction wait on the other side. Each joined pair is
+    assigned to the window of its prediction timestamp (`window_seconds` wide) and then forgotten, so
+    the cost of a call is proportional to the rows passed to it. Rows without a key cannot be joined and
+    are skipped. Both indexes are bounded: predictions still waiting `pending_ttl_seconds` after the newest
+    prediction, and the oldest entries beyond `max_pending` on either side, are evicted (and counted).
+    The fraud score of a prediction is P(class 1): its probability when it predicts 1, one minus it otherwise.
+    """
+
+    def __init__(self, window_seconds: int = 3600, n_score_bins: int = 100, key: str = "request_id",
+                 pending_ttl_seconds: int = 30 * 86400, max_pending: int = 1000000):
+        self.window_seconds = window_seconds
+        self.n_score_bins = n_score_bins
+        self.key = key
+        self.pending_ttl_seconds = pending_ttl_seconds
+        self.max_pending = max_pending
+        self.pending = {}  # key (as a string) -> (window, fraud score, predicted label, amount), oldest first
+        self.orphan_labels = {}  # key -> label that arrived before its prediction, oldest first
+        self.windows = {}  # window start (epoch seconds) -> counters, see _new_window()
+        self.latest_window = None  # window of the newest prediction seen
+        self.dropped = {"missing_key": 0, "expired_predictions": 0, "evicted_predictions": 0, "evicted_labels": 0}
+
+    def _keys(self, rows: pd.DataFrame) -> tuple:
+        """(rows that have a key, their keys as strings); the other rows are counted as dropped."""
+        keys = rows[self.key]
+        present = keys.notna().to_numpy() & (keys.astype(str).str.strip() != "").to_numpy()
+        self.dropped["missing_key"] += int((~present).sum())
+        rows = rows.loc[present]
+        return rows, rows[self.key].astype(str).tolist()
+
+    def add_predictions(self, predictions: pd.DataFrame) -> int:
+        """Index logged prediction rows; returns how many of them joined a waiting label right away."""
+        predictions, keys = self._keys(predictions)
+        if predictions.empty:
+            return 0
+        timestamps = pd.to_datetime(predictions["prediction_timestamp"]).to_numpy(dtype="datetime64[s]").astype(np.int64)
+        windows = timestamps - timestamps % self.window_seconds
+        predicted = predictions["prediction"].to_numpy(dtype=np.int64)
+        probabilities = np.clip(predictions["probability"].to_numpy(dtype=np.float64), 0.0, 1.0)
+        scores = np.where(predicted == 1, probabilities, 1.0 - probabilities)
+        amounts = predictions["Amount"].to_numpy(dtype=np.float64)
+
+        joined = []
+        for key, window, score, label, amount in zip(keys, windows.tolist(), scores.tolist(), predicted.tolist(), amounts.tolist()):
+            entry = (window, score, label, amount)
+            actual = self.orphan_labels.pop(key, None)
+            if actual is None:
+                self.pending[key] = entry
+            else:
+                joined.append((*entry, actual))
+        self._accumulate(joined)
+        self.latest_window = max(int(windows.max()), self.latest_window or 0)
+        self._evict()
+        return len(joined)
+
+    def add_labels(self, labels: pd.DataFrame, label_column: str = "Class") -> int:
+        """Join a bulk of late labels; returns how many of them matched an indexed prediction."""
+        labels, keys = self._keys(labels)
+        joined = []
+        for key, actual in zip(keys, labels[label_column].astype(int).tolist()):
+            entry = self.pending.pop(key, None)
+            if entry is None:
+                self.orphan_labels[key] = actual
+            else:
+                joined.append((*entry, actual))
+        self._accumulate(joined)
+        self._evict()
+        return len(joined)
+
+    def _evict(self):
+        """Forget predictions whose label is overdue and the oldest entries of an index over its cap."""
+        if self.latest_window is not None and self.pending:
+            cutoff = self.latest_window - self.pending_ttl_seconds
+            # Predictions are indexed in log order, so the expired ones are at the front
+            for key, entry in list(self.pending.items()):
+                if entry[0] >= cutoff:
+                    break
+                del self.pending[key]
+                self.dropped["expired_predictions"] += 1
+        for index, name in ((self.pending, "evicted_predictions"), (self.orphan_labels, "evicted_labels")):
+            excess = len(index) - self.max_pending
+            if excess > 0:
+                for key in list(itertools.islice(index, excess)):
+                    del index[key]
+                self.dropped[name] += excess
+
+    def _new_window(self) -> dict:
+        return {
+            "confusion": np.zeros(4, dtype=np.int64),
+            "score_histogram": np.zeros((2, self.n_score_bins), dtype=np.int64),  # rows: actual class 0 / 1
+            "fraud_amount": np.zeros(2, dtype=np.float64),  # total fraud amount, amount of the fraud that was caught
+        }
+
+    def _accumulate(self, joined: list):
+        if not joined:
+            return
+        window, score, predicted, amount, actual = (np.asarray(column) for column in zip(*joined))
+        bins = np.minimum((score * self.n_score_bins).astype(np.int64), self.n_score_bins - 1)
+        # tp, fp, fn, tn index: 0 when both are 1, 1 for a false alarm, 2 for a miss, 3 when both are 0
+        outcome = np.where(actual == 1, np.where(predicted == 1, 0, 2), np.where(predicted == 1, 1, 3))
+        for start in np.unique(window).tolist():
+            rows = window == start
+            counters = self.windows.setdefault(start, self._new_window())
+            counters["confusion"] += np.bincount(outcome[rows], minlength=4)
+            np.add.at(counters["score_histogram"], (actual[rows], bins[rows]), 1)
+            fraud = rows & (actual == 1)
+            counters["fraud_amount"] += [amount[fraud].sum(), amount[fraud & (predicted == 1)].sum()]
+
+    def summary(self, last_windows: int = None) -> list:
+        """Metrics per window, oldest first, optionally only for the most recent `last_windows` windows."""
+        starts = sorted(self.windows)
+        if last_windows is not None:
+            starts = starts[-last_windows:]
+        return [{"window_start": datetime.utcfromtimestamp(start).isoformat(), **window_metrics(self.windows[start])}
+                for start in starts]
+
+    def rolling(self, last_windows: int) -> dict:
+        """Metrics over the most recent `last_windows` windows combined."""
+        combined = self._new_window()
+        for start in sorted(self.windows)[-last_windows:]:
+            for name, values in self.windows[start].items():
+                combined[name] += values
+        return window_metrics(combined)
+
+    def save(self, path: str, extra: dict = None):
+        """Write the tracker state (and `extra` JSON-serialisable data such as file offsets) atomically."""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        pending = list(self.pending.items())
+        starts = sorted(self.windows)
+        tmp_path = f"{path}.tmp.npz"
+        np.savez_compressed(
+            tmp_path,
+            version=STATE_VERSION,
+            settings=json.dumps({"window_seconds": self.window_seconds, "n_score_bins": self.n_score_bins,
+                                 "key": self.key, "pending_ttl_seconds": self.pending_ttl_seconds,
+                                 "max_pending": self.max_pending, "latest_window": self.latest_window,
+                                 "dropped": self.dropped, "extra": extra or {}}),
+            pending_keys=np.array([str(key) for key, _ in pending]),
+            pending_values=np.array([value for _, value in pending], dtype=np.float64).reshape(-1, 4),
+            orphan_keys=np.array([str(key) for key in self.orphan_labels]),
+            orphan_labels=np.array(list(self.orphan_labels.values()), dtype=np.int64),
+            window_starts=np.array(starts, dtype=np.int64),
+            confusion=np.array([self.windows[s]["confusion"] for s in starts], dtype=np.int64).reshape(-1, 4),
+            score_histogram=np.array([self.windows[s]["score_histogram"] for s in starts], dtype=np.int64).reshape(-1, 2, self.n_score_bins),
+            fraud_amount=np.array([self.windows[s]["fraud_amount"] for s in starts], dtype=np.float64).reshape(-1, 2),
+        )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> tuple:
+        """Restore a tracker saved with save(); returns (tracker, extra)."""
+        with np.load(path, allow_pickle=False) as data:
+            if int(data["version"]) != STATE_VERSION:
+                raise ValueError(f"Unsupported performance tracker state version in {path}")
+            settings = json.loads(str(data["settings"]))
+            tracker = cls(settings["window_seconds"], settings["n_score_bins"], settings["key"],
+                          **{name: settings[name] for name in ("pending_ttl_seconds", "max_pending") if name in settings})
+            tracker.latest_window = settings.get("latest_window")
+            tracker.dropped.update(settings.get("dropped", {}))
+            for key, (window, score, label, amount) in zip(data["pending_keys"].tolist(), data["pending_values"].tolist()):
+                tracker.pending[key] = (int(window), score, int(label), amount)
+            tracker.orphan_labels = dict(zip(data["orphan_keys"].tolist(), data["orphan_labels"].tolist()))
+            for i, start in enumerate(data["window_starts"].tolist()):
+                tracker.windows[start] = {"confusion": data["confusion"][i].copy(),
+                                          "score_histogram": data["score_histogram"][i].copy(),
+                                          "fraud_amount": data["fraud_amount"][i].copy()}
+        return tracker, settings["extra"]
+
+def window_metrics(counters: dict) -> dict:
+    """Precision, recall, AUC and fraud-capture rate from one set of window counters."""
+    tp, fp, fn, tn = counters["confusion"].tolist()
+    negatives, positives = counters["score_histogram"]
+    total_fraud_amount, caught_fraud_amount = counters["fraud_amount"].tolist()
+    return {
+        "labelled": tp + fp + fn + tn,
+        **dict(zip(CONFUSION, (tp, fp, fn, tn))),
+        "precision": tp / (tp + fp) if tp + fp else None,
+        "recall": tp / (tp + fn) if tp + fn else None,
+        "auc": histogram_auc(negatives, positives),
+        "fraud_capture_rate": caught_fraud_amount / total_fraud_amount if total_fraud_amount > 0 else None,
+    }
+
+def histogram_auc(negatives: np.ndarray, positives: np.ndarray) -> float:
+    """
+    ROC AUC from score histograms of the two classes: the probability that a random positive scores
+    higher than a random negative, counting pairs in the same bin as ties.
+    """
+    n_negatives, n_positives = negatives.sum(), positives.sum()
+    if n_negatives == 0 or n_positives == 0:
+        return None
+    negatives_below = np.concatenate([[0], np.cumsum(negatives)[:-1]])
+    pairs = (positives * (negatives_below + 0.5 * negatives)).sum()
+    return float(pairs / (n_negatives * n_positives))
+
+########################################################### Incremental file reading ###########################################################
+
+def update_from_files(tracker: PerformanceTracker, predictions_path: str, labels_path: str, offsets: dict) -> dict:
+    """
+    Feed the rows appended to both files since the checkpoints in `offsets` ({"predictions": ..., "labels": ...},
+    LogCheckpoint dicts) to the tracker and return the new checkpoints. With key "row", rows are matched by
+    their position in each file (for label files without request ids); the row count is kept in the checkpoint state.
+    """
+    offsets = dict(offsets)
+    for name, path in (("predictions", predictions_path), ("labels", labels_path)):
+        tailer = LogTailer(path, checkpoint=_checkpoint(offsets, name))
+        n_rows = (tailer.state or {}).get("rows", 0)
+        n_new, joined = 0, 0
+        for rows in tailer.read():
+            if tracker.key == "row":
+                rows["row"] = np.arange(n_rows + n_new, n_rows + n_new + len(rows))
+            n_new += len(rows)
+            joined += tracker.add_predictions(rows) if name == "predictions" else tracker.add_labels(rows)
+        tailer.commit({"rows": n_rows + n_new})
+        offsets[name] = tailer.checkpoint.to_dict()
+        print(f"Read {n_new} new {name} from {path} ({joined} joined)")
+    return offsets
+
+def _checkpoint(offsets: dict, name: str) -> LogCheckpoint:
+    """The saved checkpoint of one file, also from states saved as plain offsets before log_tail was used."""
+    if name in offsets:
+        return LogCheckpoint(**offsets[name])
+    if f"{name}_offset" in offsets:
+        return LogCheckpoint(offset=offsets.pop(f"{name}_offset"), header=offsets.pop(f"{name}_header", None),
+                             state={"rows": offsets.pop(f"{name}_rows", 0)})
+    return LogCheckpoint()
+
+def join_key(predictions_path: str, labels_path: str) -> str:
+    """request_id when both files have it, otherwise "row" (e.g. data/incoming_labels.csv only has Class)."""
+    headers = [pd.read_csv(path, nrows=0).columns for path in (predictions_path, labels_path)]
+    if all("request_id" in header for header in headers):
+        return "request_id"
+    print(f"{labels_path if 'request_id' in headers[0] else predictions_path} has no request_id column; matching rows by position")
+    return "row"
+
+def write_summary(tracker: PerformanceTracker, output_path: str, rolling_windows: int):
+    directory = os.path.dirname(output_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    summary = {
+        "updated_at": datetime.utcnow().isoformat(),
+        "pending_predictions": len(tracker.pending),
+        "unmatched_labels": len(tracker.orphan_labels),
+        "dropped": tracker.dropped,
+        "rolling": {"windows": rolling_windows, **tracker.rolling(rolling_windows)},
+        "windows": tracker.summary(),
+    }
+    tmp_path = f"{output_path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(summary, f, indent=2)
+    os.replace(tmp_path, output_path)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Join late labels to logged predictions and track model performance")
+    parser.add_argument("--predictions_path", type=str, required=True, help="CSV prediction log")
+    parser.add_argument("--labels_path", type=str, required=True, help="CSV with the join key and the Class label")
+    parser.add_argument("--state_path", type=str, default="monitoring/performance/state.npz")
+    parser.add_argument("--output_path", type=str, default="monitoring/performance/performance.json")
+    parser.add_argument("--key", type=str, default="auto", help="Join column, 'row' to match rows by position, or 'auto' (request_id when both files have it, row otherwise)")
+    parser.add_argument("--window_seconds", type=int, default=3600)
+    parser.add_argument("--pending_ttl_seconds", type=int, default=30 * 86400, help="Forget predictions whose label has not arrived this long after the newest prediction")
+    parser.add_argument("--max_pending", type=int, default=1000000, help="Most predictions (and early labels) kept waiting for the other side")
+    parser.add_argument("--rolling_windows", type=int, default=24, help="Windows combined into the rolling metrics")
+    args = parser.parse_args()
+
+    if os.path.exists(args.state_path):
+        tracker, offsets = PerformanceTracker.load(args.state_path)
+    else:
+        key = join_key(args.predictions_path, args.labels_path) if args.key == "auto" else args.key
+        tracker = PerformanceTracker(window_seconds=args.window_seconds, key=key, pending_ttl_seconds=args.pending_ttl_seconds,
+                                     max_pending=args.max_pending)
+        offsets = {}
+
+    offsets = update_from_files(tracker, args.predictions_path, args.labels_path, offsets)
+    tracker.save(args.state_path, extra=offsets)
+    write_summary(tracker, args.output_path, args.rolling_windows)
+    print(f"Performance summary written to {args.output_path}")
@@ -0,0 +1,175 @@
+# One-time profile of the reference dataset, cached on disk and keyed by the content hash of the
+# reference file, so drift runs only have to scan the current window.
+
+import argparse
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from app.prediction_store import read_predictions
+from monitoring.drift_stats import histogram_edges, histogram_counts
+
+PROFILE_VERSION = 1
+QUANTILE_LEVELS = np.linspace(0, 1, 101)
+
+class ReferenceProfile:
+    """
+    Compact summary of a reference dataset: per-column bin edges, bin counts, quantiles, means and
+    variances, plus a bounded uniform sample of rows (the whole reference when it is smaller than
+    `sample_size`) that Evidently reports use in place of the full reference.
+    """
+
+    def __init__(self, columns: list, edges: np.ndarray, counts: np.ndarray, quantiles: np.ndarray,
+                 mean: np.ndarray, variance: np.ndarray, n_rows: int, sample: np.ndarray, digest: str):
+        self.columns = list(columns)
+        self.edges = edges
+        self.counts = counts
+        self.quantiles = quantiles
+        self.mean = mean
+        self.variance = variance
+        self.n_rows = n_rows
+        self.sample = sample
+        self.digest = digest
+
+    def sample_frame(self) -> pd.DataFrame:
+        """The sampled reference rows as a DataFrame."""
+        return pd.DataFrame(self.sample, columns=self.columns)
+
+    def save(self, path: str):
+        """Write the profile atomically as a compressed .npz file."""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.tmp.npz"
+        np.savez_compressed(
+            tmp_path, version=PROFILE_VERSION, columns=np.array(self.columns), edges=self.edges, counts=self.counts,
+            quantiles=self.quantiles, mean=self.mean, variance=self.variance, n_rows=self.n_rows,
+            sample=self.sample, digest=self.digest
+        )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str):
+        with np.load(path, allow_pickle=False) as data:
+            if int(data["version"]) != PROFILE_VERSION:
+                raise ValueError(f"Unsupported reference profile version in {path}")
+            return cls(
+                columns=data["columns"].tolist(), edges=data["edges"], counts=data["counts"],
+                quantiles=data["quantiles"], mean=data["mean"], variance=data["variance"],
+                n_rows=int(data["n_rows"]), sample=data["sample"], digest=str(data["digest"])
+            )
+
+def file_digest(path: str, chunk_size: int = 1 << 20) -> str:
+    """
+    SHA-256 of the file content. For a prediction store directory (Parquet or binary segments), SHA-256 of
+    its sorted segment list with every segment's relative path, size and modification time.
+    """
+    sha = hashlib.sha256()
+    if os.path.isdir(path):
+        for segment in _segment_files(path):
+            stat = os.stat(segment)
+            sha.update(f"{os.path.relpath(segment, path)}:{stat.st_size}:{stat.st_mtime_ns}\n".encode())
+        return sha.hexdigest()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+def _segment_files(root: str) -> list:
+    """Every data file under a store directory, skipping hidden and temporary files that are still being written."""
+    files = []
+    for directory, _, names in os.walk(root):
+        files.extend(os.path.join(directory, name) for name in names if not name.startswith(".") and not name.endswith(".tmp"))
+    return sorted(files)
+
+def build_reference_profile(reference_path: str, columns: list = None, start: str = None, end: str = None,
+                            n_bins: int = 20, sample_size: int = 50000, seed: int = 0, digest: str = None) -> ReferenceProfile:
+    """Profile the reference data (restricted to `columns` and the [start, end) window if given)."""
+    reference = read_predictions(reference_path, columns=columns, start=start, end=end, drop_duplicates=True)
+    reference = reference.select_dtypes(include="number")
+    values = reference.to_numpy(dtype=np.float64)
+
+    edges = np.vstack([histogram_edges(values[:, i], n_bins) for i in range(values.shape[1])])
+    if len(values) > sample_size:
+        rows = np.sort(np.random.default_rng(seed).choice(len(values), size=sample_size, replace=False))
+        sample = values[rows]
+    else:
+        sample = values
+
+    return ReferenceProfile(
+        columns=list(reference.columns),
+        edges=edges,
+        counts=histogram_counts(values, edges),
+        quantiles=np.nanquantile(values, QUANTILE_LEVELS, axis=0).T,
+        mean=np.nanmean(values, axis=0),
+        variance=np.nanvar(values, axis=0),
+        n_rows=len(values),
+        sample=sample,
+        digest=digest or file_digest(reference_path)
+    )
+
+def load_reference_profile(reference_path: str, cache_dir: str, columns: list = None, start: str = None, end: str = None,
+                           n_bins: int = 20, sample_size: int = 50000) -> ReferenceProfile:
+    """
+    Return the cached profile for this reference file and these settings, building it on a cache miss.
+    The file is re-hashed only when its size or modification time changed since it was last hashed.
+    """
+    digest = _cached_digest(reference_path, cache_dir)
+    settings = json.dumps({"columns": columns, "start": start, "end": end, "n_bins": n_bins,
+                           "sample_size": sample_size, "version": PROFILE_VERSION}, sort_keys=True)
+    key = hashlib.sha256(f"{digest}:{settings}".encode()).hexdigest()[:32]
+    profile_path = os.path.join(cache_dir, f"reference-{key}.npz")
+
+    if os.path.exists(profile_path):
+        return ReferenceProfile.load(profile_path)
+
+    profile = build_reference_profile(reference_path, columns=columns, start=start, end=end,
+                                      n_bins=n_bins, sample_size=sample_size, digest=digest)
+    profile.save(profile_path)
+    print(f"Built reference profile for {reference_path} at {profile_path}")
+    return profile
+
+def _cached_digest(path: str, cache_dir: str) -> str:
+    index_path = os.path.join(cache_dir, "digests.json")
+    try:
+        with open(index_path) as f:
+            index = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        index = {}
+
+    # A directory's own mtime does not change when a segment deeper down grows, so stores are always re-listed
+    # (file_digest only stats their segments)
+    if os.path.isdir(path):
+        return file_digest(path)
+
+    stat = os.stat(path)
+    key = os.path.abspath(path)
+    entry = index.get(key)
+    if entry and entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+        return entry["digest"]
+
+    digest = file_digest(path)
+    index[key] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "digest": digest}
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp_path = f"{index_path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(index, f)
+    os.replace(tmp_path, index_path)
+    return digest
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build (or reuse) the cached reference profile")
+    parser.add_argument("--reference_path", type=str, required=True)
+    parser.add_argument("--cache_dir", type=str, default="monitoring/reference_cache")
+    parser.add_argument("--columns", type=str, nargs="+", default=None)
+    parser.add_argument("--n_bins", type=int, default=20)
+    parser.add_argument("--sample_size", type=int, default=50000)
+
+    args = parser.parse_args()
+
+    profile = load_reference_profile(args.reference_path, args.cache_dir, columns=args.columns,
+                                     n_bins=args.n_bins, sample_size=args.sample_size)
+    print(f"Reference profile: {profile.n_rows} rows, {len(profile.columns)} columns, digest {profile.digest[:12]}")
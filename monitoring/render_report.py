@@ -0,0 +1,62 @@
+# Renders the Evidently HTML report of a stored drift run on demand. Drift jobs only need to store their
+# structured results; the multi-megabyte HTML is built here, from the settings saved with the run, the first
+# time someone asks for it (the API's /drift/runs/{run_id}/report runs this module) and cached afterwards.
+#
+#   python -m monitoring.render_report --run_id <run id>
+
+import argparse
+import inspect
+import os
+
+from app.drift_store import DriftStore
+from app.constants import DRIFT_STORE_PATH, DRIFT_RENDERED_REPORTS_DIR
+from monitoring.generate_data_drift_report import generate_drift_report
+from monitoring.generate_prediction_drift_report import generate_prediction_drift_report
+from monitoring.sampling import bounds_path
+
+RENDERERS = {"data_drift": generate_drift_report, "prediction_drift": generate_prediction_drift_report}
+
+def rendered_report_path(run_id: str, output_dir: str = DRIFT_RENDERED_REPORTS_DIR) -> str:
+    return os.path.join(output_dir, f"{run_id}.html")
+
+def render_run_report(run_id: str, store_path: str = DRIFT_STORE_PATH, output_dir: str = DRIFT_RENDERED_REPORTS_DIR) -> str:
+    """
+    Return the HTML report of a stored run, rendering it first if it is not cached yet.
+    The report is recomputed from the run's input files over the window stored with the run (jobs pin an
+    open window's end to their run time). Raises KeyError for an unknown run, and ValueError for runs whose
+    scores Evidently would not reproduce (other engines, e.g. monitoring.parallel_drift).
+    """
+    path = rendered_report_path(run_id, output_dir)
+    if os.path.exists(path):
+        return path
+    run = DriftStore(store_path).run(run_id)
+    if run is None:
+        raise KeyError(run_id)
+    renderer = RENDERERS.get(run["job"])
+    if renderer is None:
+        raise ValueError(f"No HTML report for drift job {run['job']}")
+    if run["params"].get("engine"):
+        raise ValueError(f"Run {run_id} was scored by the {run['params']['engine']} engine; its Evidently report would not match the stored results")
+
+    accepted = inspect.signature(renderer).parameters
+    params = {key: value for key, value in run["params"].items() if key in accepted}
+    # Runs scored with the NumPy backend have the same scores; the HTML always comes from Evidently
+    params["backend"] = "evidently"
+    # Render under a temporary name so concurrent requests never serve a half-written file, and neither
+    # republish the scores nor store the results again
+    tmp_path = f"{path}.tmp-{os.getpid()}.html"
+    renderer(**params, output_path=tmp_path, scores_dir=None, drift_store_path=None)
+    if os.path.exists(bounds_path(tmp_path)):
+        os.replace(bounds_path(tmp_path), bounds_path(path))
+    os.replace(tmp_path, path)
+    return path
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Render the HTML report of a stored drift run")
+    parser.add_argument("--run_id", type=str, required=True)
+    parser.add_argument("--store_path", type=str, default=DRIFT_STORE_PATH)
+    parser.add_argument("--output_dir", type=str, default=DRIFT_RENDERED_REPORTS_DIR)
+
+    args = parser.parse_args()
+
+    print(render_run_report(args.run_id, store_path=args.store_path, output_dir=args.output_dir))
@@ -0,0 +1,220 @@
+# Bounded-size samples of a prediction log, so drift reports on very large windows cost the same as on
+# small ones. The log is scanned once in chunks; rows are kept by reservoir sampling, either uniformly or
+# per predicted class (fraud is rare enough that a uniform sample can miss it almost entirely).
+# Running the drift tests on a sample instead of the whole window adds sampling error, which is bounded
+# with the Dvoretzky-Kiefer-Wolfowitz inequality and written next to the report.
+#
+#   python -m monitoring.sampling --path data/predictions.csv --sample_size 50000 --stratify
+
+import argparse
+import json
+import math
+import os
+
+import numpy as np
+import pandas as pd
+
+from app.prediction_store import iter_predictions, log_columns
+from monitoring.drift_stats import ks_statistic
+
+STRATIFY_COLUMN = "prediction"
+
+########################################################### SAMPLERS ###########################################################
+
+class ReservoirSampler:
+    """
+    Uniform sample of at most `size` rows from a stream of (n_rows, n_columns) float matrices
+    (Algorithm R, vectorized per chunk). Every row seen so far is in the sample with probability
+    size / n_seen.
+    """
+
+    def __init__(self, size: int, n_columns: int, seed: int = 0):
+        if size < 1:
+            raise ValueError("Sample size must be at least 1")
+        self.size = size
+        self.n_seen = 0
+        self._rows = np.empty((size, n_columns), dtype=np.float64)
+        self._rng = np.random.default_rng(seed)
+
+    def add(self, values: np.ndarray):
+        values = np.asarray(values, dtype=np.float64)
+        # Fill the reservoir first
+        n_fill = min(max(self.size - self.n_seen, 0), len(values))
+        self._rows[self.n_seen:self.n_seen + n_fill] = values[:n_fill]
+        self.n_seen += n_fill
+        values = values[n_fill:]
+        if not len(values):
+            return
+
+        # Row t (0-based over the whole stream) replaces a random slot with probability size / (t + 1).
+        # With repeated slots the later row wins, as it would when the rows are processed one by one.
+        positions = self.n_seen + np.arange(len(values))
+        slots = self._rng.integers(0, positions + 1)
+        keep = slots < self.size
+        self._rows[slots[keep]] = values[keep]
+        self.n_seen += len(values)
+
+    def sample(self) -> np.ndarray:
+        return self._rows[:min(self.n_seen, self.size)]
+
+class StratifiedSampler:
+    """
+    Sample of at most `size` rows with the same class proportions as the stream, where the class of a row
+    is the value in column `stratify_index`. One reservoir per class is kept, so every class that occurs in
+    the stream ends up in the sample (at least one row each) however rare it is.
+    """
+
+    def __init__(self, size: int, n_columns: int, stratify_index: int, seed: int = 0):
+        self.size = size
+        self.n_columns = n_columns
+        self.stratify_index = stratify_index
+        self.seed = seed
+        self.reservoirs = {}
+
+    @property
+    def n_seen(self) -> int:
+        return sum(reservoir.n_seen for reservoir in self.reservoirs.values())
+
+    def add(self, values: np.ndarray):
+        values = np.asarray(values, dtype=np.float64)
+        classes = values[:, self.stratify_index]
+        for value in np.unique(classes):
+            # Rows without a class form a stratum of their own (NaN never compares equal, so key it as None)
+            missing = bool(np.isnan(value))
+            key = None if missing else value.item()
+            reservoir = self.reservoirs.get(key)
+            if reservoir is None:
+                reservoir = ReservoirSampler(self.size, self.n_columns, seed=self.seed + len(self.reservoirs) + 1)
+                self.reservoirs[key] = reservoir
+            reservoir.add(values[np.isnan(classes) if missing else classes == value])
+
+    def allocation(self) -> dict:
+        """Rows drawn from each class: proportional to its count (largest remainder), at least one."""
+        counts = {value: reservoir.n_seen for value, reservoir in self.reservoirs.items()}
+        total = sum(counts.values())
+        if total <= self.size:
+            return counts
+        quotas = {value: self.size * count / total for value, count in counts.items()}
+        allocation = {value: max(1, int(quota)) for value, quota in quotas.items()}
+        remaining = self.size - sum(allocation.values())
+        for value in sorted(quotas, key=lambda value: quotas[value] - int(quotas[value]), reverse=True)[:max(remaining, 0)]:
+            allocation[value] += 1
+        return allocation
+
+    def sample(self) -> np.ndarray:
+        if not self.reservoirs:
+            return np.empty((0, self.n_columns))
+        rng = np.random.default_rng(self.seed)
+        parts = []
+        for value, n_rows in self.allocation().items():
+            rows = self.reservoirs[value].sample()
+            parts.append(rows if n_rows >= len(rows) else rows[rng.choice(len(rows), size=n_rows, replace=False)])
+        return np.vstack(parts)
+
+def draw_sample(path: str, columns: list, sample_size: int, stratify: bool = False, start: str = None, end: str = None,
+                seed: int = 0, chunk_size: int = 100000, drop_duplicates: bool = True) -> tuple:
+    """
+    Read the `columns` of the prediction log at `path` (CSV or Parquet store) in chunks, restricted to the
+    [start, end) window, and return (sample DataFrame, number of rows in the window).
+    With `stratify`, the sample keeps the class proportions of the `prediction` column; files without it
+    (e.g. training data used as the reference) are sampled uniformly instead. Rows logged as
+    duplicates (answered from the prediction cache) are skipped unless `drop_duplicates` is False.
+    """
+    if stratify and STRATIFY_COLUMN not in columns and STRATIFY_COLUMN not in log_columns(path):
+        print(f"{path} has no {STRATIFY_COLUMN} column; sampling it without stratification")
+        stratify = False
+    read_columns = list(columns)
+    if stratify and STRATIFY_COLUMN not in read_columns:
+        read_columns.append(STRATIFY_COLUMN)
+
+    sampler, dtypes = None, None
+    for chunk in iter_predictions(path, columns=read_columns, start=start, end=end, chunk_size=chunk_size,
+                                  drop_duplicates=drop_duplicates):
+        if sampler is None:
+            dtypes = chunk.dtypes
+            sampler = (StratifiedSampler(sample_size, len(read_columns), read_columns.index(STRATIFY_COLUMN), seed)
+                       if stratify else ReservoirSampler(sample_size, len(read_columns), seed))
+        sampler.add(chunk.to_numpy(dtype=np.float64))
+
+    if sampler is None:
+        return pd.DataFrame(columns=list(columns)), 0
+    sample = pd.DataFrame(sampler.sample(), columns=read_columns)
+    # Integer columns (the predicted class) go back to their logged type so reports treat them the same way
+    for column in read_columns:
+        if pd.api.types.is_integer_dtype(dtypes[column]) and not sample[column].isna().any():
+            sample[column] = sample[column].astype(dtypes[column])
+    return sample[list(columns)], sampler.n_seen
+
+######################################################### ERROR BOUNDS #########################################################
+
+def dkw_epsilon(n_sample: int, n_population: int, alpha: float) -> float:
+    """
+    Half-width of the DKW band: with probability at least 1 - alpha, the empirical CDF of `n_sample` rows
+    drawn uniformly from a population is within epsilon of the population CDF everywhere. 0 when the
+    sample is the whole population.
+    """
+    if n_sample >= n_population:
+        return 0.0
+    if n_sample == 0:
+        return 1.0
+    return math.sqrt(math.log(2 / alpha) / (2 * n_sample))
+
+def sampling_bounds(reference: pd.DataFrame, current: pd.DataFrame, reference_rows: int, current_rows: int,
+                    alpha: float = 0.05) -> dict:
+    """
+    Confidence bounds implied by comparing samples instead of the full reference and current windows.
+
+    For every numeric column the KS distance between the two samples is reported with an interval that
+    contains the KS distance between the full datasets with probability at least 1 - alpha, for all
+    columns at once (the DKW bands of both datasets are combined with a union bound over the columns).
+    """
+    columns = [column for column in current.columns if pd.api.types.is_numeric_dtype(current[column])]
+    per_band_alpha = alpha / max(2 * len(columns), 1)
+    reference_epsilon = dkw_epsilon(len(reference), reference_rows, per_band_alpha)
+    current_epsilon = dkw_epsilon(len(current), current_rows, per_band_alpha)
+    margin = reference_epsilon + current_epsilon
+
+    statistics = ks_statistic(reference[columns].to_numpy(dtype=np.float64), current[columns].to_numpy(dtype=np.float64))
+    return {
+        "alpha": alpha,
+        "reference": {"sample_rows": len(reference), "population_rows": int(reference_rows), "dkw_epsilon": reference_epsilon},
+        "current": {"sample_rows": len(current), "population_rows": int(current_rows), "dkw_epsilon": current_epsilon},
+        "columns": {
+            column: {
+                "ks_statistic": float(statistic),
+                "ks_lower": float(max(statistic - margin, 0.0)),
+                "ks_upper": float(min(statistic + margin, 1.0)),
+            }
+            for column, statistic in zip(columns, statistics)
+        },
+    }
+
+def bounds_path(report_path: str) -> str:
+    """Sidecar file for a report: drift_report.html -> drift_report.sampling.json."""
+    return f"{os.path.splitext(report_path)[0]}.sampling.json"
+
+def save_sampling_bounds(bounds: dict, path: str):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(bounds, f, indent=2)
+    os.replace(tmp_path, path)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Draw a bounded sample from a prediction log")
+    parser.add_argument("--path", type=str, required=True, help="CSV prediction log or Parquet prediction store directory")
+    parser.add_argument("--columns", type=str, nargs="+", default=["Amount", "prediction", "probability"])
+    parser.add_argument("--sample_size", type=int, default=50000)
+    parser.add_argument("--stratify", action="store_true", help="Keep the class proportions of the prediction column")
+    parser.add_argument("--start", type=str, default=None)
+    parser.add_argument("--end", type=str, default=None)
+    parser.add_argument("--output_path", type=str, default=None, help="Write the sample to this CSV file")
+
+    args = parser.parse_args()
+
+    sample, n_rows = draw_sample(args.path, args.columns, args.sample_size, stratify=args.stratify, start=args.start, end=args.end)
+    print(f"Sampled {len(sample)} of {n_rows} rows (DKW epsilon {dkw_epsilon(len(sample), n_rows, 0.05):.4f} at alpha 0.05)")
+    if args.output_path:
+        sample.to_csv(args.output_path, index=False)
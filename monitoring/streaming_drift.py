@@ -0,0 +1,209 @@
+# Incremental drift engine: keeps bounded per-column histograms of the incoming predictions
+# and scores them against the reference without ever re-reading old traffic.
+# With a checkpoint path the engine follows the CSV log across runs: each run parses only the rows appended
+# since the previous one and saves the histograms together with the log position.
+
+import argparse
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from app.schema import FEATURE_NAMES
+from app.prediction_store import TIMESTAMP_COLUMN, DUPLICATE_COLUMN, iter_predictions
+from app.drift_scores import save_drift_scores
+from app.constants import DRIFT_SCORES_DIR
+from monitoring.drift_stats import histogram_edges, histogram_counts, psi, jensen_shannon, ks_from_histograms
+from monitoring.reference_profile import load_reference_profile
+from monitoring.log_tail import LogTailer
+
+DEFAULT_COLUMNS = [*FEATURE_NAMES, "prediction", "probability"]
+
+class StreamingDriftEngine:
+    """
+    Per-column histograms over a ring of `n_buckets` tumbling windows of `bucket_seconds` each.
+
+    Bin edges and reference counts are fixed up front, so memory is
+    n_buckets * n_columns * n_bins counters no matter how much traffic is seen, and update()
+    costs time proportional to the new rows only. Scores can be computed for the latest
+    tumbling window or for the sliding window made of the last `n_buckets` tumbling windows.
+    Rows older than the sliding window are counted in `late_rows` and ignored.
+    """
+
+    def __init__(self, columns: list, edges: np.ndarray, reference_counts: np.ndarray,
+                 bucket_seconds: int = 300, n_buckets: int = 12, psi_threshold: float = 0.2):
+        self.columns = list(columns)
+        self.edges = np.asarray(edges, dtype=np.float64)
+        self.reference_counts = np.asarray(reference_counts, dtype=np.int64)
+        if self.edges.shape[0] != len(self.columns) or self.reference_counts.shape != (len(self.columns), self.edges.shape[1] + 1):
+            raise ValueError("edges and reference_counts do not match the number of columns and bins")
+        self.bucket_seconds = bucket_seconds
+        self.n_buckets = n_buckets
+        self.psi_threshold = psi_threshold
+        self.n_bins = self.edges.shape[1] + 1
+        self._counts = np.zeros((n_buckets, len(self.columns), self.n_bins), dtype=np.int64)
+        self._bucket_ids = np.full(n_buckets, -1, dtype=np.int64)
+        self.latest_bucket = -1
+        self.late_rows = 0
+
+    @classmethod
+    def from_reference(cls, reference: pd.DataFrame, columns: list = None, n_bins: int = 20, **kwargs):
+        """Build the engine from a reference DataFrame using per-column quantile bins."""
+        columns = [column for column in (columns or DEFAULT_COLUMNS) if column in reference.columns]
+        values = reference[columns].to_numpy(dtype=np.float64)
+        edges = np.vstack([histogram_edges(values[:, i], n_bins) for i in range(len(columns))])
+        return cls(columns, edges, histogram_counts(values, edges), **kwargs)
+
+    @classmethod
+    def from_profile(cls, profile, columns: list = None, **kwargs):
+        """Build the engine from a cached ReferenceProfile without touching the reference data."""
+        columns = [column for column in (columns or DEFAULT_COLUMNS) if column in profile.columns]
+        rows = [profile.columns.index(column) for column in columns]
+        return cls(columns, profile.edges[rows], profile.counts[rows], **kwargs)
+
+    def state(self) -> dict:
+        """Everything needed to resume the engine later, as JSON-serializable values."""
+        return {
+            "columns": self.columns,
+            "edges": self.edges.tolist(),
+            "reference_counts": self.reference_counts.tolist(),
+            "bucket_seconds": self.bucket_seconds,
+            "n_buckets": self.n_buckets,
+            "psi_threshold": self.psi_threshold,
+            "counts": self._counts.tolist(),
+            "bucket_ids": self._bucket_ids.tolist(),
+            "latest_bucket": self.latest_bucket,
+            "late_rows": self.late_rows,
+        }
+
+    @classmethod
+    def from_state(cls, state: dict):
+        """Resume an engine saved with state()."""
+        engine = cls(state["columns"], state["edges"], state["reference_counts"], bucket_seconds=state["bucket_seconds"],
+                     n_buckets=state["n_buckets"], psi_threshold=state["psi_threshold"])
+        engine._counts[:] = state["counts"]
+        engine._bucket_ids[:] = state["bucket_ids"]
+        engine.latest_bucket = state["latest_bucket"]
+        engine.late_rows = state["late_rows"]
+        return engine
+
+    def update(self, timestamps, values: np.ndarray):
+        """
+        Add new rows. `timestamps` is anything numpy can read as datetime64 and `values` is a
+        (n_rows, n_columns) matrix in `self.columns` order.
+        """
+        if len(values) == 0:
+            return
+        seconds = np.asarray(pd.to_datetime(timestamps).values.astype("datetime64[s]").astype(np.int64))
+        buckets = seconds // self.bucket_seconds
+
+        for bucket in np.unique(buckets):
+            if bucket <= max(self.latest_bucket, buckets.max()) - self.n_buckets:
+                self.late_rows += int(np.sum(buckets == bucket))
+                continue
+            slot = bucket % self.n_buckets
+            if self._bucket_ids[slot] != bucket:
+                # The slot holds an expired window: recycle it
+                self._counts[slot] = 0
+                self._bucket_ids[slot] = bucket
+            rows = buckets == bucket
+            self._counts[slot] += histogram_counts(values[rows], self.edges)
+
+        self.latest_bucket = max(self.latest_bucket, int(buckets.max()))
+
+    def update_frame(self, frame: pd.DataFrame):
+        """Add new rows from a prediction log DataFrame."""
+        self.update(frame[TIMESTAMP_COLUMN], frame[self.columns].to_numpy(dtype=np.float64))
+
+    def window_counts(self, window: str = "sliding") -> np.ndarray:
+        """Histogram counts (n_columns, n_bins) of the sliding window or of the latest tumbling window."""
+        if window == "tumbling":
+            live = self._bucket_ids == self.latest_bucket
+        elif window == "sliding":
+            live = (self._bucket_ids > self.latest_bucket - self.n_buckets) & (self._bucket_ids >= 0)
+        else:
+            raise ValueError(f"Unknown window: {window}. Please choose 'sliding' or 'tumbling'.")
+        return self._counts[live].sum(axis=0)
+
+    def scores(self, window: str = "sliding") -> dict:
+        """PSI, histogram KS and Jensen-Shannon distance per column for the requested window."""
+        current = self.window_counts(window)
+        psi_scores = psi(self.reference_counts, current)
+        ks_scores = ks_from_histograms(self.reference_counts, current)
+        js_scores = jensen_shannon(self.reference_counts, current)
+        totals = current.sum(axis=1)
+        return {
+            column: {
+                "psi": float(psi_scores[i]),
+                "ks": float(ks_scores[i]),
+                "js": float(js_scores[i]),
+                "count": int(totals[i]),
+                "drift_detected": bool(totals[i] > 0 and psi_scores[i] > self.psi_threshold),
+            }
+            for i, column in enumerate(self.columns)
+        }
+
+def build_engine(reference_path: str, profile_cache_dir: str = None, **kwargs) -> StreamingDriftEngine:
+    if profile_cache_dir:
+        return StreamingDriftEngine.from_profile(load_reference_profile(reference_path, profile_cache_dir), **kwargs)
+    return StreamingDriftEngine.from_reference(pd.read_csv(reference_path), **kwargs)
+
+def follow_log(reference_path: str, current_path: str, checkpoint_path: str, output_path: str = None,
+               profile_cache_dir: str = None, bucket_seconds: int = 300, n_buckets: int = 12, window: str = "sliding",
+               scores_dir: str = DRIFT_SCORES_DIR) -> dict:
+    """
+    One refresh of the streaming drift scores of a CSV prediction log: resume the engine saved at
+    `checkpoint_path` (or build it from the reference on the first run), add the rows appended since, save
+    the engine with the new log position, then publish the scores. Rows logged as duplicates are skipped.
+    """
+    tailer = LogTailer(current_path, checkpoint_path)
+    if tailer.state is not None:
+        engine = StreamingDriftEngine.from_state(tailer.state)
+    else:
+        engine = build_engine(reference_path, profile_cache_dir, bucket_seconds=bucket_seconds, n_buckets=n_buckets)
+    for frame in tailer.read():
+        if DUPLICATE_COLUMN in frame.columns:
+            frame = frame[frame[DUPLICATE_COLUMN] == 0]
+        engine.update_frame(frame)
+    tailer.commit(engine.state())
+
+    scores = engine.scores(window)
+    if scores_dir:
+        save_drift_scores("streaming_drift", {
+            column: {"drift_score": score["psi"], "stattest": "PSI", "drift_detected": score["drift_detected"],
+                     "threshold": engine.psi_threshold}
+            for column, score in scores.items() if score["count"] > 0
+        }, scores_dir)
+    if output_path:
+        directory = os.path.dirname(output_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(output_path, "w") as f:
+            json.dump(scores, f, indent=2)
+    print(f"Streaming drift: {tailer.stats['rows']} new rows in {current_path}")
+    return scores
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Score a prediction log against a reference with the streaming drift engine")
+    parser.add_argument("--reference_path", type=str, required=True)
+    parser.add_argument("--current_path", type=str, required=True, help="CSV prediction log or Parquet prediction store directory")
+    parser.add_argument("--bucket_seconds", type=int, default=300)
+    parser.add_argument("--n_buckets", type=int, default=12)
+    parser.add_argument("--chunk_size", type=int, default=100000)
+    parser.add_argument("--window", type=str, choices=["sliding", "tumbling"], default="sliding")
+    parser.add_argument("--profile_cache_dir", type=str, default=None, help="Reuse the cached reference profile stored in this directory")
+    parser.add_argument("--checkpoint_path", type=str, default=None, help="Follow the CSV log across runs: read only rows appended since the last run")
+
+    args = parser.parse_args()
+
+    if args.checkpoint_path:
+        scores = follow_log(args.reference_path, args.current_path, args.checkpoint_path, profile_cache_dir=args.profile_cache_dir,
+                            bucket_seconds=args.bucket_seconds, n_buckets=args.n_buckets, window=args.window)
+    else:
+        engine = build_engine(args.reference_path, args.profile_cache_dir, bucket_seconds=args.bucket_seconds, n_buckets=args.n_buckets)
+        for chunk in iter_predictions(args.current_path, chunk_size=args.chunk_size, drop_duplicates=True):
+            engine.update_frame(chunk)
+        scores = engine.scores(args.window)
+
+    print(json.dumps(scores, indent=2))
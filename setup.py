@@ -13,5 +13,9 @@ setup(
         "scikit-learn",
         "tenacity",
         "requests",
+        "httpx",
     ],
+    extras_require={
+        "parquet": ["pyarrow"],
+    },
 )
\ No newline at end of file
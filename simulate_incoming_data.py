@@ -1,17 +1,24 @@
 # This script simulates a real-time data stream to an inference API by reading data from a CSV file and sending it to the API endpoint.
 
 import pandas as pd
+import numpy as np
 import os
 import requests
+import httpx
+import asyncio
+import random
 import time
 import argparse
+from array import array
 from datetime import datetime
 from urllib.parse import urlparse
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED
 from tenacity import retry, stop_after_attempt, wait_fixed
 import logging
 import json
-from src.app.schema import InputData # Assuming InputData is a Pydantic model for input validation
+from src.app.schema import FEATURE_NAMES, parse_feature_vector, validate_feature_frame
+
+logger = logging.getLogger(__name__)
 
 
 ########################################################### Validation Functions ###########################################################
@@ -45,10 +52,8 @@ def validate_input_data(data_dict: dict) -> bool:
     Validates the input data against the InputData schema.
     Returns True if valid, False otherwise.
     """
-    # Assuming InputData is a Pydantic model for input validation
     try:
-        # Example of how to validate data using Pydantic
-        data = InputData(**data_dict)  
+        parse_feature_vector(data_dict)
         return True
     except Exception as e:
         logger.error(f"Input data validation error: {e}")
@@ -114,11 +119,131 @@ def api_request(endpoint: str, data: dict) -> dict:
     
     
         
+############################################################## Chunked CSV reader ###############################################################################
+
+def read_feature_chunks(input_file: str, chunk_size: int = 10000):
+    """
+    Stream a CSV file `chunk_size` rows at a time and yield (row_numbers, features) for the valid rows of
+    each chunk, `features` being a float64 array in FEATURE_NAMES order. Only the feature columns are parsed,
+    so memory stays bounded by the chunk size whatever the size of the file.
+    The header is checked straight away; a ValueError is raised if feature columns are missing.
+    """
+    header = pd.read_csv(input_file, nrows=0).columns
+    missing = [name for name in FEATURE_NAMES if name not in header]
+    if missing:
+        raise ValueError(f"Missing feature columns: {missing}")
+    if "Class" in header:
+        logger.warning("'Class' column found in input — dropping it for inference.")
+
+    def chunks():
+        for chunk in pd.read_csv(input_file, chunksize=chunk_size, usecols=FEATURE_NAMES):
+            features, valid = validate_feature_frame(chunk)
+            for index in chunk.index[~valid]:
+                logger.error(f"Invalid input data at row {index}. Skipping this row.")
+            yield chunk.index.to_numpy()[valid], features[valid]
+    return chunks()
+
+def iter_rows(input_file: str, chunk_size: int = 10000):
+    """
+    Lazily yield the valid rows of a CSV file as feature dicts, reading `chunk_size` rows at a time.
+    """
+    return rows_from_chunks(read_feature_chunks(input_file, chunk_size))
+
+def rows_from_chunks(chunks):
+    """
+    Feature dicts of the rows of read_feature_chunks() output. The chunks are parsed as they are consumed,
+    so an unreadable chunk further down the file is logged and ends the rows instead of raising mid-stream.
+    """
+    try:
+        for _, features in chunks:
+            for values in features.tolist():
+                yield dict(zip(FEATURE_NAMES, values))
+    except Exception as e:
+        logger.error(f"Error reading CSV file: {e}")
+
+############################################################## Asynchronous load generator ###############################################################################
+
+async def send_async(rows, endpoint: str, concurrency: int = 64, rps: float = None, arrival: str = "constant",
+                     timeout: float = 10.0, seed: int = None, transport=None) -> dict:
+    """
+    Send every row to the endpoint over a pool of keep-alive connections, with at most `concurrency`
+    requests in flight.
+
+    With `rps` set the load is open-loop: send times are fixed in advance (evenly spaced for "constant",
+    exponential gaps for "poisson") and do not wait for earlier responses. Latency is measured from the
+    scheduled send time, so time spent waiting for a free connection counts against the server.
+    Without `rps` every slot sends its next row as soon as the previous response arrives.
+
+    Returns request, error and status counts, the elapsed time, the achieved throughput and the
+    per-request latencies in seconds.
+    """
+    if arrival not in ("constant", "poisson"):
+        raise ValueError(f"Invalid arrival process: {arrival}. Please choose 'constant' or 'poisson'.")
+    loop = asyncio.get_running_loop()
+    rng = random.Random(seed)
+    latencies = array("d")
+    statuses = {}
+    errors = 0
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    headers = {'Content-Type': 'application/json', 'Accept': 'application/json'}
+    async with httpx.AsyncClient(limits=limits, timeout=timeout, headers=headers, transport=transport) as client:
+        slots = asyncio.Semaphore(concurrency)
+        in_flight = set()
+
+        async def send(body: str, scheduled: float):
+            nonlocal errors
+            try:
+                response = await client.post(endpoint, content=body)
+                statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+                if response.status_code >= 400:
+                    errors += 1
+            except httpx.HTTPError as e:
+                errors += 1
+                statuses[type(e).__name__] = statuses.get(type(e).__name__, 0) + 1
+                logger.error(f"API request error: {e!r}")
+            finally:
+                latencies.append(loop.time() - scheduled)
+                slots.release()
+
+        started = loop.time()
+        next_send = started
+        for row in rows:
+            if rps:
+                delay = next_send - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                scheduled = next_send
+                next_send += rng.expovariate(rps) if arrival == "poisson" else 1.0 / rps
+                await slots.acquire()
+            else:
+                await slots.acquire()
+                scheduled = loop.time()
+            task = asyncio.create_task(send(json.dumps(row), scheduled))
+            in_flight.add(task)
+            task.add_done_callback(in_flight.discard)
+
+        if in_flight:
+            await asyncio.gather(*in_flight)
+        elapsed = loop.time() - started
+
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "statuses": statuses,
+        "elapsed_seconds": elapsed,
+        "throughput_rps": len(latencies) / elapsed if elapsed > 0 else 0.0,
+        "latencies": latencies,
+    }
+
 ############################################################## Simulate data stream ###############################################################################
 
-def simulate_data_stream(input_file: str, endpoint: str, delay: float, execution_mode: str) -> None:
+def simulate_data_stream(input_file: str, endpoint: str, delay: float, execution_mode: str,
+                         concurrency: int = 64, rps: float = None, arrival: str = "constant", chunk_size: int = 10000) -> None:
     """
     Simulates a real-time data stream by reading data from a CSV file and sending it to the API endpoint.
+    The file is read `chunk_size` rows at a time.
+    `concurrency`, `rps` and `arrival` only apply to the async execution mode (see send_async).
     """
     # Configure logging
     logging.basicConfig(level=logging.INFO)
@@ -138,29 +263,31 @@ def simulate_data_stream(input_file: str, endpoint: str, delay: float, execution
         logger.error("API is not healthy. Exiting.")
         return
 
-    # Read and validate data from CSV file 
-    # use validate_input_data function to validate each row of data before sending it to the API
+    # Stream validated rows from the CSV file chunk by chunk instead of loading it whole
+    # read_feature_chunks checks the header straight away, so a missing or malformed file fails here;
+    # errors in later chunks are logged by rows_from_chunks and stop the stream
     try:
-        data = pd.read_csv(input_file)
+        rows = rows_from_chunks(read_feature_chunks(input_file, chunk_size))
     except Exception as e:
         logger.error(f"Error reading CSV file: {e}")
         return
-    
-    if "Class" in data.columns:
-        logger.warning("'Class' column found in input — dropping it for inference.")
-        data = data.drop(columns=["Class"])
 
-    
-    if execution_mode == "sequential":
-        # Sequential execution: Read the CSV file and validate each row of data using the validate_input_data function
-        for index, row in data.iterrows():
-            # Validate each row of data using the validate_input_data function
-            if not validate_input_data(row.to_dict()):
-                logger.error(f"Invalid input data at row {index}. Skipping this row.")
-                continue
+    if execution_mode == "async":
+        # Drive the API from one event loop
+        result = asyncio.run(send_async(rows, endpoint, concurrency=concurrency, rps=rps, arrival=arrival))
+        latencies = np.frombuffer(result["latencies"]) if result["requests"] else np.zeros(1)
+        logger.info(
+            f"Sent {result['requests']} requests in {result['elapsed_seconds']:.2f}s "
+            f"({result['throughput_rps']:.1f} req/s), {result['errors']} errors, "
+            f"median latency {np.median(latencies) * 1000:.1f} ms, statuses {result['statuses']}"
+        )
+
+    elif execution_mode == "sequential":
+        # Sequential execution: send the validated rows one by one
+        for row in rows:
             # Send data to API endpoint with rate limiting and retry mechanism
             try:
-                response = api_request(endpoint, row.to_dict())
+                response = api_request(endpoint, row)
                 logger.info(f"API response: {response}")
                 time.sleep(delay)
             except Exception as e:
@@ -168,29 +295,43 @@ def simulate_data_stream(input_file: str, endpoint: str, delay: float, execution
                 continue
 
     elif execution_mode == "parallel":
-        # Parallel execution: Use ThreadPoolExecutor to send multiple requests in parallel
-        with ThreadPoolExecutor(max_workers=5) as executor:
-            future_to_row = {executor.submit(api_request, endpoint, row.to_dict()): row for _, row in data.iterrows()}
+        # Parallel execution: Use ThreadPoolExecutor to send multiple requests in parallel,
+        # keeping only a few requests per thread queued so rows are read as they are sent
+        max_workers = 5
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            future_to_row = {}
+            for row in rows:
+                if len(future_to_row) >= 2 * max_workers:
+                    done, _ = wait(future_to_row, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        log_parallel_result(future, future_to_row.pop(future))
+                future_to_row[executor.submit(api_request, endpoint, row)] = row
             for future in as_completed(future_to_row):
-                row = future_to_row[future]
-                try:
-                    response = future.result()
-                    logger.info(f"API response for row {row}: {response}")
-                except Exception as e:
-                    logger.error(f"Error sending data to API for row {row}: {e}")
+                log_parallel_result(future, future_to_row[future])
 
     else:
-        logger.error(f"Invalid execution mode: {execution_mode}. Please choose 'sequential' or 'parallel'.")
+        logger.error(f"Invalid execution mode: {execution_mode}. Please choose 'sequential', 'parallel' or 'async'.")
 
     return 
 
+def log_parallel_result(future, row: dict):
+    try:
+        response = future.result()
+        logger.info(f"API response for row {row}: {response}")
+    except Exception as e:
+        logger.error(f"Error sending data to API for row {row}: {e}")
+
 def argument_parser():
     parser = argparse.ArgumentParser(description="Simulate real-time data stream to the inference API.")
     parser.add_argument("--input_file", type=str, help="Path to the input CSV file.", required=True)
     parser.add_argument("--endpoint", type=str, help="API endpoint URL.", required=True)
     parser.add_argument("--delay", type=float, default=1, help="Delay between requests in seconds.", required=False)
     parser.add_argument("--log_file", type=str, default="./sim_log_file.txt", help="Path to the log file.", required=False)
-    parser.add_argument("--execution_mode", type=str, choices=["sequential", "parallel"], default="sequential", help="Execution mode: sequential or parallel.", required=False)
+    parser.add_argument("--execution_mode", type=str, choices=["sequential", "parallel", "async"], default="sequential", help="Execution mode: sequential, parallel or async.", required=False)
+    parser.add_argument("--chunk_size", type=int, default=10000, help="Rows read from the CSV file at a time.", required=False)
+    parser.add_argument("--concurrency", type=int, default=64, help="Maximum requests in flight (async mode).", required=False)
+    parser.add_argument("--rps", type=float, default=None, help="Target requests per second (async mode; default: as fast as concurrency allows).", required=False)
+    parser.add_argument("--arrival", type=str, choices=["constant", "poisson"], default="constant", help="Arrival process for --rps (async mode).", required=False)
 
     return parser.parse_args()
 
@@ -199,7 +340,8 @@ if __name__ == "__main__":
     # Configure logging
     logging.basicConfig(filename=args.log_file, level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
     logger = logging.getLogger(__name__)
-    simulate_data_stream(args.input_file, args.endpoint, args.delay, args.execution_mode)
+    simulate_data_stream(args.input_file, args.endpoint, args.delay, args.execution_mode,
+                         concurrency=args.concurrency, rps=args.rps, arrival=args.arrival, chunk_size=args.chunk_size)
     logger.info("Simulation completed.")
 
                     
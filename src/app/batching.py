@@ -0,0 +1,109 @@
+import asyncio
+import time
+from collections import deque
+
+import numpy as np
+
+from app.metrics import Histogram
+
+BATCH_SIZE_HISTOGRAM = Histogram(
+    "microbatch_batch_size", "Number of rows scored per micro-batch",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024)
+)
+QUEUE_WAIT_HISTOGRAM = Histogram(
+    "microbatch_queue_wait_seconds", "Time a row waits in the micro-batch queue before scoring",
+    buckets=(0.0001, 0.0005, 0.001, 0.002, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25)
+)
+
+class MicroBatcher:
+    """
+    Collects single-row requests that arrive concurrently and scores them together.
+
+    A batch is dispatched as soon as it holds `max_batch_size` rows or its oldest row has
+    waited `max_wait_ms`. Batches are scored one at a time in a worker thread, so under load
+    the rows that queue up while the model runs are picked up as the next (larger) batch.
+    `score_fn` takes a (n_rows, n_features) matrix and returns (labels, probabilities).
+    """
+
+    def __init__(self, score_fn, max_batch_size: int = 64, max_wait_ms: float = 2.0):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+        self.score_fn = score_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._pending = deque()
+        self._wakeup = None
+        self._task = None
+        self._closing = False
+
+    async def start(self):
+        """Start the background batching task on the running event loop."""
+        self._wakeup = asyncio.Event()
+        self._closing = False
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Score whatever is still queued, then stop the background task."""
+        if self._task is None:
+            return
+        self._closing = True
+        self._wakeup.set()
+        await self._task
+        self._task = None
+
+    def queue_depth(self) -> int:
+        return len(self._pending)
+
+    async def submit(self, features: np.ndarray) -> tuple:
+        """Queue one feature row and wait for its (label, probability)."""
+        if self._task is None or self._closing:
+            raise RuntimeError("Micro-batcher is not running")
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((features, future, time.perf_counter()))
+        self._wakeup.set()
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            if not self._pending:
+                if self._closing:
+                    return
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            # Wait for more rows until the batch is full or the oldest row hits its deadline
+            deadline = loop.time() + self.max_wait - (time.perf_counter() - self._pending[0][2])
+            while len(self._pending) < self.max_batch_size and not self._closing:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), remaining)
+                except asyncio.TimeoutError:
+                    break
+
+            batch = [self._pending.popleft() for _ in range(min(self.max_batch_size, len(self._pending)))]
+            await self._score(batch)
+
+    async def _score(self, batch: list):
+        dispatched_at = time.perf_counter()
+        for _, _, enqueued_at in batch:
+            QUEUE_WAIT_HISTOGRAM.observe(dispatched_at - enqueued_at)
+        BATCH_SIZE_HISTOGRAM.observe(len(batch))
+
+        features = np.vstack([row for row, _, _ in batch])
+        try:
+            labels, probabilities = await asyncio.to_thread(self.score_fn, features)
+        except Exception as e:
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for i, (_, future, _) in enumerate(batch):
+            # The caller may have gone away (e.g. client disconnect cancelled the request)
+            if not future.done():
+                future.set_result((labels[i], probabilities[i]))
@@ -0,0 +1,153 @@
+import glob
+import os
+import threading
+import uuid
+
+import numpy as np
+import pandas as pd
+
+from app.schema import FEATURE_NAMES
+
+# Binary prediction log: fixed-size little-endian records appended to segment files,
+#
+#     <root>/segment-<first timestamp>-<id>.plog
+#
+# each starting with a HEADER_SIZE-byte header (magic, format version, record size, number of features).
+# A segment is read back as a read-only numpy.memmap of RECORD_DTYPE, so a column or a time window is a view
+# of the file instead of parsed text. Records are only ever appended, and a reader ignores a trailing partial
+# record, so segments can be read while they are being written.
+
+MAGIC = b"\x93PREDLOG"  # non-ASCII first byte, like the .npy magic, so a text file never matches
+FORMAT_VERSION = 1
+HEADER_SIZE = 64
+SEGMENT_SUFFIX = ".plog"
+
+# 152 bytes per record; the int64 timestamp comes first and the padding keeps it 8-byte aligned in every record
+RECORD_DTYPE = np.dtype(
+    [("prediction_timestamp", "<i8")]  # microseconds since the Unix epoch
+    + [(name, "<f4") for name in FEATURE_NAMES]
+    + [("probability", "<f4"), ("request_id", "u1", (16,)), ("prediction", "i1"), ("duplicate", "u1"), ("_padding", "V2")]
+)
+COLUMNS = ["prediction_timestamp", *FEATURE_NAMES, "prediction", "probability", "request_id", "duplicate"]
+HEADER_DTYPE = np.dtype([("magic", "S8"), ("version", "<u4"), ("record_size", "<u4"), ("n_features", "<u4")])
+
+def _header() -> bytes:
+    header = np.array([(MAGIC, FORMAT_VERSION, RECORD_DTYPE.itemsize, len(FEATURE_NAMES))], dtype=HEADER_DTYPE)
+    return header.tobytes().ljust(HEADER_SIZE, b"\x00")
+
+def to_records(rows: list) -> np.ndarray:
+    """Pack prediction rows (tuples in LOG_COLUMNS order, ISO timestamps and hex request ids) into records."""
+    records = np.zeros(len(rows), dtype=RECORD_DTYPE)
+    if not rows:
+        return records
+    columns = list(zip(*rows))
+    records["prediction_timestamp"] = np.array(columns[0], dtype="datetime64[us]").astype(np.int64)
+    for name, column in zip(FEATURE_NAMES, columns[1:-4]):
+        records[name] = column
+    records["prediction"] = columns[-4]
+    records["probability"] = columns[-3]
+    # uuid4 hex request ids are stored as their 16 bytes (all zeros when a row has none)
+    request_ids = b"".join(bytes.fromhex(request_id) if request_id else bytes(16) for request_id in columns[-2])
+    records["request_id"] = np.frombuffer(request_ids, dtype=np.uint8).reshape(len(rows), 16)
+    records["duplicate"] = columns[-1]
+    return records
+
+class BinaryPredictionSink:
+    """
+    Appends prediction rows as fixed-size records to segment files under `root`. A new segment is started
+    once the current one holds `segment_bytes`; every sink (API worker process) writes its own segments.
+    """
+
+    def __init__(self, root: str, segment_bytes: int = 64 * 1024 * 1024):
+        self.root = root
+        self.segment_bytes = segment_bytes
+        self._segment = None
+        self._lock = threading.Lock()
+
+    def write(self, rows: list):
+        """Append rows (tuples in LOG_COLUMNS order) with a single write to the current segment."""
+        records = to_records(rows)
+        with self._lock:
+            if self._segment is None or os.path.getsize(self._segment) + records.nbytes > self.segment_bytes:
+                self._segment = self._new_segment(rows[0][0])
+            with open(self._segment, "ab") as f:
+                f.write(records.tobytes())
+
+    def _new_segment(self, first_timestamp: str) -> str:
+        os.makedirs(self.root, exist_ok=True)
+        first = "".join(ch for ch in first_timestamp if ch.isdigit() or ch == "T")
+        path = os.path.join(self.root, f"segment-{first}-{uuid.uuid4().hex[:8]}{SEGMENT_SUFFIX}")
+        # The header is written under a temporary name, so a segment never appears without it
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(_header())
+        os.replace(tmp_path, path)
+        return path
+
+########################################################### READER ###########################################################################################
+
+def segment_paths(root: str) -> list:
+    """Segment files under `root`, oldest first."""
+    return sorted(glob.glob(os.path.join(root, f"segment-*{SEGMENT_SUFFIX}")))
+
+def is_binary_store(path: str) -> bool:
+    return os.path.isdir(path) and bool(segment_paths(path))
+
+def open_segment(path: str) -> np.ndarray:
+    """The complete records of a segment as a read-only memory-mapped structured array (no copy, no parsing)."""
+    header = np.fromfile(path, dtype=HEADER_DTYPE, count=1)
+    if len(header) == 0 or header["magic"][0] != MAGIC:
+        raise ValueError(f"{path} is not a binary prediction log segment")
+    if (header["version"][0], header["record_size"][0], header["n_features"][0]) != (FORMAT_VERSION, RECORD_DTYPE.itemsize, len(FEATURE_NAMES)):
+        raise ValueError(
+            f"{path} was written with format version {header['version'][0]}, {header['record_size'][0]}-byte records "
+            f"and {header['n_features'][0]} features; this reader expects {FORMAT_VERSION}, {RECORD_DTYPE.itemsize} and {len(FEATURE_NAMES)}"
+        )
+    n_records = (os.path.getsize(path) - HEADER_SIZE) // RECORD_DTYPE.itemsize
+    if n_records == 0:
+        return np.zeros(0, dtype=RECORD_DTYPE)
+    return np.memmap(path, dtype=RECORD_DTYPE, mode="r", offset=HEADER_SIZE, shape=(n_records,))
+
+def window(records: np.ndarray, start=None, end=None) -> np.ndarray:
+    """
+    Records with a timestamp in [start, end). Segments written in time order are sliced by binary search,
+    so the result is still a view of the file; otherwise the matching records are copied out.
+    """
+    if start is None and end is None:
+        return records
+    timestamps = records["prediction_timestamp"]
+    bounds = [None if bound is None else pd.Timestamp(bound).to_datetime64().astype("datetime64[us]").astype(np.int64)
+              for bound in (start, end)]
+    if len(timestamps) < 2 or np.all(timestamps[1:] >= timestamps[:-1]):
+        first = 0 if bounds[0] is None else np.searchsorted(timestamps, bounds[0], side="left")
+        last = len(timestamps) if bounds[1] is None else np.searchsorted(timestamps, bounds[1], side="left")
+        return records[first:last]
+    mask = np.ones(len(timestamps), dtype=bool)
+    if bounds[0] is not None:
+        mask &= timestamps >= bounds[0]
+    if bounds[1] is not None:
+        mask &= timestamps < bounds[1]
+    return records[mask]
+
+def iter_segments(root: str, start=None, end=None):
+    """Yield the records of every segment under `root` within [start, end)."""
+    for path in segment_paths(root):
+        records = window(open_segment(path), start, end)
+        if len(records):
+            yield records
+
+def to_frame(records: np.ndarray, columns: list = None) -> pd.DataFrame:
+    """Convert records to a prediction log DataFrame with the requested columns (all by default)."""
+    columns = columns if columns is not None else COLUMNS
+    data = {}
+    for column in columns:
+        values = records[column]
+        if column == "prediction_timestamp":
+            values = values.astype("datetime64[us]")
+        elif column == "request_id":
+            hex_ids = np.ascontiguousarray(values).tobytes().hex()
+            values = [hex_ids[i:i + 32] if values[i // 32].any() else None for i in range(0, len(hex_ids), 32)]
+        elif column == "duplicate":
+            values = values.astype(bool)
+        data[column] = values
+    return pd.DataFrame(data, columns=list(columns))
@@ -0,0 +1,77 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from app.metrics import Counter
+
+# Cache of recent prediction results. Client retries, replays and duplicate authorizations send
+# byte-identical transactions; a hit answers them without running the model, and the row is logged with
+# duplicate=1 so drift jobs can leave it out. Entries are keyed by the canonical feature vector and the
+# loaded model instance, and the whole cache is cleared whenever the primary model changes.
+
+CACHE_HITS = Counter("prediction_cache_hits_total", "Predictions answered from the prediction cache")
+CACHE_MISSES = Counter("prediction_cache_misses_total", "Predictions not found in the prediction cache")
+CACHE_EVICTIONS = {
+    reason: Counter("prediction_cache_evictions_total", "Entries removed from the prediction cache", labels={"reason": reason})
+    for reason in ("size", "expired", "invalidated")
+}
+
+def feature_key(features: np.ndarray, model_token: str) -> bytes:
+    """
+    BLAKE2b digest of one feature row as float64 (with -0.0 folded into 0.0, so equal vectors always hash
+    alike) together with the token of the model instance that scores it.
+    """
+    row = np.ascontiguousarray(features, dtype=np.float64) + 0.0
+    digest = hashlib.blake2b(row.tobytes(), digest_size=16)
+    digest.update(model_token.encode())
+    return digest.digest()
+
+class PredictionCache:
+    """
+    Bounded LRU cache of (label, probability) results; entries older than `ttl_seconds` are treated as
+    missing (a TTL of 0 or None keeps them until they are evicted).
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: float = None):
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+        self.max_size = max_size
+        self.ttl = ttl_seconds or None
+        self._entries = OrderedDict()  # key -> (label, probability, stored_at)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: bytes) -> tuple:
+        """The cached (label, probability) for `key`, or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.ttl is not None and time.monotonic() - entry[2] > self.ttl:
+                del self._entries[key]
+                CACHE_EVICTIONS["expired"].inc()
+                entry = None
+            if entry is None:
+                CACHE_MISSES.inc()
+                return None
+            self._entries.move_to_end(key)
+        CACHE_HITS.inc()
+        return entry[0], entry[1]
+
+    def put(self, key: bytes, label, probability):
+        with self._lock:
+            self._entries[key] = (label, probability, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                CACHE_EVICTIONS["size"].inc()
+
+    def clear(self, *args):
+        """Drop every entry (registered as a model registry listener, hence the ignored arguments)."""
+        with self._lock:
+            n_entries = len(self._entries)
+            self._entries.clear()
+        CACHE_EVICTIONS["invalidated"].inc(n_entries)
@@ -1,2 +1,60 @@
-MODEL_PATH = "C:/Users/rohan/OneDrive/Documents/Downloads/Resume projects april 2025/ML-Monitoring-system-for-model-drift-and-performance-degradation/models/rfc_model.pkl"
-LOG_FILE_PATH = "C:/Users/rohan/OneDrive/Documents/Downloads/Resume projects april 2025/ML-Monitoring-system-for-model-drift-and-performance-degradation/data/predictions.csv"
\ No newline at end of file
+import os
+
+MODEL_PATH = os.getenv("MODEL_PATH", "C:/Users/rohan/OneDrive/Documents/Downloads/Resume projects april 2025/ML-Monitoring-system-for-model-drift-and-performance-degradation/models/rfc_model.pkl")
+LOG_FILE_PATH = os.getenv("LOG_FILE_PATH", "C:/Users/rohan/OneDrive/Documents/Downloads/Resume projects april 2025/ML-Monitoring-system-for-model-drift-and-performance-degradation/data/predictions.csv")
+
+# Upper bound on the number of transactions accepted by /predict_batch
+MAX_BATCH_SIZE = 1000
+
+# Micro-batching of concurrent single-row /predict calls (override through environment variables)
+MICROBATCH_ENABLED = os.getenv("MICROBATCH_ENABLED", "true").lower() in ("1", "true", "yes")
+MICROBATCH_MAX_SIZE = int(os.getenv("MICROBATCH_MAX_SIZE", "64"))
+MICROBATCH_MAX_WAIT_MS = float(os.getenv("MICROBATCH_MAX_WAIT_MS", "2"))
+
+# Background prediction log writer (override through environment variables)
+PREDICTION_LOG_ASYNC = os.getenv("PREDICTION_LOG_ASYNC", "true").lower() in ("1", "true", "yes")
+PREDICTION_LOG_QUEUE_SIZE = int(os.getenv("PREDICTION_LOG_QUEUE_SIZE", "10000"))
+PREDICTION_LOG_FLUSH_ROWS = int(os.getenv("PREDICTION_LOG_FLUSH_ROWS", "1000"))
+PREDICTION_LOG_FLUSH_INTERVAL_S = float(os.getenv("PREDICTION_LOG_FLUSH_INTERVAL_S", "1.0"))
+PREDICTION_LOG_BLOCK_TIMEOUT_S = float(os.getenv("PREDICTION_LOG_BLOCK_TIMEOUT_S", "0.05"))
+
+# Where predictions are stored: "csv" appends to PREDICTION_STORE_PATH as one file,
+# "parquet" writes hourly Parquet segments and "binary" fixed-size record segments under the PREDICTION_STORE_PATH directory
+PREDICTION_SINK = os.getenv("PREDICTION_SINK", "csv")
+PREDICTION_STORE_PATH = os.getenv("PREDICTION_STORE_PATH", LOG_FILE_PATH)
+
+# Directory where the monitoring jobs publish their latest per-column drift scores (exported on /metrics)
+DRIFT_SCORES_DIR = os.getenv("DRIFT_SCORES_DIR", "monitoring/drift_reports/scores")
+
+# Append-only SQLite store of every drift run's per-column results (served on /drift; empty disables writing),
+# where HTML reports rendered on request are cached, and how long one rendering may take
+DRIFT_STORE_PATH = os.getenv("DRIFT_STORE_PATH", "monitoring/drift_reports/drift_results.db")
+DRIFT_RENDERED_REPORTS_DIR = os.getenv("DRIFT_RENDERED_REPORTS_DIR", "monitoring/drift_reports/runs")
+DRIFT_RENDER_TIMEOUT_S = float(os.getenv("DRIFT_RENDER_TIMEOUT_S", "300"))
+
+# Inference backend: "sklearn" calls the estimator, "compiled" evaluates flattened tree tables with NumPy
+INFERENCE_BACKEND = os.getenv("INFERENCE_BACKEND", "sklearn")
+
+# Directory of memory-mapped compiled models shared by all worker processes (requires INFERENCE_BACKEND=compiled)
+MODEL_MMAP_DIR = os.getenv("MODEL_MMAP_DIR")
+
+# Model registry: version name of the model loaded at start-up, directory that models may be loaded
+# from through the /models endpoints, and synthetic rows scored to warm up a version before it serves
+MODEL_VERSION = os.getenv("MODEL_VERSION", "v1")
+MODEL_REGISTRY_DIR = os.getenv("MODEL_REGISTRY_DIR", os.path.dirname(MODEL_PATH))
+MODEL_WARMUP_ROWS = int(os.getenv("MODEL_WARMUP_ROWS", "256"))
+
+# Token required (X-Admin-Token header) by the endpoints that change the served models; unset, they are disabled
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+
+# Shadow scoring of a candidate model version off the request path: output file (CSV), queue capacity
+# (in requests; rows are shed when it is full), rows per shadow model call and worker threads
+SHADOW_STORE_PATH = os.getenv("SHADOW_STORE_PATH", os.path.join(os.path.dirname(LOG_FILE_PATH), "shadow_predictions.csv"))
+SHADOW_QUEUE_SIZE = int(os.getenv("SHADOW_QUEUE_SIZE", "1000"))
+SHADOW_BATCH_SIZE = int(os.getenv("SHADOW_BATCH_SIZE", "256"))
+SHADOW_WORKERS = int(os.getenv("SHADOW_WORKERS", "1"))
+
+# Prediction cache for repeated transactions: maximum entries (0 disables it) and how long a result may be
+# reused, in seconds (0 keeps entries until they are evicted or the primary model changes)
+PREDICTION_CACHE_SIZE = int(os.getenv("PREDICTION_CACHE_SIZE", "0"))
+PREDICTION_CACHE_TTL_S = float(os.getenv("PREDICTION_CACHE_TTL_S", "300"))
@@ -0,0 +1,72 @@
+import json
+import os
+from datetime import datetime
+
+# Latest per-column drift scores, written by the monitoring jobs (one JSON file per job)
+# and exported by the API on /metrics.
+
+def scores_from_report_dict(report_dict: dict) -> dict:
+    """Collect {column: {drift_score, stattest, drift_detected, threshold}} from an Evidently `report.as_dict()`."""
+    scores = {}
+    for metric in report_dict.get("metrics", []):
+        result = metric.get("result", {})
+        columns = result.get("drift_by_columns")
+        if columns is None and "column_name" in result and "drift_score" in result:
+            columns = {result["column_name"]: result}
+        for column, column_result in (columns or {}).items():
+            scores[column] = {
+                "drift_score": float(column_result["drift_score"]),
+                "stattest": column_result.get("stattest_name"),
+                "drift_detected": bool(column_result["drift_detected"]),
+                "threshold": column_result.get("stattest_threshold"),
+            }
+    return scores
+
+def save_drift_scores(job: str, scores: dict, directory: str):
+    """Atomically replace the latest scores of `job`."""
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{job}.json")
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({"job": job, "updated_at": datetime.utcnow().isoformat(), "scores": scores}, f)
+    os.replace(tmp_path, path)
+
+class DriftScoreCollector:
+    """
+    Exposes one field of the saved drift scores as a gauge labelled by job, column and test.
+    Files are only re-read when their modification time changes.
+    """
+    kind = "gauge"
+
+    def __init__(self, name: str, description: str, field: str, directory: str):
+        self.name = name
+        self.description = description
+        self.field = field
+        self.directory = directory
+        self._cache = {}  # path -> (mtime_ns, parsed file)
+
+    def _load(self) -> list:
+        if not os.path.isdir(self.directory):
+            return []
+        loaded = []
+        for name in sorted(os.listdir(self.directory)):
+            if not name.endswith(".json"):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                mtime = os.stat(path).st_mtime_ns
+                cached = self._cache.get(path)
+                if cached is None or cached[0] != mtime:
+                    with open(path) as f:
+                        cached = (mtime, json.load(f))
+                    self._cache[path] = cached
+            except (OSError, json.JSONDecodeError):
+                continue
+            loaded.append(cached[1])
+        return loaded
+
+    def samples(self):
+        for job_scores in self._load():
+            for column, score in job_scores.get("scores", {}).items():
+                labels = {"job": job_scores.get("job", ""), "column": column, "stattest": score.get("stattest") or ""}
+                yield self.name, labels, float(score[self.field])
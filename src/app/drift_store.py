@@ -0,0 +1,166 @@
+import json
+import os
+import sqlite3
+import uuid
+from datetime import datetime
+
+# Structured drift results: one row per drift job run and one per (run, column), in an append-only SQLite
+# database. The monitoring jobs write to it; the API reads it for /drift. Rows are never updated or
+# deleted (triggers reject it), so readers never see a partially rewritten run.
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS drift_runs (
+    run_id TEXT PRIMARY KEY,
+    job TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    window_start TEXT,
+    window_end TEXT,
+    reference_rows INTEGER,
+    current_rows INTEGER,
+    n_columns INTEGER NOT NULL,
+    n_drifted_columns INTEGER NOT NULL,
+    report_path TEXT,
+    params TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS drift_results (
+    run_id TEXT NOT NULL REFERENCES drift_runs (run_id),
+    job TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    window_start TEXT,
+    window_end TEXT,
+    column_name TEXT NOT NULL,
+    stattest TEXT,
+    drift_score REAL,
+    statistic REAL,
+    p_value REAL,
+    threshold REAL,
+    drift_detected INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS drift_runs_job_time ON drift_runs (job, created_at);
+CREATE INDEX IF NOT EXISTS drift_runs_time ON drift_runs (created_at);
+CREATE INDEX IF NOT EXISTS drift_results_run ON drift_results (run_id);
+CREATE INDEX IF NOT EXISTS drift_results_column_time ON drift_results (column_name, created_at);
+CREATE INDEX IF NOT EXISTS drift_results_job_time ON drift_results (job, created_at);
+CREATE TRIGGER IF NOT EXISTS drift_runs_append_only_update BEFORE UPDATE ON drift_runs
+    BEGIN SELECT RAISE(ABORT, 'drift_runs is append-only'); END;
+CREATE TRIGGER IF NOT EXISTS drift_runs_append_only_delete BEFORE DELETE ON drift_runs
+    BEGIN SELECT RAISE(ABORT, 'drift_runs is append-only'); END;
+CREATE TRIGGER IF NOT EXISTS drift_results_append_only_update BEFORE UPDATE ON drift_results
+    BEGIN SELECT RAISE(ABORT, 'drift_results is append-only'); END;
+CREATE TRIGGER IF NOT EXISTS drift_results_append_only_delete BEFORE DELETE ON drift_results
+    BEGIN SELECT RAISE(ABORT, 'drift_results is append-only'); END;
+"""
+
+RUN_FIELDS = ["run_id", "job", "created_at", "window_start", "window_end", "reference_rows", "current_rows",
+              "n_columns", "n_drifted_columns", "report_path", "params"]
+RESULT_FIELDS = ["run_id", "job", "created_at", "window_start", "window_end", "column_name", "stattest",
+                 "drift_score", "statistic", "p_value", "threshold", "drift_detected"]
+
+class DriftStore:
+    """
+    Append-only store of drift job results at `path`. Every call opens its own connection, so one store
+    object can be shared by threads, and several processes can append to the same file (WAL journal).
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._initialized = False
+
+    def _connect(self) -> sqlite3.Connection:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        connection = sqlite3.connect(self.path, timeout=30)
+        connection.row_factory = sqlite3.Row
+        if not self._initialized:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.executescript(SCHEMA)
+            self._initialized = True
+        return connection
+
+    def append_run(self, job: str, scores: dict, window_start: str = None, window_end: str = None,
+                   reference_rows: int = None, current_rows: int = None, report_path: str = None, params: dict = None) -> str:
+        """
+        Record one run of `job` with its per-column `scores` ({column: {drift_score, stattest, drift_detected,
+        threshold}}, as produced by app.drift_scores) and return its run id. `params` are whatever is needed
+        to render the run's report later.
+        """
+        run_id = uuid.uuid4().hex
+        created_at = datetime.utcnow().isoformat()
+        results = []
+        for column, score in scores.items():
+            drift_score = score.get("drift_score")
+            # p-value tests report the p-value as their drift score, distance tests the distance
+            is_p_value = "p_value" in (score.get("stattest") or "").lower()
+            results.append((
+                run_id, job, created_at, window_start, window_end, column, score.get("stattest"), drift_score,
+                None if is_p_value else drift_score, drift_score if is_p_value else None,
+                score.get("threshold"), int(bool(score.get("drift_detected")))
+            ))
+        run = (run_id, job, created_at, window_start, window_end, reference_rows, current_rows, len(results),
+               sum(result[-1] for result in results), report_path, json.dumps(params or {}))
+
+        connection = self._connect()
+        try:
+            with connection:
+                connection.execute(f"INSERT INTO drift_runs VALUES ({', '.join('?' * len(RUN_FIELDS))})", run)
+                connection.executemany(f"INSERT INTO drift_results VALUES ({', '.join('?' * len(RESULT_FIELDS))})", results)
+        finally:
+            connection.close()
+        return run_id
+
+    def runs(self, job: str = None, start: str = None, end: str = None, limit: int = 100) -> list:
+        """Runs created in [start, end), newest first."""
+        where, args = self._filters(job=job, start=start, end=end)
+        rows = self._query(f"SELECT * FROM drift_runs {where} ORDER BY created_at DESC LIMIT ?", args + [limit])
+        return [self._run_dict(row) for row in rows]
+
+    def run(self, run_id: str) -> dict:
+        """One run with its per-column results, or None."""
+        rows = self._query("SELECT * FROM drift_runs WHERE run_id = ?", [run_id])
+        if not rows:
+            return None
+        run = self._run_dict(rows[0])
+        run["results"] = [self._result_dict(row) for row in self._query(
+            "SELECT * FROM drift_results WHERE run_id = ? ORDER BY rowid", [run_id]
+        )]
+        return run
+
+    def results(self, job: str = None, column: str = None, start: str = None, end: str = None,
+                drifted_only: bool = False, limit: int = 1000) -> list:
+        """Per-column results of the runs created in [start, end), newest first."""
+        where, args = self._filters(job=job, column=column, start=start, end=end, drifted_only=drifted_only)
+        rows = self._query(f"SELECT * FROM drift_results {where} ORDER BY created_at DESC, rowid LIMIT ?", args + [limit])
+        return [self._result_dict(row) for row in rows]
+
+    def _filters(self, job=None, column=None, start=None, end=None, drifted_only=False) -> tuple:
+        clauses, args = [], []
+        for clause, value in (("job = ?", job), ("column_name = ?", column), ("created_at >= ?", start), ("created_at < ?", end)):
+            if value is not None:
+                clauses.append(clause)
+                args.append(value)
+        if drifted_only:
+            clauses.append("drift_detected = 1")
+        return ("WHERE " + " AND ".join(clauses)) if clauses else "", args
+
+    def _query(self, sql: str, args: list) -> list:
+        # Reading a store that was never written gives no rows instead of creating an empty database
+        if not os.path.exists(self.path):
+            return []
+        connection = self._connect()
+        try:
+            return connection.execute(sql, args).fetchall()
+        finally:
+            connection.close()
+
+    @staticmethod
+    def _run_dict(row) -> dict:
+        run = dict(row)
+        run["params"] = json.loads(run["params"])
+        return run
+
+    @staticmethod
+    def _result_dict(row) -> dict:
+        result = dict(row)
+        result["drift_detected"] = bool(result["drift_detected"])
+        return result
@@ -1,7 +1,12 @@
-from app.schema import InputData
+from app.schema import InputData, FEATURE_NAMES
+from app.metrics import Counter
+from app.prediction_store import CsvPredictionSink, LOG_COLUMNS, check_log_header
+import numpy as np
 import pandas as pd
 import os
-import re
+import queue
+import threading
+import time
 
 def log_prediction(input_data: InputData, prediction: dict, log_file: str = "data/predictions.csv"):
     """Logs the prediction results to a CSV file."""
@@ -40,3 +45,117 @@ def log_prediction(input_data: InputData, prediction: dict, log_file: str = "dat
     )
 
     print(f"Logged prediction to {log_file}: {data_to_log}")
+
+def log_predictions(features, labels, probabilities, timestamps, log_file: str = "data/predictions.csv", request_ids=None, duplicates=None):
+    """Logs a batch of prediction results to a CSV file with a single append."""
+    data_to_log = pd.DataFrame(features, columns=FEATURE_NAMES)
+    data_to_log.insert(0, "prediction_timestamp", timestamps)
+    data_to_log["prediction"] = labels
+    data_to_log["probability"] = probabilities
+    data_to_log["request_id"] = request_ids
+    data_to_log["duplicate"] = 0 if duplicates is None else np.asarray(duplicates, dtype=int)
+
+    os.makedirs(os.path.dirname(log_file), exist_ok=True)
+
+    # Check if the file exists to decide whether to write the header, and that its columns match the rows
+    file_exists = os.path.exists(log_file)
+    check_log_header(log_file, list(data_to_log.columns))
+
+    data_to_log.to_csv(log_file, mode="a", header=not file_exists, index=False)
+
+    print(f"Logged {len(data_to_log)} predictions to {log_file}")
+
+########################################################### BACKGROUND LOG WRITER ###########################################################################################
+
+LOG_ROWS_ENQUEUED = Counter("prediction_log_rows_enqueued_total", "Prediction rows accepted by the background log writer")
+LOG_ROWS_WRITTEN = Counter("prediction_log_rows_written_total", "Prediction rows flushed to the prediction log")
+LOG_ROWS_DROPPED = Counter("prediction_log_rows_dropped_total", "Prediction rows dropped because the log queue was full")
+LOG_FLUSHES = Counter("prediction_log_flushes_total", "Bulk writes performed by the background log writer")
+
+_STOP = object()  # Sentinel telling the writer thread to flush and exit
+
+class PredictionLogWriter:
+    """
+    Background writer that appends prediction rows to a prediction sink in bulk.
+
+    Request handlers hand over lists of rows (tuples in LOG_COLUMNS order) through a bounded
+    queue; a single thread drains it and writes whenever `flush_rows` rows are buffered or
+    `flush_interval` seconds have passed. When the queue is full, submit() waits up to
+    `timeout` seconds for room and otherwise drops the rows and counts them.
+    """
+
+    def __init__(self, sink, max_queue_size: int = 10000, flush_rows: int = 1000, flush_interval: float = 1.0):
+        # A plain path keeps the original single-CSV prediction log
+        self.sink = CsvPredictionSink(sink) if isinstance(sink, str) else sink
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._thread = None
+
+    def start(self):
+        """Start the background flushing thread."""
+        self._thread = threading.Thread(target=self._run, name="prediction-log-writer", daemon=True)
+        self._thread.start()
+
+    def close(self):
+        """Flush everything that is queued and stop the background thread."""
+        if self._thread is None:
+            return
+        self._queue.put(_STOP)  # blocks until there is room, so nothing queued is lost
+        self._thread.join()
+        self._thread = None
+
+    def queue_depth(self) -> int:
+        return self._queue.qsize()
+
+    def try_submit(self, rows: list) -> bool:
+        """Queue a list of rows without waiting. Returns False if the queue is full."""
+        try:
+            self._queue.put_nowait(rows)
+        except queue.Full:
+            return False
+        LOG_ROWS_ENQUEUED.inc(len(rows))
+        return True
+
+    def submit(self, rows: list, timeout: float = 0) -> bool:
+        """Queue a list of rows, waiting up to `timeout` seconds for room. Drops (and counts) them otherwise."""
+        try:
+            self._queue.put(rows, timeout=timeout) if timeout > 0 else self._queue.put_nowait(rows)
+        except queue.Full:
+            LOG_ROWS_DROPPED.inc(len(rows))
+            return False
+        LOG_ROWS_ENQUEUED.inc(len(rows))
+        return True
+
+    def _run(self):
+        buffer = []
+        next_flush = time.monotonic() + self.flush_interval
+        while True:
+            try:
+                item = self._queue.get(timeout=max(0.0, next_flush - time.monotonic()))
+            except queue.Empty:
+                item = None
+
+            if item is _STOP:
+                self._flush(buffer)
+                return
+            if item is not None:
+                buffer.extend(item)
+
+            if len(buffer) >= self.flush_rows or time.monotonic() >= next_flush:
+                self._flush(buffer)
+                buffer = []
+                next_flush = time.monotonic() + self.flush_interval
+
+    def _flush(self, rows: list):
+        if not rows:
+            return
+        try:
+            self.sink.write(rows)
+        except Exception as e:
+            # Never let a logging failure kill the writer thread
+            LOG_ROWS_DROPPED.inc(len(rows))
+            print(f"Failed to write {len(rows)} predictions: {e}")
+            return
+        LOG_ROWS_WRITTEN.inc(len(rows))
+        LOG_FLUSHES.inc()
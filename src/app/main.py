@@ -1,40 +1,227 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request, Header, Depends
+from fastapi.concurrency import run_in_threadpool
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import PlainTextResponse, FileResponse
 from contextlib import asynccontextmanager
 from datetime import datetime
+from pydantic import ValidationError
+import asyncio
+import hmac
+import json
+import os
+import sys
+import time
+import uuid
+import numpy as np
 
-from app.schema import InputData, PredictionResponse
-from app.model import load_model, get_prediction
-from app.logging_utils import log_prediction
-from app.constants import MODEL_PATH, LOG_FILE_PATH
+from app.schema import InputData, PredictionResponse, BatchPredictionResponse, LoadModelRequest, CanaryRequest, ShadowRequest, parse_feature_vector, parse_feature_matrix
+from app.registry import ModelRegistry
+from app.cache import PredictionCache, feature_key
+from app.shadow import ShadowScorer
+from app.logging_utils import log_predictions, PredictionLogWriter
+from app.prediction_store import create_sink
+from app.batching import MicroBatcher
+from app.metrics import REGISTRY, Gauge, Histogram, LATENCY_BUCKETS, RequestMetricsMiddleware, render_latest
+from app.drift_scores import DriftScoreCollector
+from app.drift_store import DriftStore
+from app.constants import (
+    MODEL_PATH, LOG_FILE_PATH, MAX_BATCH_SIZE,
+    MICROBATCH_ENABLED, MICROBATCH_MAX_SIZE, MICROBATCH_MAX_WAIT_MS,
+    PREDICTION_LOG_ASYNC, PREDICTION_LOG_QUEUE_SIZE, PREDICTION_LOG_FLUSH_ROWS,
+    PREDICTION_LOG_FLUSH_INTERVAL_S, PREDICTION_LOG_BLOCK_TIMEOUT_S,
+    PREDICTION_SINK, PREDICTION_STORE_PATH, DRIFT_SCORES_DIR, DRIFT_STORE_PATH, DRIFT_RENDERED_REPORTS_DIR, DRIFT_RENDER_TIMEOUT_S, INFERENCE_BACKEND, MODEL_MMAP_DIR,
+    MODEL_VERSION, MODEL_REGISTRY_DIR, MODEL_WARMUP_ROWS, ADMIN_TOKEN,
+    SHADOW_STORE_PATH, SHADOW_QUEUE_SIZE, SHADOW_BATCH_SIZE, SHADOW_WORKERS,
+    PREDICTION_CACHE_SIZE, PREDICTION_CACHE_TTL_S
+)
 
 
 ############################################################ FAST API LIFESPAN FUNCTION ###########################################################################################
 
-#classifier = {"random_forest":load_model(MODEL_PATH)}  # Dictionary to hold the loaded model (use this for unit testing)
-classifier = {}
+# Resident model versions; the primary answers requests (a canary may take a share of them)
+registry = ModelRegistry(backend=INFERENCE_BACKEND, mmap_dir=MODEL_MMAP_DIR, warmup_rows=MODEL_WARMUP_ROWS)
+# Results of recently scored transactions, keyed by feature vector and model; emptied on every promotion
+prediction_cache = PredictionCache(PREDICTION_CACHE_SIZE, PREDICTION_CACHE_TTL_S) if PREDICTION_CACHE_SIZE > 0 else None
+if prediction_cache is not None:
+    registry.add_listener(prediction_cache.clear)
+drift_store = DriftStore(DRIFT_STORE_PATH)  # Structured results written by the monitoring drift jobs
+workers = {}  # Background workers started in the lifespan (micro-batcher, prediction sink, log writer, shadow scorer)
+
+########################################################### METRICS ###########################################################################################
+
+# Latency of each stage of a prediction request. "validation" is the time from arrival until the feature
+# matrix is built (body read, JSON decoding and schema validation), "get_prediction" the model call including any
+# micro-batch queueing, and "log_prediction" handing the rows to the prediction log.
+STAGE_LATENCY = {
+    stage: Histogram("prediction_stage_latency_seconds", "Latency of each stage of a prediction request", LATENCY_BUCKETS, labels={"stage": stage})
+    for stage in ("validation", "get_prediction", "log_prediction")
+}
+Gauge("prediction_log_queue_depth", "Batches waiting in the background prediction log queue",
+      callback=lambda: workers["log_writer"].queue_depth() if "log_writer" in workers else 0)
+Gauge("microbatch_queue_depth", "Rows waiting in the micro-batch queue",
+      callback=lambda: workers["batcher"].queue_depth() if "batcher" in workers else 0)
+Gauge("prediction_cache_entries", "Results held in the prediction cache",
+      callback=lambda: len(prediction_cache) if prediction_cache is not None else 0)
+Gauge("shadow_queue_depth", "Requests waiting to be shadow-scored",
+      callback=lambda: workers["shadow"].queue_depth() if "shadow" in workers else 0)
+REGISTRY.append(DriftScoreCollector("drift_score", "Latest drift score per column reported by the monitoring jobs", "drift_score", DRIFT_SCORES_DIR))
+REGISTRY.append(DriftScoreCollector("drift_detected", "Whether the monitoring jobs flagged drift for a column (1) or not (0)", "drift_detected", DRIFT_SCORES_DIR))
+
+def observe_stage(stage: str, started: float) -> float:
+    """Record the time since `started` for `stage` and return the current time."""
+    now = time.perf_counter()
+    STAGE_LATENCY[stage].observe(now - started)
+    return now
+
+def score_with_current_model(features: np.ndarray) -> tuple:
+    """Score a feature matrix with whichever version is the primary when the batch runs."""
+    entry = registry.primary()
+    if entry is None:
+        raise ValueError("Model is not loaded for prediction")
+    return entry.score(features)
+
+def score_rows(entry, features: np.ndarray) -> tuple:
+    """
+    Score a feature matrix with `entry`, answering rows found in the prediction cache from it.
+    Returns (labels, probabilities, duplicates) where duplicates marks the rows answered from the cache.
+    """
+    if prediction_cache is None:
+        labels, probabilities = entry.score(features)
+        return labels, probabilities, np.zeros(len(features), dtype=bool)
+
+    keys = [feature_key(row, entry.token) for row in features]
+    cached = [prediction_cache.get(key) for key in keys]
+    duplicates = np.array([result is not None for result in cached], dtype=bool)
+    labels = np.zeros(len(features), dtype=np.int64)
+    probabilities = np.zeros(len(features), dtype=np.float64)
+    misses = np.flatnonzero(~duplicates)
+    if len(misses):
+        labels[misses], probabilities[misses] = entry.score(features[misses])
+        for i in misses:
+            prediction_cache.put(keys[i], labels[i], probabilities[i])
+    for i in np.flatnonzero(duplicates):
+        labels[i], probabilities[i] = cached[i]
+    return labels, probabilities, duplicates
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """
     Lifespan context manager to load and unload the model.
     """
-    # Load the model only once at startup
-    model = load_model(MODEL_PATH)
-    if model is None:
-        raise RuntimeError("Failed to load the model at startup")
-    
-    # Store the loaded model in the classifier dictionary
-    classifier["random_forest"] = model
+    # Load and warm up the initial model version, then make it the primary
+    registry.load(MODEL_VERSION, MODEL_PATH)
+    registry.promote(MODEL_VERSION)
+
+    # Open the prediction store and the background writer that appends to it in bulk
+    sink = create_sink(PREDICTION_SINK, PREDICTION_STORE_PATH)
+    workers["sink"] = sink
+    if PREDICTION_LOG_ASYNC:
+        log_writer = PredictionLogWriter(
+            sink,
+            max_queue_size=PREDICTION_LOG_QUEUE_SIZE,
+            flush_rows=PREDICTION_LOG_FLUSH_ROWS,
+            flush_interval=PREDICTION_LOG_FLUSH_INTERVAL_S
+        )
+        log_writer.start()
+        workers["log_writer"] = log_writer
+
+    # Start the micro-batcher that groups concurrent /predict calls into one model call
+    if MICROBATCH_ENABLED:
+        batcher = MicroBatcher(score_with_current_model, max_batch_size=MICROBATCH_MAX_SIZE, max_wait_ms=MICROBATCH_MAX_WAIT_MS)
+        await batcher.start()
+        workers["batcher"] = batcher
+
+    # Start the shadow scorer; it only does work once a shadow version is set through /models
+    shadow = ShadowScorer(registry, SHADOW_STORE_PATH, max_queue_size=SHADOW_QUEUE_SIZE,
+                          batch_size=SHADOW_BATCH_SIZE, n_workers=SHADOW_WORKERS)
+    shadow.start()
+    workers["shadow"] = shadow
+
     print("Started up Random Forest model API version")
     yield  # Pause here and allow the application to run
 
-    # Cleanup code to unload the model
-    if "random_forest" in classifier:
+    # Score any queued requests before the model goes away
+    batcher = workers.pop("batcher", None)
+    if batcher is not None:
+        await batcher.stop()
+
+    # Finish the queued shadow scoring while the models are still loaded
+    shadow = workers.pop("shadow", None)
+    if shadow is not None:
+        await run_in_threadpool(shadow.close)
+
+    # Flush every queued prediction to disk before exiting
+    log_writer = workers.pop("log_writer", None)
+    if log_writer is not None:
+        await run_in_threadpool(log_writer.close)
+    workers.pop("sink", None)
+
+    # Cleanup code to unload the models
+    if registry.primary() is not None:
         print("Shutting down Random Forest model API version")
-        del classifier["random_forest"]
+        registry.clear()
     else:
         print("No model to unload")
 
+async def record_predictions(features: np.ndarray, labels: np.ndarray, probabilities: np.ndarray, timestamp: str, request_ids: list,
+                             duplicates: np.ndarray):
+    """Hand prediction rows to the background log writer, or write them to the store directly if it is not running."""
+    duplicates = duplicates.astype(int).tolist()
+
+    # Shadow-score the same rows in the background (never blocks; rows are shed if the queue is full)
+    shadow = workers.get("shadow")
+    if shadow is not None and registry.shadow() is not None:
+        shadow.offer(features, labels, probabilities, timestamp, request_ids, duplicates)
+
+    log_writer = workers.get("log_writer")
+    sink = workers.get("sink")
+    if log_writer is None and sink is None:
+        await run_in_threadpool(log_predictions, features, labels, probabilities, timestamp, LOG_FILE_PATH, request_ids, duplicates)
+        return
+
+    rows = [
+        (timestamp, *row, label, probability, request_id, duplicate)
+        for row, label, probability, request_id, duplicate in zip(
+            features.tolist(), labels.tolist(), probabilities.tolist(), request_ids, duplicates
+        )
+    ]
+    if log_writer is None:
+        await run_in_threadpool(sink.write, rows)
+    elif not log_writer.try_submit(rows):
+        # Queue is full: apply backpressure off the event loop, then drop the rows if it stays full
+        await run_in_threadpool(log_writer.submit, rows, PREDICTION_LOG_BLOCK_TIMEOUT_S)
+
+########################################################### REQUEST VALIDATION ###########################################################################################
+# The prediction endpoints parse the JSON body themselves and validate it in one pass straight into a
+# float64 feature matrix (see app.schema), instead of building an InputData model per row.
+# Errors are reported in FastAPI's usual 422 format.
+
+async def parse_json_body(request: Request, parser):
+    """Decode the request body and run `parser` on it, raising RequestValidationError on bad input."""
+    body = await request.body()
+    try:
+        payload = json.loads(body)
+    except json.JSONDecodeError as e:
+        raise RequestValidationError(
+            [{"type": "json_invalid", "loc": ("body", e.pos), "msg": "JSON decode error", "input": {}, "ctx": {"error": e.msg}}],
+            body=body
+        )
+    try:
+        return parser(payload)
+    except ValidationError as e:
+        errors = [{**error, "loc": ("body", *error["loc"])} for error in e.errors(include_url=False)]
+        raise RequestValidationError(errors, body=payload)
+
+def request_body_schema(schema: dict) -> dict:
+    """Document the JSON request body of an endpoint that parses it itself."""
+    return {"requestBody": {"required": True, "content": {"application/json": {"schema": schema}}}}
+
+INPUT_DATA_SCHEMA = InputData.model_json_schema()
+BATCH_INPUT_DATA_SCHEMA = {
+    "title": "BatchInputData", "type": "object", "required": ["transactions"],
+    "properties": {"transactions": {"title": "Transactions", "type": "array", "items": INPUT_DATA_SCHEMA}},
+}
+
 ########################################################### DATA PREPROCESSING ###########################################################################################
 # Perform any necessary preprocessing on the input data    
 def preprocess_data(input_data: InputData):
@@ -58,42 +245,272 @@ async def health():
     """
     return {"status": "ok"}
 
-@app.post("/predict", response_model=PredictionResponse)
-async def predict(input_data: InputData):
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """
+    Prometheus scrape endpoint.
+    """
+    return PlainTextResponse(render_latest(), media_type="text/plain; version=0.0.4")
+
+@app.post("/predict", response_model=PredictionResponse, openapi_extra=request_body_schema(INPUT_DATA_SCHEMA))
+async def predict(request: Request):
     """
     Endpoint to make predictions using the loaded model.
-    input_data: InputData - The input data for prediction.
+    The request body is an InputData object.
     Returns the prediction result.
     """
-    # Ensure the model is loaded
-    model = classifier.get("random_forest")
-    if model is None:
+    # Validate the body straight into a feature vector in training order
+    features = await parse_json_body(request, parse_feature_vector)
+    stage_started = observe_stage("validation", request.scope["state"]["request_started"])
+
+    # Ensure the model is loaded and pick the version for this request (primary or canary)
+    entry = registry.route()
+    if entry is None:
         raise HTTPException(status_code=500, detail="Model is not loaded")
     
     # Preprocess input data (if needed)
     # preprocessed_data = preprocess_data(input_data)
 
-    # Make prediction using the loaded model
-    prediction = get_prediction(model, input_data)
+    # A transaction this model already scored (a retry or replay) is answered from the cache
+    cache_key = feature_key(features, entry.token) if prediction_cache is not None else None
+    cached = prediction_cache.get(cache_key) if cache_key is not None else None
 
-    timestamp=datetime.utcnow().isoformat()
+    # Make prediction using the loaded model, off the event loop.
+    # Concurrent calls to the primary are grouped by the micro-batcher into one predict_proba call.
+    batcher = workers.get("batcher")
+    if cached is not None:
+        label, probability = cached
+    elif batcher is not None and entry is registry.primary():
+        label, probability = await batcher.submit(features)
+    else:
+        labels, probabilities = await run_in_threadpool(entry.score, features[np.newaxis, :])
+        label, probability = labels[0], probabilities[0]
+    if cache_key is not None and cached is None:
+        prediction_cache.put(cache_key, label, probability)
+    stage_started = observe_stage("get_prediction", stage_started)
 
-    #Log the prediction along with the timestamp
-    prediction["prediction_timestamp"] = timestamp
+    timestamp=datetime.utcnow().isoformat()
+    request_id = uuid.uuid4().hex
 
-    log_prediction(input_data=input_data, prediction=prediction, log_file=LOG_FILE_PATH)
+    #Log the prediction along with the timestamp and the request id used to join labels later
+    await record_predictions(features[np.newaxis, :], np.array([label]), np.array([probability]), timestamp, [request_id],
+                             np.array([cached is not None]))
+    observe_stage("log_prediction", stage_started)
 
     response = PredictionResponse(
-        prediction=prediction["prediction"],
-        probability=prediction["probability"],
-        prediction_timestamp=timestamp
+        prediction=int(label),
+        probability=float(probability),
+        prediction_timestamp=timestamp,
+        request_id=request_id
     )
 
     # Return the prediction response
     return response
 
+@app.post("/predict_batch", response_model=BatchPredictionResponse, openapi_extra=request_body_schema(BATCH_INPUT_DATA_SCHEMA))
+async def predict_batch_endpoint(request: Request):
+    """
+    Endpoint to score a batch of transactions with a single model call.
+    The request body is a BatchInputData object with the list of transactions to score.
+    Returns one prediction per transaction, in request order.
+    """
+    # One (n_rows, n_features) matrix in training order
+    features = await parse_json_body(request, parse_feature_matrix)
+    stage_started = observe_stage("validation", request.scope["state"]["request_started"])
+
+    # Ensure the model is loaded and pick the version for this request (primary or canary)
+    entry = registry.route()
+    if entry is None:
+        raise HTTPException(status_code=500, detail="Model is not loaded")
+
+    n_rows = len(features)
+    if n_rows == 0:
+        raise HTTPException(status_code=422, detail="Batch must contain at least one transaction")
+    if n_rows > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=413, detail=f"Batch size {n_rows} exceeds the limit of {MAX_BATCH_SIZE}")
+
+    # Score the whole batch (minus the cached rows) with one predict_proba call, off the event loop
+    labels, probabilities, duplicates = await run_in_threadpool(score_rows, entry, features)
+    stage_started = observe_stage("get_prediction", stage_started)
+
+    timestamp = datetime.utcnow().isoformat()
+    request_ids = [uuid.uuid4().hex for _ in range(n_rows)]
+
+    # Log the whole batch in one go
+    await record_predictions(features, labels, probabilities, timestamp, request_ids, duplicates)
+    observe_stage("log_prediction", stage_started)
+
+    response = BatchPredictionResponse(
+        predictions=[
+            PredictionResponse(prediction=int(label), probability=float(proba), prediction_timestamp=timestamp, request_id=request_id)
+            for label, proba, request_id in zip(labels, probabilities, request_ids)
+        ]
+    )
+
+    return response
+
+########################################################### MODEL ADMINISTRATION ###########################################################################################
+# Load, promote, canary and unload model versions without restarting the API. Every endpoint that changes the
+# served models requires the ADMIN_TOKEN in an X-Admin-Token header; without ADMIN_TOKEN they are disabled.
+
+def require_admin_token(x_admin_token: str = Header(default=None)):
+    """Reject model administration requests unless they carry the configured admin token."""
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Model administration is disabled; set ADMIN_TOKEN to enable it")
+    if x_admin_token is None or not hmac.compare_digest(x_admin_token.encode(), ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=401, detail="Missing or invalid X-Admin-Token header")
+
+def resolve_model_path(path: str) -> str:
+    """Resolve `path` relative to MODEL_REGISTRY_DIR and refuse anything outside of it."""
+    root = os.path.realpath(MODEL_REGISTRY_DIR)
+    resolved = os.path.realpath(os.path.join(root, path))
+    if os.path.commonpath([root, resolved]) != root:
+        raise HTTPException(status_code=400, detail=f"Model path must be inside {MODEL_REGISTRY_DIR}")
+    if not os.path.isfile(resolved):
+        raise HTTPException(status_code=404, detail=f"Model file not found: {path}")
+    return resolved
+
+def registry_call(func, *args):
+    """Run a registry operation, mapping unknown versions to 404 and invalid transitions to 409."""
+    try:
+        return func(*args)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Unknown model version: {args[0]}")
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+@app.get("/models")
+async def list_models():
+    """
+    Resident model versions, the primary and the canary.
+    """
+    return registry.describe()
+
+@app.put("/models/{version}", status_code=202, dependencies=[Depends(require_admin_token)])
+async def load_model_version(version: str, load_request: LoadModelRequest):
+    """
+    Load (and warm up) a model version in the background, optionally promoting it once ready.
+    Poll GET /models for its status.
+    """
+    path = resolve_model_path(load_request.path)
+    entry = registry_call(registry.load_in_background, version, path, load_request.promote)
+    return entry.describe()
+
+@app.post("/models/{version}/promote", dependencies=[Depends(require_admin_token)])
+async def promote_model_version(version: str):
+    """
+    Atomically make a loaded version the primary; in-flight requests finish on the previous one.
+    """
+    registry_call(registry.promote, version)
+    return registry.describe()
+
+@app.post("/models/{version}/canary", dependencies=[Depends(require_admin_token)])
+async def canary_model_version(version: str, canary_request: CanaryRequest):
+    """
+    Route a fraction of the requests to a loaded version (fraction 0 removes the canary).
+    """
+    registry_call(registry.set_canary, version, canary_request.fraction)
+    return registry.describe()
+
+@app.post("/models/{version}/shadow", dependencies=[Depends(require_admin_token)])
+async def shadow_model_version(version: str, shadow_request: ShadowRequest):
+    """
+    Score all traffic with a loaded version in the background and log it next to the primary's output
+    ("enabled": false removes the shadow).
+    """
+    registry_call(registry.set_shadow, version if shadow_request.enabled else None)
+    return registry.describe()
+
+@app.delete("/models/{version}", dependencies=[Depends(require_admin_token)])
+async def unload_model_version(version: str):
+    """
+    Unload a version that is not the primary.
+    """
+    registry_call(registry.unload, version)
+    return registry.describe()
+
+########################################################### DRIFT RESULTS ###########################################################################################
+# Structured results of the monitoring drift jobs (see app.drift_store). Time ranges are [start, end) on the
+# time a run was stored, as ISO timestamps. HTML reports are only rendered when one is requested.
+
+@app.get("/drift")
+def drift_results(job: str = None, column: str = None, start: str = None, end: str = None,
+                  drifted_only: bool = False, limit: int = 1000):
+    """
+    Per-column drift results (statistic or p-value, threshold, drift flag, window bounds), newest first.
+    """
+    return {"results": drift_store.results(job=job, column=column, start=start, end=end, drifted_only=drifted_only, limit=limit)}
+
+@app.get("/drift/runs")
+def drift_runs(job: str = None, start: str = None, end: str = None, limit: int = 100):
+    """
+    Drift job runs with their row counts and number of drifted columns, newest first.
+    """
+    return {"runs": drift_store.runs(job=job, start=start, end=end, limit=limit)}
+
+@app.get("/drift/runs/{run_id}")
+def drift_run(run_id: str):
+    """
+    One drift run with its per-column results.
+    """
+    run = drift_store.run(run_id)
+    if run is None:
+        raise HTTPException(status_code=404, detail=f"Unknown drift run: {run_id}")
+    return run
+
+@app.get("/drift/runs/{run_id}/report")
+async def drift_run_report(run_id: str):
+    """
+    HTML report of a drift run. The report written by the job is served if there is one; otherwise it is
+    rendered by `monitoring.render_report` in a separate process on first request and cached. Runs of
+    other engines than Evidently's tests (params "engine") have no report (409).
+    """
+    run = await run_in_threadpool(drift_store.run, run_id)
+    if run is None:
+        raise HTTPException(status_code=404, detail=f"Unknown drift run: {run_id}")
+    if run["report_path"] and os.path.isfile(run["report_path"]):
+        return FileResponse(run["report_path"], media_type="text/html")
+    if run["params"].get("engine"):
+        raise HTTPException(status_code=409, detail=f"Run {run_id} was scored by the {run['params']['engine']} engine; "
+                                                    "its Evidently report would not match the stored results")
+
+    path = os.path.join(DRIFT_RENDERED_REPORTS_DIR, f"{run_id}.html")
+    if not os.path.isfile(path):
+        await render_drift_report(run_id)
+    return FileResponse(path, media_type="text/html")
+
+async def render_drift_report(run_id: str):
+    """Run the renderer in a subprocess so that Evidently and the report data never load into the API process."""
+    src_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [src_dir, os.path.dirname(src_dir), env.get("PYTHONPATH")]))
+    process = await asyncio.create_subprocess_exec(
+        sys.executable, "-m", "monitoring.render_report", "--run_id", run_id,
+        "--store_path", DRIFT_STORE_PATH, "--output_dir", DRIFT_RENDERED_REPORTS_DIR,
+        env=env, stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.PIPE
+    )
+    try:
+        _, stderr = await asyncio.wait_for(process.communicate(), timeout=DRIFT_RENDER_TIMEOUT_S)
+    except asyncio.TimeoutError:
+        process.kill()
+        await process.wait()
+        raise HTTPException(status_code=504, detail=f"Rendering the report took longer than {DRIFT_RENDER_TIMEOUT_S:.0f}s")
+    if process.returncode != 0:
+        error = stderr.decode(errors="replace").strip().splitlines()
+        raise HTTPException(status_code=500, detail=f"Rendering the report failed: {error[-1] if error else process.returncode}")
+
+# Count and time every request; added last so the known routes can be used as labels
+app.add_middleware(RequestMetricsMiddleware, paths=[route.path for route in app.routes])
+
 ############################################################# MAIN FUNCTION #########################################################################################
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+    from app.model import build_shared_model
+
+    n_workers = int(os.getenv("API_WORKERS", "1"))
+    if MODEL_MMAP_DIR:
+        # Compile once here so the workers only map the tables
+        build_shared_model(MODEL_PATH, MODEL_MMAP_DIR)
+    # Several workers need an import string so that each process imports the app itself
+    uvicorn.run("app.main:app" if n_workers > 1 else app, host="0.0.0.0", port=8000, workers=n_workers)
\ No newline at end of file
@@ -0,0 +1,162 @@
+import threading
+import time
+from bisect import bisect_left
+
+# Lightweight, dependency-free metrics rendered in the Prometheus text exposition format.
+# Every metric is created once at import time; the hot path only updates numbers in place.
+
+REGISTRY = []
+
+def _format_labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{value}"' for key, value in labels.items()) + "}"
+
+class Counter:
+    """Monotonically increasing counter."""
+    kind = "counter"
+
+    def __init__(self, name: str, description: str, labels: dict = None, register: bool = True):
+        self.name = name
+        self.description = description
+        self.labels = labels or {}
+        self.value = 0
+        self._lock = threading.Lock()
+        if register:
+            REGISTRY.append(self)
+
+    def inc(self, amount: float = 1):
+        with self._lock:
+            self.value += amount
+
+    def samples(self):
+        yield self.name, self.labels, self.value
+
+class Gauge:
+    """Value that can go up and down, or be read from a callback at scrape time."""
+    kind = "gauge"
+
+    def __init__(self, name: str, description: str, labels: dict = None, callback=None, register: bool = True):
+        self.name = name
+        self.description = description
+        self.labels = labels or {}
+        self.value = 0
+        self.callback = callback
+        if register:
+            REGISTRY.append(self)
+
+    def set(self, value: float):
+        self.value = value
+
+    def samples(self):
+        yield self.name, self.labels, self.callback() if self.callback is not None else self.value
+
+class Histogram:
+    """Fixed-bucket histogram; observe() is a bisect plus two additions."""
+    kind = "histogram"
+
+    def __init__(self, name: str, description: str, buckets, labels: dict = None, register: bool = True):
+        self.name = name
+        self.description = description
+        self.labels = labels or {}
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)  # last slot is the +Inf bucket
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+        if register:
+            REGISTRY.append(self)
+
+    def observe(self, value: float):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    def samples(self):
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            cumulative += count
+            le = "+Inf" if bound == float("inf") else repr(float(bound))
+            yield f"{self.name}_bucket", {**self.labels, "le": le}, cumulative
+        yield f"{self.name}_sum", self.labels, self.sum
+        yield f"{self.name}_count", self.labels, self.count
+
+class MetricFamily:
+    """Label variants of one metric, each created on first use and reused afterwards."""
+
+    def __init__(self, factory):
+        self._factory = factory  # called with the tuple of label values, returns a registered metric
+        self._children = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values):
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.get(values)
+                if child is None:
+                    child = self._factory(values)
+                    self._children[values] = child
+        return child
+
+def render_latest(registry: list = None) -> str:
+    """Render all registered metrics in the Prometheus text exposition format."""
+    # Group label variants of the same metric so each family is rendered contiguously
+    families = {}
+    for metric in (REGISTRY if registry is None else registry):
+        families.setdefault(metric.name, []).append(metric)
+
+    lines = []
+    for name, metrics in families.items():
+        lines.append(f"# HELP {name} {metrics[0].description}")
+        lines.append(f"# TYPE {name} {metrics[0].kind}")
+        for metric in metrics:
+            for sample_name, labels, value in metric.samples():
+                lines.append(f"{sample_name}{_format_labels(labels)} {value}")
+    return "\n".join(lines) + "\n"
+
+########################################################### HTTP INSTRUMENTATION ###########################################################################################
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+HTTP_REQUESTS = MetricFamily(lambda values: Counter(
+    "http_requests_total", "HTTP requests by route and status code", labels={"path": values[0], "status": values[1]}
+))
+HTTP_LATENCY = MetricFamily(lambda values: Histogram(
+    "http_request_latency_seconds", "End-to-end HTTP request latency by route", LATENCY_BUCKETS, labels={"path": values[0]}
+))
+
+class RequestMetricsMiddleware:
+    """
+    Pure ASGI middleware counting requests and timing them per route. Paths outside `paths`
+    are reported as "other" to keep label cardinality bounded. The arrival time is stored in
+    scope["state"]["request_started"] so handlers can time the stages that precede them.
+    """
+
+    def __init__(self, app, paths):
+        self.app = app
+        self.paths = frozenset(paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        scope.setdefault("state", {})["request_started"] = started
+        path = scope["path"] if scope["path"] in self.paths else "other"
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            HTTP_LATENCY.labels(path).observe(time.perf_counter() - started)
+            HTTP_REQUESTS.labels(path, status).inc()
@@ -1,62 +1,167 @@
+import argparse
+import hashlib
+import os
+import shutil
+import time
 import joblib
+import numpy as np
 import pandas as pd
-from app.schema import InputData  # Import your Pydantic schema
+from app.schema import InputData, FEATURE_NAMES, parse_feature_vector, to_feature_vector, validate_feature_frame  # Import your Pydantic schema
+from app.metrics import Histogram
+from app.tree_engine import CompiledForest
 
+MODEL_BATCH_SIZE = Histogram(
+    "model_call_batch_size", "Rows scored per predict_proba call",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024)
+)
+MODEL_CALL_LATENCY = Histogram(
+    "model_call_latency_seconds", "Wall-clock time of one predict_proba call",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+)
+
+
+def load_model(model_path: str, backend: str = "sklearn", mmap_dir: str = None) -> object:
+    """
+    Load the pre-trained model from the specified path.
+    backend="compiled" converts a tree ensemble into flat node tables evaluated with NumPy (see app.tree_engine).
+    With `mmap_dir` the compiled tables are memory-mapped from disk (see load_shared_model).
+    """
+    if backend not in ("sklearn", "compiled"):
+        raise ValueError(f"Unknown inference backend: {backend}. Please choose 'sklearn' or 'compiled'.")
+    if mmap_dir:
+        if backend != "compiled":
+            raise ValueError("Memory-mapped models require the 'compiled' inference backend")
+        return load_shared_model(model_path, mmap_dir)
 
-def load_model(model_path: str) -> object:
-    """Load the pre-trained model from the specified path."""
     try:
         model = joblib.load(model_path)
-        return model
     except FileNotFoundError:
         raise RuntimeError(f"Model file not found at path: {model_path}")
     except Exception as e:
         raise RuntimeError(f"An error occurred while loading the model: {e}")
 
-def get_prediction(model: object, data: InputData) -> dict:
-    """Make predictions using the loaded model."""
-    # Define the expected feature names (same as used during training)
-    feature_names = [
-        "Time", "V1", "V2", "V3", "V4", "V5", "V6", "V7", "V8", "V9",
-        "V10", "V11", "V12", "V13", "V14", "V15", "V16", "V17", "V18", "V19",
-        "V20", "V21", "V22", "V23", "V24", "V25", "V26", "V27", "V28", "Amount"
-    ]
-
-    # If `data` is an instance of `InputData`, convert it to a dictionary
-    if isinstance(data, InputData):
-        validated_data = data.dict()
-    else:
-        # Validate input data using the InputData schema
+    if backend == "compiled":
         try:
-            validated_data = InputData(**data).dict()  # Validate and convert to dictionary
+            model = CompiledForest.from_sklearn(model)
         except Exception as e:
-            raise ValueError(f"Invalid input data: {e}")
+            raise RuntimeError(f"An error occurred while compiling the model: {e}")
+    return model
+
+def shared_model_directory(model_path: str, mmap_dir: str) -> str:
+    """Directory holding the compiled tables of this model file, keyed by its path, size and modification time."""
+    try:
+        stat = os.stat(model_path)
+    except FileNotFoundError:
+        raise RuntimeError(f"Model file not found at path: {model_path}")
+    key = hashlib.sha256(f"{os.path.abspath(model_path)}:{stat.st_size}:{stat.st_mtime_ns}".encode()).hexdigest()[:16]
+    name = os.path.splitext(os.path.basename(model_path))[0]
+    return os.path.join(mmap_dir, f"{name}-{key}")
+
+def build_shared_model(model_path: str, mmap_dir: str) -> str:
+    """
+    Compile the model into `mmap_dir` unless it is already there and return the table directory.
+    Safe to call from several worker processes at once: each builds under a temporary name and
+    the first rename wins.
+    """
+    directory = shared_model_directory(model_path, mmap_dir)
+    if os.path.isdir(directory):
+        return directory
 
-    # Convert validated data to DataFrame with correct feature names
+    model = load_model(model_path, backend="compiled")
+    os.makedirs(mmap_dir, exist_ok=True)
     try:
-        data = pd.DataFrame([validated_data], columns=feature_names)
+        model.save(directory)
+        print(f"Compiled {model_path} into {directory}")
+    except OSError:
+        # Another worker finished first; its copy is identical
+        shutil.rmtree(f"{directory}.tmp-{os.getpid()}", ignore_errors=True)
+        if not os.path.isdir(directory):
+            raise
+    return directory
+
+def load_shared_model(model_path: str, mmap_dir: str) -> CompiledForest:
+    """
+    Memory-map the compiled tables of the model read-only, building them on first use.
+    Worker processes that map the same files share one copy of the weights in the page cache.
+    """
+    directory = build_shared_model(model_path, mmap_dir)
+    try:
+        return CompiledForest.load(directory, mmap_mode="r")
     except Exception as e:
-        raise ValueError(f"Failed to convert input data to DataFrame with correct feature names: {e}")
+        raise RuntimeError(f"An error occurred while mapping the model from {directory}: {e}")
 
+def get_prediction(model: object, data) -> dict:
+    """
+    Make predictions using the loaded model.
+    `data` can be an InputData instance, a parsed JSON dict, a feature vector already in
+    FEATURE_NAMES order, or a one-row DataFrame.
+    """
+    # Go straight to a one-row feature matrix in training order, validating the input only once
+    try:
+        if isinstance(data, InputData):
+            features = to_feature_vector(data)[np.newaxis, :]
+        elif isinstance(data, np.ndarray):
+            features = np.asarray(data, dtype=np.float64).reshape(1, -1)
+        elif isinstance(data, pd.DataFrame):
+            features, valid = validate_feature_frame(data)
+            if len(features) != 1 or not valid[0]:
+                raise ValueError("expected exactly one valid row")
+        else:
+            features = parse_feature_vector(data)[np.newaxis, :]
+    except Exception as e:
+        raise ValueError(f"Invalid input data: {e}")
+
+    labels, probabilities = predict_batch(model, features)
+
+    # Create a dictionary to hold the predictions and probabilities
+    predictions = {
+        'prediction': int(labels[0]),
+        'probability': float(probabilities[0])
+    }
+
+    return predictions
+
+def predict_batch(model: object, features: np.ndarray) -> tuple:
+    """
+    Score a (n_rows, n_features) matrix with a single predict_proba call.
+    Returns (labels, probabilities) where the label is the argmax class and
+    the probability is the confidence of that class.
+    """
     # Ensure the model is loaded
     if model is None:
         raise ValueError("Model is not loaded for prediction")
-    
+
     # Ensure the model has the required methods
-    if not hasattr(model, "predict") or not hasattr(model, "predict_proba"):
-        raise ValueError("The provided model does not support 'predict' or 'predict_proba' methods")
-    
+    if not hasattr(model, "predict_proba"):
+        raise ValueError("The provided model does not support 'predict_proba' method")
+
+    if features.ndim != 2 or features.shape[1] != len(FEATURE_NAMES):
+        raise ValueError(f"Expected a feature matrix of shape (n, {len(FEATURE_NAMES)}), got {features.shape}")
+
     try:
-        # Make predictions
-        prediction_label = model.predict(data)
-        prediction_probability = model.predict_proba(data)
+        # Models fitted on a DataFrame warn on bare arrays, so wrap the matrix without copying it
+        if hasattr(model, "feature_names_in_"):
+            X = pd.DataFrame(features, columns=FEATURE_NAMES, copy=False)
+        else:
+            X = features
+        started = time.perf_counter()
+        proba = model.predict_proba(X)
+        MODEL_CALL_LATENCY.observe(time.perf_counter() - started)
+        MODEL_BATCH_SIZE.observe(len(features))
 
-        # Create a dictionary to hold the predictions and probabilities
-        predictions = {
-            'prediction': int(prediction_label[0]),  
-            'probability': float(prediction_probability.max())  
-        }
+        # Derive the label from the probabilities instead of a second tree traversal
+        best = proba.argmax(axis=1)
+        labels = np.asarray(model.classes_)[best]
+        probabilities = proba[np.arange(len(best)), best]
 
-        return predictions
+        return labels, probabilities
     except Exception as e:
         raise RuntimeError(f"An error occurred during prediction: {e}")
+
+if __name__ == "__main__":
+    # Build step for multi-worker serving: compile the model once before starting the workers
+    parser = argparse.ArgumentParser(description="Compile a tree ensemble into memory-mappable tables")
+    parser.add_argument("--model_path", type=str, required=True)
+    parser.add_argument("--mmap_dir", type=str, default="models/mmap")
+    args = parser.parse_args()
+    print(build_shared_model(args.model_path, args.mmap_dir))
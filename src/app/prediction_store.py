@@ -0,0 +1,323 @@
+import csv
+import os
+import threading
+import uuid
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from app.schema import FEATURE_NAMES
+from app import binary_log
+
+# Column order of every logged prediction row. request_id is returned to the client and used to join
+# ground-truth labels to predictions later on; duplicate is 1 when the result came from the prediction
+# cache, i.e. the same transaction was already scored and logged.
+LOG_COLUMNS = ["prediction_timestamp", *FEATURE_NAMES, "prediction", "probability", "request_id", "duplicate"]
+DUPLICATE_COLUMN = "duplicate"
+TIMESTAMP_COLUMN = "prediction_timestamp"
+
+########################################################### SINKS ###########################################################################################
+
+def _stale_header(path: str, columns: list):
+    """The header of the CSV file at `path` when it differs from `columns`, else None (also for missing or empty files)."""
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return None
+    with open(path, newline="") as f:
+        header = next(csv.reader(f), [])
+    return header if header != list(columns) else None
+
+def legacy_log_path(path: str) -> str:
+    """Where an old-layout log is moved: <stem>.legacy.csv, numbered (<stem>.legacy-1.csv, ...) if that is taken."""
+    stem, ext = os.path.splitext(path)
+    candidate, n = f"{stem}.legacy{ext}", 0
+    while os.path.exists(candidate):
+        n += 1
+        candidate = f"{stem}.legacy-{n}{ext}"
+    return candidate
+
+def check_log_header(path: str, columns: list = LOG_COLUMNS):
+    """
+    Refuse to append to a CSV file written with a different column layout (e.g. a log from before request_id
+    and duplicate were added), since its rows would no longer line up with the header. Missing or empty files pass.
+    """
+    header = _stale_header(path, columns)
+    if header is not None:
+        raise ValueError(
+            f"{path} has columns {header}, expected {list(columns)}; "
+            f"move the old file aside (mv {path} {legacy_log_path(path)}) or point the sink at a new path"
+        )
+
+def rotate_legacy_log(path: str, columns: list = LOG_COLUMNS):
+    """
+    Rename a CSV log written with a different column layout to legacy_log_path(path), so that a new log is started
+    at `path` and the old rows are kept for reading. Returns the new name of the old log, or None if nothing was moved.
+    """
+    if _stale_header(path, columns) is None:
+        return None
+    legacy_path = legacy_log_path(path)
+    os.replace(path, legacy_path)
+    print(f"{path} has an older column layout; moved it to {legacy_path} and starting a new log")
+    return legacy_path
+
+class CsvPredictionSink:
+    """
+    Appends prediction rows to a single CSV file (the original prediction log format). An existing file
+    is checked when the sink is created, so a log with another column layout fails at start-up (create_sink moves
+    such a log aside instead).
+    Writes are serialised, so several threads (e.g. shadow workers) can share one sink.
+    """
+
+    def __init__(self, path: str, columns: list = LOG_COLUMNS):
+        self.path = path
+        self.columns = columns
+        check_log_header(path, columns)
+        self._header_checked = os.path.exists(path)
+        self._lock = threading.Lock()
+
+    def write(self, rows: list):
+        """Append rows (tuples in `columns` order, LOG_COLUMNS by default) with one file open."""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._lock:
+            # Write the header only when starting a new (or empty) file
+            write_header = not os.path.exists(self.path) or os.path.getsize(self.path) == 0
+            if not write_header and not self._header_checked:
+                # The file appeared after the sink was created
+                check_log_header(self.path, self.columns)
+                self._header_checked = True
+            with open(self.path, "a", newline="") as f:
+                writer = csv.writer(f)
+                if write_header:
+                    writer.writerow(self.columns)
+                writer.writerows(rows)
+
+class ParquetPredictionSink:
+    """
+    Writes prediction rows as compressed Parquet segments partitioned by hour:
+
+        <root>/date=YYYY-MM-DD/hour=HH/part-<first timestamp>-<id>.parquet
+
+    Features and probabilities are stored as float32, labels as int8 and the duplicate flag as bool. Each write() produces
+    one immutable segment per hour it touches, so readers never see a half-written file.
+    """
+
+    def __init__(self, root: str, compression: str = "zstd"):
+        pa, pq = _require_pyarrow()
+        self.root = root
+        self.compression = compression
+        self._schema = pa.schema(
+            [pa.field(TIMESTAMP_COLUMN, pa.timestamp("us"))]
+            + [pa.field(name, pa.float32()) for name in FEATURE_NAMES]
+            + [pa.field("prediction", pa.int8()), pa.field("probability", pa.float32()), pa.field("request_id", pa.string()),
+               pa.field(DUPLICATE_COLUMN, pa.bool_())]
+        )
+
+    def write(self, rows: list):
+        """Write rows (tuples in LOG_COLUMNS order) to their hourly partitions."""
+        pa, pq = _require_pyarrow()
+
+        # Group rows by hour using the ISO timestamp prefix ("YYYY-MM-DDTHH")
+        partitions = {}
+        for row in rows:
+            partitions.setdefault(row[0][:13], []).append(row)
+
+        for hour, hour_rows in partitions.items():
+            columns = list(zip(*hour_rows))
+            timestamps = np.array(columns[0], dtype="datetime64[us]")
+            arrays = [pa.array(timestamps, type=pa.timestamp("us"))]
+            arrays += [pa.array(np.asarray(column, dtype=np.float32)) for column in columns[1:-4]]
+            arrays += [pa.array(np.asarray(columns[-4], dtype=np.int8)), pa.array(np.asarray(columns[-3], dtype=np.float32))]
+            arrays += [pa.array(columns[-2], type=pa.string()), pa.array(np.asarray(columns[-1], dtype=bool))]
+            table = pa.Table.from_arrays(arrays, schema=self._schema)
+
+            directory = os.path.join(self.root, f"date={hour[:10]}", f"hour={hour[11:13]}")
+            os.makedirs(directory, exist_ok=True)
+            first = "".join(ch for ch in hour_rows[0][0] if ch.isdigit() or ch == "T")
+            name = f"part-{first}-{uuid.uuid4().hex[:8]}.parquet"
+            # Write under a temporary name and rename, so a segment appears atomically
+            tmp_path = os.path.join(directory, f".{name}.tmp")
+            pq.write_table(table, tmp_path, compression=self.compression)
+            os.replace(tmp_path, os.path.join(directory, name))
+
+def create_sink(kind: str, path: str):
+    """
+    Build the prediction sink named by `kind` ("csv", "parquet" or "binary"). An existing CSV log with an older
+    column layout is moved aside with rotate_legacy_log first.
+    """
+    if kind == "csv":
+        rotate_legacy_log(path)
+        return CsvPredictionSink(path)
+    if kind == "parquet":
+        return ParquetPredictionSink(path)
+    if kind == "binary":
+        return binary_log.BinaryPredictionSink(path)
+    raise ValueError(f"Unknown prediction sink: {kind}. Please choose 'csv', 'parquet' or 'binary'.")
+
+########################################################### READER ###########################################################################################
+
+def read_predictions(path: str, columns: list = None, start=None, end=None, drop_duplicates: bool = False) -> pd.DataFrame:
+    """
+    Load logged predictions, keeping only `columns` (all by default) and rows whose
+    prediction_timestamp falls in [start, end). `path` is either a CSV prediction log
+    or the root directory of a ParquetPredictionSink or BinaryPredictionSink. For Parquet
+    stores, hourly partitions outside the window are skipped without being opened and only
+    the requested columns are decoded; binary segments are memory-mapped and only the
+    requested columns are copied out. With `drop_duplicates`, rows flagged as duplicates
+    are left out (files without the duplicate column are read as they are).
+    """
+    start = pd.Timestamp(start) if start is not None else None
+    end = pd.Timestamp(end) if end is not None else None
+    read_columns, filter_duplicates = _duplicate_filter(path, columns, drop_duplicates)
+    if binary_log.is_binary_store(path):
+        data = _read_binary_store(path, read_columns, start, end)
+    elif os.path.isdir(path):
+        data = _read_parquet_store(path, read_columns, start, end)
+    else:
+        data = _read_csv_log(path, read_columns, start, end)
+    return _drop_duplicate_rows(data, columns) if filter_duplicates else data
+
+def pin_window_end(path: str, end=None):
+    """
+    The end of a [start, end) window to read from the log at `path`: `end` itself, or the current time when
+    it is None and the log has prediction timestamps. Jobs store the pinned end with their results, so the
+    window can be read again later (e.g. to render a report) without the rows logged since.
+    """
+    if end is not None or TIMESTAMP_COLUMN not in log_columns(path):
+        return end
+    return datetime.utcnow().isoformat()
+
+def iter_predictions(path: str, columns: list = None, start=None, end=None, chunk_size: int = 100000,
+                     drop_duplicates: bool = False):
+    """
+    Same selection as read_predictions, yielded as DataFrames of at most `chunk_size` rows so that
+    windows larger than memory can be scanned in one pass.
+    """
+    start = pd.Timestamp(start) if start is not None else None
+    end = pd.Timestamp(end) if end is not None else None
+    read_columns, filter_duplicates = _duplicate_filter(path, columns, drop_duplicates)
+    for chunk in _iter_chunks(path, read_columns, start, end, chunk_size):
+        chunk = _drop_duplicate_rows(chunk, columns) if filter_duplicates else chunk
+        if len(chunk):
+            yield chunk
+
+def _iter_chunks(path: str, columns: list, start, end, chunk_size: int):
+    if binary_log.is_binary_store(path):
+        for records in binary_log.iter_segments(path, start, end):
+            for offset in range(0, len(records), chunk_size):
+                yield binary_log.to_frame(records[offset:offset + chunk_size], columns)
+        return
+    if os.path.isdir(path):
+        dataset, row_filter = _parquet_dataset(path, start, end)
+        if dataset is None:
+            return
+        for batch in dataset.to_batches(columns=list(columns) if columns is not None else None, filter=row_filter,
+                                        batch_size=chunk_size):
+            if batch.num_rows:
+                yield batch.to_pandas()
+        return
+
+    filter_on_time = start is not None or end is not None
+    for chunk in pd.read_csv(path, usecols=_csv_usecols(columns, filter_on_time), chunksize=chunk_size):
+        chunk = _filter_csv_window(chunk, start, end) if filter_on_time else chunk
+        if len(chunk):
+            yield chunk[list(columns)] if columns is not None else chunk
+
+def _duplicate_filter(path: str, columns: list, drop_duplicates: bool) -> tuple:
+    """The columns to read and whether rows must be filtered on the duplicate flag."""
+    if not drop_duplicates or DUPLICATE_COLUMN not in log_columns(path):
+        return columns, False
+    if columns is None or DUPLICATE_COLUMN in columns:
+        return columns, True
+    return list(columns) + [DUPLICATE_COLUMN], True
+
+def _drop_duplicate_rows(data: pd.DataFrame, columns: list) -> pd.DataFrame:
+    duplicate = data[DUPLICATE_COLUMN].fillna(0).astype(bool).to_numpy()
+    data = data.loc[~duplicate].reset_index(drop=True)
+    return data[list(columns)] if columns is not None else data
+
+def log_columns(path: str) -> list:
+    """Column names of a CSV log (its header), of a binary log or of a Parquet store (its schema)."""
+    if binary_log.is_binary_store(path):
+        return binary_log.COLUMNS
+    if os.path.isdir(path):
+        dataset, _ = _parquet_dataset(path, None, None)
+        return dataset.schema.names if dataset is not None else []
+    with open(path, newline="") as f:
+        return next(csv.reader(f), [])
+
+def _csv_usecols(columns: list, filter_on_time: bool) -> list:
+    if columns is None:
+        return None
+    return list(columns) + ([TIMESTAMP_COLUMN] if filter_on_time and TIMESTAMP_COLUMN not in columns else [])
+
+def _filter_csv_window(data: pd.DataFrame, start, end) -> pd.DataFrame:
+    timestamps = pd.to_datetime(data[TIMESTAMP_COLUMN])
+    mask = np.ones(len(data), dtype=bool)
+    if start is not None:
+        mask &= (timestamps >= start).to_numpy()
+    if end is not None:
+        mask &= (timestamps < end).to_numpy()
+    return data.loc[mask].reset_index(drop=True)
+
+def _read_csv_log(path: str, columns: list, start, end) -> pd.DataFrame:
+    filter_on_time = start is not None or end is not None
+    data = pd.read_csv(path, usecols=_csv_usecols(columns, filter_on_time))
+    if filter_on_time:
+        data = _filter_csv_window(data, start, end)
+    return data[list(columns)] if columns is not None else data
+
+def _read_binary_store(root: str, columns: list, start, end) -> pd.DataFrame:
+    frames = [binary_log.to_frame(records, columns) for records in binary_log.iter_segments(root, start, end)]
+    if not frames:
+        return binary_log.to_frame(np.zeros(0, dtype=binary_log.RECORD_DTYPE), columns)
+    return pd.concat(frames, ignore_index=True)
+
+def _read_parquet_store(root: str, columns: list, start, end) -> pd.DataFrame:
+    dataset, row_filter = _parquet_dataset(root, start, end)
+    if dataset is None:
+        return pd.DataFrame(columns=list(columns) if columns is not None else LOG_COLUMNS)
+    table = dataset.to_table(columns=list(columns) if columns is not None else None, filter=row_filter)
+    return table.to_pandas()
+
+def _parquet_dataset(root: str, start, end) -> tuple:
+    """The pyarrow dataset over the hourly partitions overlapping [start, end) and the row filter, or (None, None)."""
+    pa, pq = _require_pyarrow()
+    import pyarrow.dataset as ds
+
+    files = []
+    for date_dir in sorted(os.listdir(root)):
+        if not date_dir.startswith("date="):
+            continue
+        for hour_dir in sorted(os.listdir(os.path.join(root, date_dir))):
+            if not hour_dir.startswith("hour="):
+                continue
+            # Partition pruning: skip hours that cannot overlap [start, end)
+            hour_start = pd.Timestamp(f"{date_dir[5:]}T{hour_dir[5:]}:00:00")
+            if end is not None and hour_start >= end:
+                continue
+            if start is not None and hour_start + pd.Timedelta(hours=1) <= start:
+                continue
+            directory = os.path.join(root, date_dir, hour_dir)
+            files.extend(os.path.join(directory, name) for name in sorted(os.listdir(directory)) if name.endswith(".parquet"))
+
+    if not files:
+        return None, None
+
+    dataset = ds.dataset(files, format="parquet")
+    row_filter = None
+    if start is not None:
+        row_filter = ds.field(TIMESTAMP_COLUMN) >= pa.scalar(start.to_pydatetime(), type=pa.timestamp("us"))
+    if end is not None:
+        end_filter = ds.field(TIMESTAMP_COLUMN) < pa.scalar(end.to_pydatetime(), type=pa.timestamp("us"))
+        row_filter = end_filter if row_filter is None else row_filter & end_filter
+    return dataset, row_filter
+
+def _require_pyarrow():
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("The Parquet prediction store requires pyarrow: pip install pyarrow")
+    return pa, pq
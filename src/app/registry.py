@@ -0,0 +1,224 @@
+import random
+import threading
+import time
+import uuid
+from datetime import datetime
+
+import numpy as np
+
+from app.model import load_model, predict_batch
+from app.metrics import Counter, Histogram, MetricFamily, LATENCY_BUCKETS
+from app.schema import FEATURE_NAMES
+
+# Resident model versions. One version is the primary that answers requests; an optional canary takes a
+# fraction of them. New versions are loaded and warmed up in a background thread and swapped in by
+# replacing a single reference, so requests already scoring on the old version finish on it.
+# A shadow version scores the same traffic off the request path (see app.shadow).
+
+VERSION_LATENCY = MetricFamily(lambda values: Histogram(
+    "model_version_latency_seconds", "Model call latency by model version", LATENCY_BUCKETS, labels={"version": values[0]}
+))
+VERSION_ROWS = MetricFamily(lambda values: Counter(
+    "model_version_rows_total", "Rows scored by model version", labels={"version": values[0]}
+))
+VERSION_CALLS = MetricFamily(lambda values: Counter(
+    "model_version_calls_total", "Model calls by model version", labels={"version": values[0]}
+))
+
+class ModelVersion:
+    """A loaded (or loading) model and its bookkeeping."""
+
+    def __init__(self, version: str, path: str = None, model: object = None):
+        self.version = version
+        self.path = path
+        self.model = model
+        self.status = "ready" if model is not None else "loading"
+        self.error = None
+        self.loaded_at = datetime.utcnow().isoformat() if model is not None else None
+        self.warmup_seconds = None
+        self.token = uuid.uuid4().hex  # Distinguishes this load from another model loaded later under the same name
+
+    def score(self, features: np.ndarray) -> tuple:
+        """predict_batch on this version, recording its latency and row count."""
+        started = time.perf_counter()
+        labels, probabilities = predict_batch(self.model, features)
+        VERSION_LATENCY.labels(self.version).observe(time.perf_counter() - started)
+        VERSION_ROWS.labels(self.version).inc(len(features))
+        VERSION_CALLS.labels(self.version).inc()
+        return labels, probabilities
+
+    def describe(self) -> dict:
+        return {"version": self.version, "path": self.path, "status": self.status, "error": self.error,
+                "loaded_at": self.loaded_at, "warmup_seconds": self.warmup_seconds}
+
+class ModelRegistry:
+    """
+    Keeps several model versions resident and decides which one scores a request.
+    `backend` and `mmap_dir` are passed to load_model; every version is warmed up with
+    `warmup_rows` synthetic rows before it can be promoted.
+    """
+
+    def __init__(self, backend: str = "sklearn", mmap_dir: str = None, warmup_rows: int = 256, seed: int = None):
+        self.backend = backend
+        self.mmap_dir = mmap_dir
+        self.warmup_rows = warmup_rows
+        self._versions = {}
+        self._primary = None
+        self._canary = None
+        self._canary_fraction = 0.0
+        self._shadow = None
+        self._random = random.Random(seed)
+        self._listeners = []
+        self._lock = threading.Lock()
+
+    def add_listener(self, callback):
+        """Call `callback(version)` after every promotion, e.g. to invalidate caches of the old primary's results."""
+        self._listeners.append(callback)
+
+    ############################################################ Loading ############################################################
+
+    def register(self, version: str, model: object, path: str = None) -> ModelVersion:
+        """Add an already loaded model as a ready version."""
+        entry = ModelVersion(version, path, model)
+        with self._lock:
+            self._versions[version] = entry
+        return entry
+
+    def load(self, version: str, path: str) -> ModelVersion:
+        """Load and warm up a version in the calling thread. Raises RuntimeError if loading fails."""
+        entry = self._start_loading(version, path)
+        self._load_into(entry)
+        if entry.status != "ready":
+            raise RuntimeError(entry.error)
+        return entry
+
+    def load_in_background(self, version: str, path: str, promote: bool = False) -> ModelVersion:
+        """Load and warm up a version in a background thread, optionally promoting it once ready."""
+        entry = self._start_loading(version, path)
+        thread = threading.Thread(target=self._load_into, args=(entry, promote), name=f"model-load-{version}", daemon=True)
+        thread.start()
+        return entry
+
+    def _start_loading(self, version: str, path: str) -> ModelVersion:
+        with self._lock:
+            current = self._versions.get(version)
+            if current is not None and current.status == "loading":
+                raise ValueError(f"Model version {version} is already loading")
+            if current is not None and version in (self._primary, self._canary, self._shadow):
+                raise ValueError(f"Model version {version} is serving traffic; load the new model under another version")
+            entry = ModelVersion(version, path)
+            self._versions[version] = entry
+        return entry
+
+    def _load_into(self, entry: ModelVersion, promote: bool = False):
+        try:
+            model = load_model(entry.path, backend=self.backend, mmap_dir=self.mmap_dir)
+            # Score synthetic rows so lazy initialisation and first-call costs are paid before real traffic
+            started = time.perf_counter()
+            rows = np.random.default_rng(0).normal(size=(self.warmup_rows, len(FEATURE_NAMES)))
+            for size in (1, self.warmup_rows):
+                predict_batch(model, rows[:size])
+            entry.warmup_seconds = time.perf_counter() - started
+        except Exception as e:
+            entry.status = "failed"
+            entry.error = str(e)
+            print(f"Failed to load model version {entry.version}: {e}")
+            return
+
+        entry.model = model
+        entry.loaded_at = datetime.utcnow().isoformat()
+        entry.status = "ready"
+        print(f"Loaded model version {entry.version} from {entry.path}")
+        if promote:
+            self.promote(entry.version)
+
+    ############################################################ Routing ############################################################
+
+    def promote(self, version: str):
+        """Make a ready version the primary. A canary that gets promoted stops being the canary."""
+        with self._lock:
+            self._require_ready(version)
+            self._primary = version
+            if self._canary == version:
+                self._canary, self._canary_fraction = None, 0.0
+        print(f"Promoted model version {version}")
+        for callback in self._listeners:
+            callback(version)
+
+    def set_canary(self, version: str, fraction: float):
+        """Send `fraction` of the requests to `version`; a fraction of 0 removes the canary."""
+        if not 0.0 <= fraction <= 1.0:
+            raise ValueError("Canary fraction must be between 0 and 1")
+        with self._lock:
+            if fraction == 0.0:
+                self._canary, self._canary_fraction = None, 0.0
+                return
+            self._require_ready(version)
+            if version == self._primary:
+                raise ValueError(f"Model version {version} is already the primary")
+            self._canary, self._canary_fraction = version, fraction
+
+    def set_shadow(self, version: str = None):
+        """Shadow-score all traffic with `version`; None removes the shadow."""
+        with self._lock:
+            if version is not None:
+                self._require_ready(version)
+            self._shadow = version
+
+    def unload(self, version: str):
+        """Drop a version. Requests still scoring on it finish; the primary cannot be unloaded."""
+        with self._lock:
+            if version not in self._versions:
+                raise KeyError(version)
+            if version == self._primary:
+                raise ValueError(f"Model version {version} is the primary; promote another version first")
+            if version == self._canary:
+                self._canary, self._canary_fraction = None, 0.0
+            if version == self._shadow:
+                self._shadow = None
+            del self._versions[version]
+        print(f"Unloaded model version {version}")
+
+    def clear(self):
+        """Drop every version (used at shutdown)."""
+        with self._lock:
+            self._versions.clear()
+            self._primary = self._canary = self._shadow = None
+            self._canary_fraction = 0.0
+
+    def _require_ready(self, version: str):
+        entry = self._versions.get(version)
+        if entry is None:
+            raise KeyError(version)
+        if entry.status != "ready":
+            raise ValueError(f"Model version {version} is {entry.status}")
+
+    def primary(self) -> ModelVersion:
+        """The version answering requests, or None before any version is promoted."""
+        return self._versions.get(self._primary)
+
+    def shadow(self) -> ModelVersion:
+        """The version scored in the background on every request, or None."""
+        return self._versions.get(self._shadow)
+
+    def get(self, version: str) -> ModelVersion:
+        return self._versions.get(version)
+
+    def route(self) -> ModelVersion:
+        """Pick the version for one request: the canary with probability canary_fraction, otherwise the primary."""
+        canary = self._canary
+        if canary is not None and self._random.random() < self._canary_fraction:
+            entry = self._versions.get(canary)
+            if entry is not None:
+                return entry
+        return self.primary()
+
+    def describe(self) -> dict:
+        with self._lock:
+            return {
+                "primary": self._primary,
+                "canary": self._canary,
+                "canary_fraction": self._canary_fraction,
+                "shadow": self._shadow,
+                "versions": [entry.describe() for entry in self._versions.values()],
+            }
@@ -1,5 +1,15 @@
 from pydantic import BaseModel
 from datetime import datetime
+from typing import List
+import numpy as np
+import pandas as pd
+
+# Canonical feature order (same as used during training)
+FEATURE_NAMES = [
+    "Time", "V1", "V2", "V3", "V4", "V5", "V6", "V7", "V8", "V9",
+    "V10", "V11", "V12", "V13", "V14", "V15", "V16", "V17", "V18", "V19",
+    "V20", "V21", "V22", "V23", "V24", "V25", "V26", "V27", "V28", "Amount"
+]
 
 # Define the InputData schema
 class InputData(BaseModel):
@@ -39,3 +49,90 @@ class PredictionResponse(BaseModel):
     prediction: int
     probability: float
     prediction_timestamp: datetime
+    request_id: str
+
+# Define the batch request / response schemas
+class BatchInputData(BaseModel):
+    transactions: List[InputData]
+
+class BatchPredictionResponse(BaseModel):
+    predictions: List[PredictionResponse]
+
+# Define the model administration request schemas
+class LoadModelRequest(BaseModel):
+    path: str
+    promote: bool = False
+
+class CanaryRequest(BaseModel):
+    fraction: float
+
+class ShadowRequest(BaseModel):
+    enabled: bool = True
+
+########################################################### FAST VALIDATION ###########################################################################################
+# One validation pass straight to a contiguous float64 vector in FEATURE_NAMES order.
+# Plain JSON numbers take the fast path; anything else (numeric strings, booleans, missing or
+# malformed fields) goes through InputData so the accepted values and error messages stay identical.
+
+_NUMBER_TYPES = (float, int)
+
+def parse_feature_vector(payload) -> np.ndarray:
+    """Validate one parsed JSON object and return its (n_features,) float64 feature vector."""
+    if type(payload) is dict:
+        try:
+            values = [payload[name] for name in FEATURE_NAMES]
+            if all(type(value) in _NUMBER_TYPES for value in values):
+                return np.array(values, dtype=np.float64)
+        except (KeyError, OverflowError):
+            pass
+
+    # Slow path: raises pydantic.ValidationError with the usual error details
+    return to_feature_vector(InputData.model_validate(payload))
+
+def parse_feature_matrix(payload) -> np.ndarray:
+    """Validate one parsed BatchInputData JSON object and return its (n_rows, n_features) float64 matrix."""
+    rows = payload.get("transactions") if type(payload) is dict else None
+    if type(rows) is list:
+        try:
+            values = [[row[name] for name in FEATURE_NAMES] for row in rows]
+            if all(type(value) in _NUMBER_TYPES for row in values for value in row):
+                return np.array(values, dtype=np.float64).reshape(len(rows), len(FEATURE_NAMES))
+        except (KeyError, TypeError, OverflowError):
+            pass
+
+    validated = BatchInputData.model_validate(payload)
+    return np.array([to_feature_vector(row) for row in validated.transactions], dtype=np.float64).reshape(-1, len(FEATURE_NAMES))
+
+def to_feature_vector(data: InputData) -> np.ndarray:
+    """Feature vector of an already validated InputData instance."""
+    return np.array([getattr(data, name) for name in FEATURE_NAMES], dtype=np.float64)
+
+def validate_feature_frame(data) -> tuple:
+    """
+    Column-wise validation of a DataFrame (or a 2-D array in FEATURE_NAMES order).
+    Returns (features, valid): a (n_rows, n_features) float64 matrix and a boolean mask of the rows
+    whose every feature converts to a float, like InputData would. Invalid rows hold NaN.
+    Raises ValueError if a feature column is missing.
+    """
+    if not isinstance(data, pd.DataFrame):
+        array = np.asarray(data)
+        if array.ndim != 2 or array.shape[1] != len(FEATURE_NAMES):
+            raise ValueError(f"Expected an array of shape (n, {len(FEATURE_NAMES)}), got {array.shape}")
+        data = pd.DataFrame(array, columns=FEATURE_NAMES)
+
+    missing = [name for name in FEATURE_NAMES if name not in data.columns]
+    if missing:
+        raise ValueError(f"Missing feature columns: {missing}")
+
+    features = np.empty((len(data), len(FEATURE_NAMES)), dtype=np.float64)
+    valid = np.ones(len(data), dtype=bool)
+    for j, name in enumerate(FEATURE_NAMES):
+        column = data[name]
+        if pd.api.types.is_numeric_dtype(column) or pd.api.types.is_bool_dtype(column):
+            features[:, j] = column.to_numpy(dtype=np.float64)
+        else:
+            converted = pd.to_numeric(column, errors="coerce")
+            valid &= ~(converted.isna() & column.notna()).to_numpy()
+            features[:, j] = converted.to_numpy(dtype=np.float64)
+    features[~valid] = np.nan
+    return features, valid
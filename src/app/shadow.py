@@ -0,0 +1,123 @@
+import queue
+import threading
+import time
+
+import numpy as np
+
+from app.metrics import Counter, Histogram
+from app.prediction_store import LOG_COLUMNS, CsvPredictionSink
+
+# Shadow scoring: the primary model answers the request, then the scored rows are offered to a bounded
+# queue that background threads drain to score the shadow (candidate) model in batches. Both outputs are
+# logged side by side. Offering never blocks; when the queue is full the rows are shed and counted.
+
+SHADOW_COLUMNS = LOG_COLUMNS + ["shadow_version", "shadow_prediction", "shadow_probability"]
+
+SHADOW_ROWS_ENQUEUED = Counter("shadow_rows_enqueued_total", "Rows queued for shadow scoring")
+SHADOW_ROWS_SCORED = Counter("shadow_rows_scored_total", "Rows scored and logged by the shadow model")
+SHADOW_ROWS_SHED = Counter("shadow_rows_shed_total", "Rows not shadow-scored because the queue was full or scoring failed")
+SHADOW_ROWS_DISCARDED = Counter("shadow_rows_discarded_total", "Queued rows discarded because no shadow version was set")
+SHADOW_ENQUEUE_LATENCY = Histogram(
+    "shadow_enqueue_latency_seconds", "Time the request path spends handing rows to the shadow queue",
+    buckets=(0.000001, 0.0000025, 0.000005, 0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.001)
+)
+
+_STOP = object()  # Sentinel telling a worker thread to exit
+
+class ShadowScorer:
+    """
+    Scores the registry's shadow version on rows already answered by the primary.
+
+    `n_workers` threads take up to `batch_size` queued rows at a time, score them with one call to the
+    shadow version and write (request row, primary output, shadow output) to `sink` (tuples in
+    SHADOW_COLUMNS order). Rows queued while no shadow version is set are discarded (and counted).
+    """
+
+    def __init__(self, registry, sink, max_queue_size: int = 1000, batch_size: int = 256, n_workers: int = 1):
+        # A plain path writes a CSV file with the shadow columns
+        self.sink = CsvPredictionSink(sink, columns=SHADOW_COLUMNS) if isinstance(sink, str) else sink
+        self.registry = registry
+        self.batch_size = batch_size
+        self.n_workers = n_workers
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._threads = []
+
+    def start(self):
+        """Start the worker threads."""
+        self._threads = [
+            threading.Thread(target=self._run, name=f"shadow-scorer-{i}", daemon=True)
+            for i in range(self.n_workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def close(self):
+        """Score what is queued, then stop the worker threads."""
+        for _ in self._threads:
+            self._queue.put(_STOP)
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+    def queue_depth(self) -> int:
+        return self._queue.qsize()
+
+    def offer(self, features: np.ndarray, labels: np.ndarray, probabilities: np.ndarray, timestamp: str, request_ids: list,
+              duplicates: list = None) -> bool:
+        """Queue scored rows for shadow scoring without waiting. Returns False (and sheds them) if the queue is full."""
+        started = time.perf_counter()
+        duplicates = [0] * len(features) if duplicates is None else duplicates
+        try:
+            self._queue.put_nowait((features, labels, probabilities, timestamp, request_ids, duplicates))
+            accepted = True
+        except queue.Full:
+            accepted = False
+        SHADOW_ENQUEUE_LATENCY.observe(time.perf_counter() - started)
+        (SHADOW_ROWS_ENQUEUED if accepted else SHADOW_ROWS_SHED).inc(len(features))
+        return accepted
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                return
+            items, n_rows = [item], len(item[0])
+            # Take whatever else is already queued, up to one batch
+            while n_rows < self.batch_size:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    self._score(items)
+                    return
+                items.append(item)
+                n_rows += len(item[0])
+            self._score(items)
+
+    def _score(self, items: list):
+        entry = self.registry.shadow()
+        n_rows = sum(len(item[0]) for item in items)
+        if entry is None:
+            SHADOW_ROWS_DISCARDED.inc(n_rows)
+            return
+        try:
+            features = np.vstack([item[0] for item in items])
+            shadow_labels, shadow_probabilities = entry.score(features)
+
+            rows = []
+            for features, labels, probabilities, timestamp, request_ids, duplicates in items:
+                for row, label, probability, request_id, duplicate in zip(features.tolist(), labels.tolist(), probabilities.tolist(),
+                                                                          request_ids, duplicates):
+                    rows.append((timestamp, *row, label, probability, request_id, int(duplicate)))
+            rows = [
+                (*row, entry.version, shadow_label, shadow_probability)
+                for row, shadow_label, shadow_probability in zip(rows, shadow_labels.tolist(), shadow_probabilities.tolist())
+            ]
+            self.sink.write(rows)
+        except Exception as e:
+            # Never let a shadow failure kill the worker thread
+            SHADOW_ROWS_SHED.inc(n_rows)
+            print(f"Failed to shadow-score {n_rows} rows: {e}")
+            return
+        SHADOW_ROWS_SCORED.inc(n_rows)
@@ -0,0 +1,140 @@
+import json
+import os
+import numpy as np
+
+# Array-backed inference for fitted scikit-learn tree ensembles. All trees are flattened into one set of
+# node tables and a whole batch is routed through every tree with vectorized NumPy indexing, one tree
+# level per step, instead of going through the estimator's per-tree Python dispatch.
+
+class CompiledForest:
+    """
+    Flat node tables for a forest of decision trees:
+
+    feature[i], threshold[i]   split of node i (leaves have feature 0)
+    left[i], right[i]          global index of the children; a leaf points to itself
+    value[i]                   normalized class distribution of node i
+    roots[t]                   global index of the root of tree t
+
+    predict_proba() matches RandomForestClassifier.predict_proba: inputs are cast to float32 like
+    scikit-learn does, a sample goes left when x <= threshold, and the per-tree leaf distributions
+    are averaged.
+    """
+
+    TABLES = ("feature", "threshold", "left", "right", "value", "roots", "classes_", "is_leaf")
+    FORMAT_VERSION = 1
+
+    def __init__(self, feature, threshold, left, right, value, roots, classes, max_depth: int, n_features_in: int, is_leaf=None):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.roots = roots
+        self.classes_ = classes
+        self.max_depth = max_depth
+        self.n_features_in_ = n_features_in
+        self.is_leaf = left == np.arange(len(left)) if is_leaf is None else is_leaf
+
+    @classmethod
+    def from_sklearn(cls, model):
+        """Compile a fitted RandomForestClassifier / ExtraTreesClassifier / DecisionTreeClassifier."""
+        if hasattr(model, "tree_"):
+            trees = [model.tree_]
+        elif hasattr(model, "estimators_") and all(hasattr(estimator, "tree_") for estimator in model.estimators_):
+            trees = [estimator.tree_ for estimator in model.estimators_]
+        else:
+            raise ValueError(f"Cannot compile model of type {type(model).__name__}: expected a fitted tree or forest of trees")
+        if not hasattr(model, "classes_") or trees[0].n_outputs != 1:
+            raise ValueError("Only single-output tree classifiers can be compiled")
+
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        offset = 0
+        for tree in trees:
+            n_nodes = tree.node_count
+            node_ids = np.arange(n_nodes, dtype=np.int64)
+            is_leaf = tree.children_left == -1
+
+            features.append(np.where(is_leaf, 0, tree.feature).astype(np.int64))
+            thresholds.append(np.where(is_leaf, 0.0, tree.threshold).astype(np.float64))
+            lefts.append(np.where(is_leaf, node_ids, tree.children_left) + offset)
+            rights.append(np.where(is_leaf, node_ids, tree.children_right) + offset)
+
+            # Older scikit-learn versions store class counts, newer ones fractions: normalize both
+            node_values = tree.value[:, 0, :].astype(np.float64)
+            totals = node_values.sum(axis=1, keepdims=True)
+            values.append(np.divide(node_values, totals, out=np.zeros_like(node_values), where=totals > 0))
+
+            roots.append(offset)
+            offset += n_nodes
+
+        return cls(
+            feature=np.concatenate(features),
+            threshold=np.concatenate(thresholds),
+            left=np.concatenate(lefts),
+            right=np.concatenate(rights),
+            value=np.concatenate(values),
+            roots=np.asarray(roots, dtype=np.int64),
+            classes=np.asarray(model.classes_),
+            max_depth=max(tree.max_depth for tree in trees),
+            n_features_in=model.n_features_in_
+        )
+
+    def save(self, directory: str):
+        """
+        Write the node tables as one .npy file each plus a meta.json, so they can be memory-mapped by load().
+        `directory` must not exist yet; it is written under a temporary name and renamed into place.
+        """
+        tmp_directory = f"{directory}.tmp-{os.getpid()}"
+        os.makedirs(tmp_directory)
+        for name in self.TABLES:
+            np.save(os.path.join(tmp_directory, f"{name}.npy"), getattr(self, name), allow_pickle=False)
+        with open(os.path.join(tmp_directory, "meta.json"), "w") as f:
+            json.dump({"version": self.FORMAT_VERSION, "max_depth": int(self.max_depth), "n_features_in": int(self.n_features_in_)}, f)
+        os.rename(tmp_directory, directory)
+
+    @classmethod
+    def load(cls, directory: str, mmap_mode: str = "r"):
+        """
+        Load tables written by save(). With mmap_mode="r" the arrays are read-only views of the files, so
+        every process that loads the same directory shares one copy of the pages through the OS page cache.
+        """
+        with open(os.path.join(directory, "meta.json")) as f:
+            meta = json.load(f)
+        if meta["version"] != cls.FORMAT_VERSION:
+            raise ValueError(f"Unsupported compiled forest version in {directory}")
+        tables = {
+            name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode=mmap_mode, allow_pickle=False).view(np.ndarray)
+            for name in cls.TABLES
+        }
+        return cls(
+            feature=tables["feature"], threshold=tables["threshold"], left=tables["left"], right=tables["right"],
+            value=tables["value"], roots=tables["roots"], classes=tables["classes_"], is_leaf=tables["is_leaf"],
+            max_depth=meta["max_depth"], n_features_in=meta["n_features_in"]
+        )
+
+    def apply(self, X: np.ndarray) -> np.ndarray:
+        """Global leaf index reached by every sample in every tree, shape (n_samples, n_trees)."""
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        if X.ndim != 2 or X.shape[1] != self.n_features_in_:
+            raise ValueError(f"Expected input of shape (n, {self.n_features_in_}), got {X.shape}")
+
+        n_samples, n_trees = X.shape[0], len(self.roots)
+        flat_X = X.ravel()
+        # One (sample, tree) pair per slot; only pairs that have not reached a leaf are advanced
+        nodes = np.tile(self.roots, n_samples)
+        row_offsets = np.repeat(np.arange(n_samples, dtype=np.int64) * X.shape[1], n_trees)
+        active = np.flatnonzero(~self.is_leaf[nodes])
+        while active.size:
+            current = nodes[active]
+            go_left = flat_X[row_offsets[active] + self.feature[current]] <= self.threshold[current]
+            current = np.where(go_left, self.left[current], self.right[current])
+            nodes[active] = current
+            active = active[~self.is_leaf[current]]
+        return nodes.reshape(n_samples, n_trees)
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        """Class probabilities averaged over the trees, shape (n_samples, n_classes)."""
+        return self.value[self.apply(X)].mean(axis=1)
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        return self.classes_[self.predict_proba(X).argmax(axis=1)]
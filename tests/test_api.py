@@ -66,3 +66,144 @@ async def test_predict_invalid_missing_field():
 
     print(response.json())
     assert response.status_code == 422
+
+@pytest.fixture
+def loaded_app(monkeypatch, tmp_path):
+    """Load the model into the app and redirect the prediction log to a temporary file."""
+    from src.app import main
+    from src.app.model import load_model
+    from src.app.registry import ModelRegistry
+    registry = ModelRegistry()
+    registry.register("test", load_model("models/rfc_model.pkl"))
+    registry.promote("test")
+    monkeypatch.setattr(main, "registry", registry)
+    monkeypatch.setattr(main, "LOG_FILE_PATH", str(tmp_path / "predictions.csv"))
+    return tmp_path / "predictions.csv"
+
+@pytest.mark.asyncio
+async def test_predict_batch_valid(loaded_app):
+    """
+    Test the /predict_batch endpoint with several valid transactions.
+    This test checks that one prediction is returned and logged per transaction.
+    """
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        response = await ac.post("/predict_batch", json={"transactions": [valid_payload] * 3})
+
+    assert response.status_code == 200
+    predictions = response.json()["predictions"]
+    assert len(predictions) == 3
+    assert all(isinstance(p["prediction"], int) for p in predictions)
+    assert len(loaded_app.read_text().splitlines()) == 4  # header + 3 rows
+
+@pytest.mark.asyncio
+async def test_predict_batch_invalid_row(loaded_app):
+    """
+    Test the /predict_batch endpoint when one transaction is missing a field.
+    This test checks if the /predict_batch endpoint returns a 422 status code.
+    """
+    bad_payload = valid_payload.copy()
+    del bad_payload['V10']
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        response = await ac.post("/predict_batch", json={"transactions": [valid_payload, bad_payload]})
+
+    assert response.status_code == 422
+
+@pytest.mark.asyncio
+async def test_model_admin_endpoints(loaded_app, monkeypatch):
+    """
+    Test loading a new model version through /models, promoting it and unloading the old one.
+    """
+    import asyncio
+    from src.app import main
+    monkeypatch.setattr(main, "MODEL_REGISTRY_DIR", "models")
+    monkeypatch.setattr(main, "ADMIN_TOKEN", "secret")
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test", headers={"X-Admin-Token": "secret"}) as ac:
+        assert (await ac.put("/models/v2", json={"path": "../setup.py"})).status_code == 400
+        response = await ac.put("/models/v2", json={"path": "rfc_model.pkl"})
+        assert response.status_code == 202
+        for _ in range(300):
+            versions = {v["version"]: v for v in (await ac.get("/models")).json()["versions"]}
+            if versions["v2"]["status"] != "loading":
+                break
+            await asyncio.sleep(0.05)
+        assert versions["v2"]["status"] == "ready"
+
+        assert (await ac.post("/models/v2/promote")).json()["primary"] == "v2"
+        assert (await ac.post("/predict_batch", json={"transactions": [valid_payload]})).status_code == 200
+        assert (await ac.delete("/models/v2")).status_code == 409
+        assert (await ac.delete("/models/test")).status_code == 200
+        assert (await ac.post("/models/unknown/promote")).status_code == 404
+
+@pytest.mark.asyncio
+async def test_model_admin_endpoints_require_the_admin_token(loaded_app, monkeypatch):
+    """
+    Test that the model admin endpoints are disabled without ADMIN_TOKEN and reject requests without it.
+    """
+    from src.app import main
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        monkeypatch.setattr(main, "ADMIN_TOKEN", "")
+        assert (await ac.post("/models/test/promote", headers={"X-Admin-Token": ""})).status_code == 403
+        monkeypatch.setattr(main, "ADMIN_TOKEN", "secret")
+        assert (await ac.delete("/models/test")).status_code == 401
+        assert (await ac.post("/models/test/canary", json={"fraction": 0.5}, headers={"X-Admin-Token": "wrong"})).status_code == 401
+        assert (await ac.get("/models")).status_code == 200
+        assert (await ac.get("/models")).json()["primary"] == "test"
+
+@pytest.mark.asyncio
+async def test_drift_endpoints(monkeypatch, tmp_path):
+    """
+    Test querying stored drift results by column and time range and fetching a run's HTML report.
+    """
+    from src.app import main
+    from app.drift_store import DriftStore
+
+    store = DriftStore(str(tmp_path / "drift.db"))
+    report_path = tmp_path / "report.html"
+    report_path.write_text("<html>report</html>")
+    run_id = store.append_run("data_drift", {
+        "V1": {"drift_score": 0.01, "stattest": "K-S p_value", "drift_detected": True, "threshold": 0.05},
+        "V2": {"drift_score": 0.04, "stattest": "Wasserstein distance (normed)", "drift_detected": False, "threshold": 0.1},
+    }, window_start="2025-05-10T10:00:00", window_end="2025-05-10T11:00:00", report_path=str(report_path))
+    parallel_run_id = store.append_run("data_drift", {}, params={"engine": "parallel"})
+    monkeypatch.setattr(main, "drift_store", store)
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        drifted = (await ac.get("/drift", params={"drifted_only": True})).json()["results"]
+        future = (await ac.get("/drift", params={"start": "2999-01-01"})).json()["results"]
+        runs = (await ac.get("/drift/runs", params={"job": "data_drift"})).json()["runs"]
+        report = await ac.get(f"/drift/runs/{run_id}/report")
+        missing = await ac.get("/drift/runs/unknown")
+        parallel_report = await ac.get(f"/drift/runs/{parallel_run_id}/report")
+
+    assert [(result["column_name"], result["p_value"], result["statistic"]) for result in drifted] == [("V1", 0.01, None)]
+    assert drifted[0]["window_end"] == "2025-05-10T11:00:00"
+    assert future == []
+    assert runs[1]["run_id"] == run_id and runs[1]["n_drifted_columns"] == 1
+    assert report.status_code == 200 and "report" in report.text
+    assert missing.status_code == 404
+    assert parallel_report.status_code == 409
+
+@pytest.mark.asyncio
+async def test_repeated_transaction_is_answered_from_the_cache(loaded_app, monkeypatch):
+    """
+    Test that a replayed transaction gets the cached result and is logged as a duplicate.
+    """
+    import pandas as pd
+    from src.app import main
+    from app.cache import PredictionCache
+    monkeypatch.setattr(main, "prediction_cache", PredictionCache(max_size=100))
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        first = (await ac.post("/predict", json=valid_payload)).json()
+        second = (await ac.post("/predict", json=valid_payload)).json()
+        batch = (await ac.post("/predict_batch", json={"transactions": [valid_payload, {**valid_payload, "Amount": 1.0}]})).json()
+
+    assert second["prediction"] == first["prediction"] and second["probability"] == first["probability"]
+    assert batch["predictions"][0]["probability"] == first["probability"]
+    assert pd.read_csv(loaded_app)["duplicate"].tolist() == [0, 1, 1, 0]
@@ -0,0 +1,43 @@
+import json
+import time
+from monitoring.auto_monitoring import DriftJob, DriftScheduler
+
+def quick_job(calls):
+    calls.append(time.monotonic())
+
+def slow_job(duration):
+    time.sleep(duration)
+
+def failing_job():
+    raise RuntimeError("report failed")
+
+def test_scheduler_runs_jobs_and_records_stats(tmp_path):
+    """Every tick runs the fast job; the slow one is skipped while it is still running; failures are counted."""
+    calls = []
+    jobs = [
+        DriftJob("quick", quick_job, {"calls": calls}),
+        DriftJob("slow", slow_job, {"duration": 0.25}),
+        DriftJob("broken", failing_job, {}),
+    ]
+    status_path = tmp_path / "status.json"
+    scheduler = DriftScheduler(jobs, interval=0.1, status_path=str(status_path))
+    scheduler.run(cycles=4)
+
+    stats = scheduler.status()
+    assert stats["quick"]["runs"] == 4
+    assert stats["slow"]["runs"] + stats["slow"]["skipped"] == 4
+    assert stats["slow"]["skipped"] >= 1
+    assert stats["slow"]["last_runtime_seconds"] >= 0.25
+    assert stats["broken"]["failures"] == 4
+    assert "report failed" in stats["broken"]["last_error"]
+    assert json.loads(status_path.read_text())["jobs"]["quick"]["runs"] == 4
+
+def test_scheduler_keeps_a_fixed_cadence():
+    """Ticks are spaced by the interval regardless of how long the tick itself took."""
+    calls = []
+    scheduler = DriftScheduler([DriftJob("quick", quick_job, {"calls": calls})], interval=0.1)
+    scheduler.run(cycles=5)
+
+    gaps = [later - earlier for earlier, later in zip(calls, calls[1:])]
+    assert len(calls) == 5
+    assert all(0.07 < gap < 0.15 for gap in gaps)
@@ -0,0 +1,52 @@
+import asyncio
+import numpy as np
+import pytest
+from app.batching import MicroBatcher, BATCH_SIZE_HISTOGRAM
+
+class RecordingModel:
+    """Fake scoring function that records the size of every batch it receives."""
+    def __init__(self):
+        self.batch_sizes = []
+
+    def __call__(self, features):
+        self.batch_sizes.append(len(features))
+        # label = 1 when the first feature is positive, probability = the first feature
+        return (features[:, 0] > 0).astype(int), features[:, 0]
+
+@pytest.mark.asyncio
+async def test_concurrent_requests_are_batched():
+    """Rows submitted concurrently are scored in fewer model calls and routed back to their callers."""
+    model = RecordingModel()
+    batcher = MicroBatcher(model, max_batch_size=8, max_wait_ms=50)
+    await batcher.start()
+    observed_before = BATCH_SIZE_HISTOGRAM.count
+
+    rows = [np.full(30, value) for value in np.linspace(-1, 1, 20)]
+    results = await asyncio.gather(*(batcher.submit(row) for row in rows))
+    await batcher.stop()
+
+    assert [probability for _, probability in results] == pytest.approx([row[0] for row in rows])
+    assert sum(model.batch_sizes) == 20
+    assert max(model.batch_sizes) <= 8
+    assert len(model.batch_sizes) < 20
+    assert BATCH_SIZE_HISTOGRAM.count - observed_before == len(model.batch_sizes)
+
+@pytest.mark.asyncio
+async def test_scoring_errors_reach_every_caller():
+    """An exception raised by the model is propagated to each request in the batch."""
+    def failing_model(features):
+        raise RuntimeError("model exploded")
+
+    batcher = MicroBatcher(failing_model, max_batch_size=4, max_wait_ms=10)
+    await batcher.start()
+    results = await asyncio.gather(*(batcher.submit(np.zeros(30)) for _ in range(3)), return_exceptions=True)
+    await batcher.stop()
+
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+@pytest.mark.asyncio
+async def test_submit_requires_running_batcher():
+    """Submitting to a batcher that was never started fails fast."""
+    batcher = MicroBatcher(RecordingModel())
+    with pytest.raises(RuntimeError):
+        await batcher.submit(np.zeros(30))
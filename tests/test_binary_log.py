@@ -0,0 +1,52 @@
+import os
+
+import numpy as np
+import pytest
+from app.binary_log import BinaryPredictionSink, RECORD_DTYPE, HEADER_SIZE, open_segment, segment_paths, window
+from app.prediction_store import read_predictions, LOG_COLUMNS
+
+def make_rows(n_rows, first_second=0):
+    return [
+        (f"2025-05-10T10:00:{first_second + i:02d}.000001", *([float(i)] * 30), i % 2, 0.5 + i / 100, f"{i + 1:032x}", int(i == 2))
+        for i in range(n_rows)
+    ]
+
+def test_rows_round_trip(tmp_path):
+    BinaryPredictionSink(str(tmp_path)).write(make_rows(4))
+
+    [segment] = segment_paths(str(tmp_path))
+    assert os.path.getsize(segment) == HEADER_SIZE + 4 * RECORD_DTYPE.itemsize
+    data = read_predictions(str(tmp_path))
+    assert list(data.columns) == LOG_COLUMNS
+    assert data["Amount"].tolist() == [0.0, 1.0, 2.0, 3.0]
+    assert data["request_id"].tolist() == [f"{i + 1:032x}" for i in range(4)]
+    assert data["duplicate"].tolist() == [False, False, True, False]
+    assert str(data["prediction_timestamp"].iloc[1]) == "2025-05-10 10:00:01.000001"
+    assert data["probability"].to_numpy() == pytest.approx([0.5, 0.51, 0.52, 0.53])
+
+def test_segments_are_memory_mapped_and_windows_are_views(tmp_path):
+    BinaryPredictionSink(str(tmp_path)).write(make_rows(10))
+    [segment] = segment_paths(str(tmp_path))
+    # A record still being appended is not visible yet
+    with open(segment, "ab") as f:
+        f.write(b"\x01" * 10)
+
+    records = open_segment(segment)
+    selected = window(records, start="2025-05-10T10:00:03", end="2025-05-10T10:00:06")
+
+    assert isinstance(records, np.memmap) and len(records) == 10
+    assert np.shares_memory(selected, records)
+    assert selected["V1"].tolist() == [3.0, 4.0, 5.0]
+
+def test_segments_roll_over_and_reject_other_layouts(tmp_path):
+    sink = BinaryPredictionSink(str(tmp_path), segment_bytes=HEADER_SIZE + 3 * RECORD_DTYPE.itemsize)
+    for first in range(0, 6, 2):
+        sink.write(make_rows(2, first))
+
+    assert len(segment_paths(str(tmp_path))) == 3
+    assert len(read_predictions(str(tmp_path), drop_duplicates=False)) == 6
+
+    bad = tmp_path / "segment-0-bad.plog"
+    bad.write_bytes(b"NOTALOG!" + bytes(HEADER_SIZE))
+    with pytest.raises(ValueError):
+        open_segment(str(bad))
@@ -0,0 +1,48 @@
+import numpy as np
+from app.cache import PredictionCache, feature_key, CACHE_HITS, CACHE_EVICTIONS
+from app.registry import ModelRegistry
+
+def test_key_depends_on_values_and_model():
+    row = np.arange(30, dtype=np.float64)
+    negative_zero = row.copy()
+    negative_zero[0] = -0.0
+
+    assert feature_key(row, "a") == feature_key(row.astype(np.float32), "a")
+    assert feature_key(row, "a") == feature_key(negative_zero, "a")
+    assert feature_key(row, "a") != feature_key(row, "b")
+    assert feature_key(row, "a") != feature_key(row + 1e-9, "a")
+
+def test_least_recently_used_entry_is_evicted():
+    cache = PredictionCache(max_size=2)
+    evictions = CACHE_EVICTIONS["size"].value
+    cache.put(b"a", 0, 0.9)
+    cache.put(b"b", 1, 0.8)
+    assert cache.get(b"a") == (0, 0.9)  # "a" is now the most recently used
+    cache.put(b"c", 0, 0.7)
+
+    assert cache.get(b"b") is None
+    assert cache.get(b"a") == (0, 0.9) and cache.get(b"c") == (0, 0.7)
+    assert CACHE_EVICTIONS["size"].value == evictions + 1
+
+def test_expired_entries_miss(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("app.cache.time.monotonic", lambda: now[0])
+    cache = PredictionCache(max_size=10, ttl_seconds=60)
+    cache.put(b"a", 1, 0.6)
+    hits = CACHE_HITS.value
+
+    assert cache.get(b"a") == (1, 0.6)
+    now[0] += 61
+    assert cache.get(b"a") is None
+    assert CACHE_HITS.value == hits + 1
+    assert len(cache) == 0
+
+def test_promotion_clears_the_cache():
+    registry = ModelRegistry()
+    cache = PredictionCache(max_size=10)
+    registry.add_listener(cache.clear)
+    registry.register("v1", object())
+    cache.put(b"a", 1, 0.6)
+
+    registry.promote("v1")
+    assert len(cache) == 0
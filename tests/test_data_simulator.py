@@ -58,3 +58,103 @@ def test_simulator_success(mock_health, mock_api, dummy_csv):
 
     assert mock_api.called
     assert mock_health.called
+
+@pytest.mark.asyncio
+async def test_send_async_open_loop(dummy_csv):
+    from fastapi import FastAPI
+    from httpx import ASGITransport
+    from simulate_incoming_data import iter_rows, send_async
+
+    received = []
+    app = FastAPI()
+
+    @app.post("/predict")
+    async def predict(row: dict):
+        received.append(row)
+        return {"prediction": 0}
+
+    rows = list(iter_rows(str(dummy_csv))) * 20
+    result = await send_async(iter(rows), "http://test/predict", concurrency=4, rps=500, arrival="poisson",
+                              seed=0, transport=ASGITransport(app=app))
+
+    assert result["requests"] == 20
+    assert result["errors"] == 0
+    assert result["statuses"] == {200: 20}
+    assert len(result["latencies"]) == 20
+    assert received[0]["Amount"] == 50.0
+
+def test_read_feature_chunks_bounded_and_validated(dummy_csv, tmp_path):
+    from simulate_incoming_data import read_feature_chunks
+
+    data = pd.concat([pd.read_csv(dummy_csv)] * 5, ignore_index=True)
+    data["Amount"] = data["Amount"].astype(object)
+    data.loc[3, "Amount"] = "fifty"
+    data["Class"] = 0
+    csv_path = tmp_path / "chunked.csv"
+    data.to_csv(csv_path, index=False)
+
+    chunks = list(read_feature_chunks(str(csv_path), chunk_size=2))
+    assert [len(features) for _, features in chunks] == [2, 1, 1]
+    assert [rows.tolist() for rows, _ in chunks] == [[0, 1], [2], [4]]
+    assert chunks[0][1].dtype == "float64" and chunks[0][1].shape[1] == 30
+
+    with pytest.raises(ValueError):
+        read_feature_chunks(_drop_column(dummy_csv, tmp_path))
+
+def _drop_column(csv_path, tmp_path):
+    path = tmp_path / "missing_columns.csv"
+    pd.read_csv(csv_path).drop(columns=["V3"]).to_csv(path, index=False)
+    return str(path)
+
+@patch("simulate_incoming_data.api_request")
+@patch("simulate_incoming_data.check_api_health", return_value=True)
+def test_simulator_parallel(mock_health, mock_api, dummy_csv, tmp_path):
+    mock_api.return_value = {"prediction": 0, "probability": 0.01}
+    csv_path = tmp_path / "many.csv"
+    pd.concat([pd.read_csv(dummy_csv)] * 25).to_csv(csv_path, index=False)
+
+    simulate_data_stream(
+        input_file=str(csv_path),
+        endpoint="http://testserver/predict",
+        delay=0,
+        execution_mode="parallel",
+        chunk_size=7
+    )
+
+    assert mock_api.call_count == 25
+
+@patch("simulate_incoming_data.api_request")
+@patch("simulate_incoming_data.check_api_health", return_value=True)
+def test_simulator_reports_a_bad_header(mock_health, mock_api, dummy_csv, tmp_path, caplog):
+    """A file without every feature column is logged as unreadable instead of crashing the simulator."""
+    simulate_data_stream(
+        input_file=_drop_column(dummy_csv, tmp_path),
+        endpoint="http://testserver/predict",
+        delay=0,
+        execution_mode="sequential"
+    )
+
+    assert not mock_api.called
+    assert "Error reading CSV file" in caplog.text
+
+@pytest.mark.parametrize("execution_mode", ["sequential", "parallel"])
+@patch("simulate_incoming_data.api_request")
+@patch("simulate_incoming_data.check_api_health", return_value=True)
+def test_simulator_reports_a_bad_row_past_the_first_chunk(mock_health, mock_api, execution_mode, dummy_csv, tmp_path, caplog):
+    """A row that cannot be parsed in a later chunk is logged and ends the stream, as a bad file did before."""
+    mock_api.return_value = {"prediction": 0, "probability": 0.01}
+    csv_path = tmp_path / "bad_row.csv"
+    pd.concat([pd.read_csv(dummy_csv)] * 25).to_csv(csv_path, index=False)
+    with open(csv_path, "a") as f:
+        f.write('"1.0,' + ",".join(["1.0"] * 30) + "\n")  # unterminated quote
+
+    simulate_data_stream(
+        input_file=str(csv_path),
+        endpoint="http://testserver/predict",
+        delay=0,
+        execution_mode=execution_mode,
+        chunk_size=7
+    )
+
+    assert 7 <= mock_api.call_count <= 25
+    assert "Error reading CSV file" in caplog.text
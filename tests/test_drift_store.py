@@ -0,0 +1,76 @@
+import sqlite3
+
+import numpy as np
+import pandas as pd
+import pytest
+from app.drift_store import DriftStore
+from monitoring.generate_prediction_drift_report import generate_prediction_drift_report
+from monitoring.render_report import render_run_report
+
+SCORES = {
+    "prediction": {"drift_score": 0.2, "stattest": "Z-test p_value", "drift_detected": False, "threshold": 0.05},
+    "probability": {"drift_score": 0.3, "stattest": "Wasserstein distance (normed)", "drift_detected": True, "threshold": 0.1},
+}
+
+def test_runs_are_appended_and_queried(tmp_path):
+    store = DriftStore(str(tmp_path / "drift.db"))
+    first = store.append_run("prediction_drift", SCORES, reference_rows=10, current_rows=20, params={"start": None})
+    second = store.append_run("data_drift", SCORES)
+
+    assert [run["run_id"] for run in store.runs()] == [second, first]
+    assert [run["run_id"] for run in store.runs(job="prediction_drift")] == [first]
+    run = store.run(first)
+    assert run["current_rows"] == 20 and run["params"] == {"start": None}
+    assert [result["column_name"] for result in run["results"]] == ["prediction", "probability"]
+    assert len(store.results(column="probability", drifted_only=True)) == 2
+    assert store.results(end="2000-01-01") == []
+
+def test_store_is_append_only(tmp_path):
+    path = tmp_path / "drift.db"
+    DriftStore(str(path)).append_run("data_drift", SCORES)
+
+    connection = sqlite3.connect(path)
+    with pytest.raises(sqlite3.IntegrityError):
+        connection.execute("DELETE FROM drift_results")
+    with pytest.raises(sqlite3.IntegrityError):
+        connection.execute("UPDATE drift_runs SET job = 'other'")
+    connection.close()
+
+def test_missing_store_reads_as_empty(tmp_path):
+    store = DriftStore(str(tmp_path / "missing.db"))
+    assert store.runs() == [] and store.run("x") is None
+    assert not (tmp_path / "missing.db").exists()
+
+def test_report_is_rendered_only_on_request(tmp_path):
+    """A job without an output path stores its results; the HTML is built from them later and cached."""
+    rng = np.random.default_rng(0)
+    log = tmp_path / "predictions.csv"
+    pd.DataFrame({"prediction": rng.integers(0, 2, 300), "probability": rng.uniform(0.5, 1, 300)}).to_csv(log, index=False)
+    store_path = str(tmp_path / "drift.db")
+
+    generate_prediction_drift_report(str(log), str(log), None, scores_dir=None, drift_store_path=store_path)
+    run = DriftStore(store_path).runs()[0]
+    assert run["report_path"] is None
+
+    path = render_run_report(run["run_id"], store_path=store_path, output_dir=str(tmp_path / "runs"))
+    assert path.endswith(f"{run['run_id']}.html")
+    assert "<html" in open(path).read(1000).lower()
+    assert len(DriftStore(store_path).runs()) == 1
+    with pytest.raises(KeyError):
+        render_run_report("unknown", store_path=store_path, output_dir=str(tmp_path / "runs"))
+
+def test_rendering_uses_the_stored_window(tmp_path):
+    """An open window is stored with its end, and runs of other engines are not rendered with Evidently."""
+    rng = np.random.default_rng(0)
+    log = tmp_path / "predictions.csv"
+    pd.DataFrame({"prediction_timestamp": pd.date_range("2025-05-10", periods=300, freq="s").strftime("%Y-%m-%dT%H:%M:%S"),
+                  "prediction": rng.integers(0, 2, 300), "probability": rng.uniform(0.5, 1, 300)}).to_csv(log, index=False)
+    store_path = str(tmp_path / "drift.db")
+
+    generate_prediction_drift_report(str(log), str(log), None, scores_dir=None, drift_store_path=store_path)
+    run = DriftStore(store_path).runs()[0]
+    assert run["params"]["end"] is not None and run["window_end"] == run["params"]["end"]
+
+    parallel_run = DriftStore(store_path).append_run("data_drift", SCORES, params={"engine": "parallel"})
+    with pytest.raises(ValueError):
+        render_run_report(parallel_run, store_path=store_path, output_dir=str(tmp_path / "runs"))
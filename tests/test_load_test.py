@@ -0,0 +1,42 @@
+import argparse
+import pytest
+from array import array
+from fastapi import FastAPI
+from httpx import ASGITransport
+from benchmarks.load_test import summarize, run_scenarios
+
+def test_summarize_percentiles():
+    result = {"requests": 1000, "errors": 10, "statuses": {200: 990, 500: 10}, "elapsed_seconds": 2.0,
+              "throughput_rps": 500.0, "latencies": array("d", [i / 1000 for i in range(1, 1001)])}
+    summary = summarize(result, rows_per_request=10)
+
+    assert summary["error_rate"] == 0.01
+    assert summary["rows_per_second"] == 5000.0
+    assert summary["statuses"] == {"200": 990, "500": 10}
+    assert summary["latency_ms"]["p50"] == pytest.approx(500.5)
+    assert summary["latency_ms"]["p999"] == pytest.approx(999.0, abs=0.01)
+    assert summary["latency_ms"]["max"] == pytest.approx(1000.0)
+
+@pytest.mark.asyncio
+async def test_run_scenarios():
+    app = FastAPI()
+
+    @app.post("/predict")
+    async def predict(row: dict):
+        return {"prediction": 0}
+
+    @app.post("/predict_batch")
+    async def predict_batch(batch: dict):
+        return {"predictions": [{"prediction": 0}] * len(batch["transactions"])}
+
+    args = argparse.Namespace(scenarios=["single", "batch", "burst", "ramp"], requests=20, concurrency=4,
+                              max_concurrency=8, batch_size=5, burst_rps=200, burst_seconds=0.1,
+                              ramp_rps=[100, 200], ramp_step_seconds=0.1)
+    results = await run_scenarios("http://test", [{"Amount": 1.0}], args, transport=ASGITransport(app=app))
+
+    assert results["single"]["requests"] == 20
+    assert results["batch"]["requests"] == 4
+    assert results["batch"]["rows_per_second"] == pytest.approx(results["batch"]["throughput_rps"] * 5)
+    assert results["burst"]["requests"] == 20
+    assert [step["requests"] for step in results["ramp"]["steps"]] == [10, 20]
+    assert all(scenario.get("errors", 0) == 0 for scenario in results.values())
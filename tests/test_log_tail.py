@@ -0,0 +1,80 @@
+import numpy as np
+import pandas as pd
+from monitoring.log_tail import LogTailer
+from monitoring.streaming_drift import StreamingDriftEngine, follow_log
+
+HEADER = "prediction_timestamp,V1,prediction\n"
+
+def rows(start, n_rows):
+    return "".join(f"2025-05-10T10:00:{second:02d},{second * 0.5},{second % 2}\n" for second in range(start, start + n_rows))
+
+def read_rows(tailer):
+    frames = list(tailer.read())
+    return pd.concat(frames)["V1"].tolist() if frames else []
+
+def test_only_appended_rows_are_read_after_a_commit(tmp_path):
+    log = tmp_path / "predictions.csv"
+    log.write_text(HEADER + rows(0, 3) + "2025-05-10T10:00:03,1.")  # the last row is still being written
+    checkpoint = str(tmp_path / "tail.json")
+
+    tailer = LogTailer(str(log), checkpoint)
+    assert read_rows(tailer) == [0.0, 0.5, 1.0]
+    # Nothing is durable before commit(), so a new reader starts over
+    assert read_rows(LogTailer(str(log), checkpoint)) == [0.0, 0.5, 1.0]
+    tailer.commit({"seen": 3})
+
+    with open(log, "a") as f:
+        f.write("5,1\n" + rows(4, 1))
+    tailer = LogTailer(str(log), checkpoint, chunk_bytes=8)
+    assert tailer.state == {"seen": 3}
+    assert read_rows(tailer) == [1.5, 2.0]
+
+def test_rotation_finishes_the_old_file_then_reads_the_new_one(tmp_path):
+    log = tmp_path / "predictions.csv"
+    log.write_text(HEADER + rows(0, 2))
+    tailer = LogTailer(str(log), str(tmp_path / "tail.json"))
+    read_rows(tailer)
+    tailer.commit()
+
+    with open(log, "a") as f:
+        f.write(rows(2, 1))
+    log.rename(tmp_path / "predictions.csv.1")
+    log.write_text(HEADER + rows(10, 2))
+
+    tailer = LogTailer(str(log), str(tmp_path / "tail.json"))
+    assert read_rows(tailer) == [1.0, 5.0, 5.5]
+    tailer.commit()
+    assert tailer.stats["rotations"] == 1
+    assert read_rows(LogTailer(str(log), str(tmp_path / "tail.json"))) == []
+
+def test_truncation_restarts_from_the_top(tmp_path):
+    log = tmp_path / "predictions.csv"
+    log.write_text(HEADER + rows(0, 5))
+    tailer = LogTailer(str(log), str(tmp_path / "tail.json"))
+    read_rows(tailer)
+    tailer.commit()
+
+    with open(log, "r+") as f:
+        f.truncate(0)
+    log.write_text(HEADER + rows(20, 1))
+    tailer = LogTailer(str(log), str(tmp_path / "tail.json"))
+    assert read_rows(tailer) == [10.0]
+    assert tailer.stats["truncations"] == 1
+
+def test_followed_log_gives_the_same_scores_as_one_pass(tmp_path):
+    rng = np.random.default_rng(0)
+    pd.DataFrame({"V1": rng.normal(size=2000), "prediction": rng.integers(0, 2, 2000)}).to_csv(tmp_path / "reference.csv", index=False)
+    log = tmp_path / "predictions.csv"
+    log.write_text(HEADER + rows(0, 30))
+    args = dict(reference_path=str(tmp_path / "reference.csv"), current_path=str(log),
+                checkpoint_path=str(tmp_path / "tail.json"), scores_dir=None)
+
+    follow_log(**args)
+    with open(log, "a") as f:
+        f.write(rows(30, 20))
+    followed = follow_log(**args)
+
+    engine = StreamingDriftEngine.from_reference(pd.read_csv(tmp_path / "reference.csv"))
+    engine.update_frame(pd.read_csv(log))
+    assert followed == engine.scores()
+    assert followed["V1"]["count"] == 50
@@ -0,0 +1,44 @@
+import numpy as np
+import pandas as pd
+import pytest
+from app.logging_utils import PredictionLogWriter, LOG_COLUMNS, LOG_ROWS_DROPPED, log_predictions
+
+def make_row(i):
+    return ("2025-05-10T10:22:45", *([float(i)] * 30), 0, 0.99, f"request-{i}")
+
+def test_writer_flushes_everything_on_close(tmp_path):
+    """Rows queued before close() are written in bulk with a single header."""
+    log_file = tmp_path / "logs" / "predictions.csv"
+    writer = PredictionLogWriter(str(log_file), flush_rows=1000, flush_interval=60)
+    writer.start()
+    for i in range(5):
+        assert writer.submit([make_row(i), make_row(i)])
+    writer.close()
+
+    logged = pd.read_csv(log_file)
+    assert list(logged.columns) == LOG_COLUMNS
+    assert len(logged) == 10
+    assert logged["Amount"].tolist() == [float(i) for i in range(5) for _ in range(2)]
+
+def test_writer_drops_rows_when_queue_is_full(tmp_path):
+    """A full queue rejects rows without blocking and counts them as dropped."""
+    writer = PredictionLogWriter(str(tmp_path / "predictions.csv"), max_queue_size=1)
+    dropped_before = LOG_ROWS_DROPPED.value
+
+    assert writer.try_submit([make_row(0)])
+    assert not writer.try_submit([make_row(1)])
+    assert not writer.submit([make_row(1), make_row(2)], timeout=0.01)
+
+    assert LOG_ROWS_DROPPED.value - dropped_before == 2
+
+def test_log_predictions_refuses_a_different_header(tmp_path):
+    """Batches are not appended under the header of an older log layout."""
+    log_file = tmp_path / "predictions.csv"
+    log_file.write_text("prediction_timestamp,Time,prediction,probability\n")
+    with pytest.raises(ValueError):
+        log_predictions(np.zeros((1, 30)), [0], [0.99], ["2025-05-10T10:22:45"], str(log_file), request_ids=["a"])
+
+    log_file.unlink()
+    log_predictions(np.zeros((2, 30)), [0, 1], [0.99, 0.6], ["2025-05-10T10:22:45"] * 2, str(log_file), request_ids=["a", "b"])
+    log_predictions(np.zeros((1, 30)), [0], [0.99], ["2025-05-10T10:22:46"], str(log_file), request_ids=["c"])
+    assert list(pd.read_csv(log_file).columns) == LOG_COLUMNS
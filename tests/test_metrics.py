@@ -0,0 +1,59 @@
+import pytest
+from httpx import AsyncClient, ASGITransport
+from app.metrics import Counter, Histogram, render_latest
+from app.drift_scores import DriftScoreCollector, save_drift_scores, scores_from_report_dict
+from src.app.main import app
+
+def test_histogram_renders_cumulative_buckets():
+    """Buckets are cumulative and end with +Inf, followed by _sum and _count."""
+    histogram = Histogram("test_latency_seconds", "Test histogram", buckets=(0.1, 1.0), register=False)
+    for value in (0.05, 0.5, 5.0):
+        histogram.observe(value)
+
+    text = render_latest([histogram])
+
+    assert '# TYPE test_latency_seconds histogram' in text
+    assert 'test_latency_seconds_bucket{le="0.1"} 1' in text
+    assert 'test_latency_seconds_bucket{le="1.0"} 2' in text
+    assert 'test_latency_seconds_bucket{le="+Inf"} 3' in text
+    assert 'test_latency_seconds_count 3' in text
+
+def test_label_variants_are_grouped_under_one_family():
+    """HELP/TYPE are emitted once per metric name even for several label sets."""
+    metrics = [
+        Counter("test_requests_total", "Test counter", labels={"path": "/a"}, register=False),
+        Histogram("test_other", "Other", buckets=(1,), register=False),
+        Counter("test_requests_total", "Test counter", labels={"path": "/b"}, register=False),
+    ]
+    lines = render_latest(metrics).splitlines()
+
+    assert lines.count("# TYPE test_requests_total counter") == 1
+    assert lines.index('test_requests_total{path="/b"} 0') == lines.index('test_requests_total{path="/a"} 0') + 1
+
+def test_drift_scores_are_exported_from_saved_files(tmp_path):
+    """Scores extracted from an Evidently report dict are published and re-read as gauges."""
+    report_dict = {"metrics": [
+        {"result": {"drift_by_columns": {"V1": {"drift_score": 0.3, "stattest_name": "K-S p_value", "drift_detected": False}}}},
+        {"result": {"column_name": "prediction", "drift_score": 0.01, "stattest_name": "Z-test p_value", "drift_detected": True}},
+    ]}
+    save_drift_scores("data_drift", scores_from_report_dict(report_dict), str(tmp_path))
+
+    collector = DriftScoreCollector("drift_detected", "Drift flag", "drift_detected", str(tmp_path))
+    samples = {labels["column"]: value for _, labels, value in collector.samples()}
+
+    assert samples == {"V1": 0.0, "prediction": 1.0}
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint_counts_requests():
+    """Requests are counted per route and exposed on /metrics in the Prometheus text format."""
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        await ac.get("/health")
+        await ac.get("/does-not-exist")
+        response = await ac.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert 'http_requests_total{path="/health",status="200"}' in response.text
+    assert 'http_requests_total{path="other",status="404"}' in response.text
+    assert "prediction_stage_latency_seconds_bucket" in response.text
@@ -1,4 +1,5 @@
 import pytest
+import numpy as np
 import pandas as pd
 from src.app.model import load_model, get_prediction
 
@@ -61,3 +62,18 @@ def test_get_prediction_success(model, input_data):
     # Assert the types of the returned values
     assert isinstance(pred_label, int)
     assert isinstance(pred_proba, float)
+
+def test_predict_batch_matches_row_by_row(model, input_data):
+    """Test that batch scoring returns one label/probability per row, matching single-row scoring."""
+    from src.app.model import predict_batch
+    features = np.repeat(input_data.to_numpy(dtype=np.float64), 4, axis=0)
+    features[:, -1] = [1.0, 50.0, 500.0, 5000.0]
+
+    labels, probabilities = predict_batch(model, features)
+
+    assert labels.shape == (4,)
+    assert probabilities.shape == (4,)
+    for i in range(4):
+        single_labels, single_probabilities = predict_batch(model, features[i:i + 1])
+        assert labels[i] == single_labels[0]
+        assert probabilities[i] == pytest.approx(single_probabilities[0])
@@ -0,0 +1,63 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+from evidently.report import Report
+from evidently.metric_preset import DataDriftPreset
+from app.drift_scores import scores_from_report_dict
+from monitoring.numpy_drift import column_drift, drift_scores
+from monitoring.generate_prediction_drift_report import generate_prediction_drift_report
+
+def make_frame(n_rows, shift, seed):
+    rng = np.random.default_rng(seed)
+    frame = pd.DataFrame({
+        "prediction": (rng.random(n_rows) < 0.02 + shift).astype(int),
+        "classes": rng.integers(0, 4, n_rows),
+        "amount": rng.lognormal(3 + shift, 1, n_rows),
+        "rounded": np.round(rng.normal(shift, 1, n_rows), 1),
+    })
+    frame.loc[::9, "amount"] = np.nan
+    return frame
+
+@pytest.mark.parametrize("n_rows", [400, 4000])
+def test_scores_match_evidently(n_rows):
+    """Small and large references pick different tests (z/chi-square/KS vs Jensen-Shannon/Wasserstein)."""
+    reference, current = make_frame(n_rows, 0.0, 0), make_frame(n_rows // 2, 0.05, 1)
+    report = Report(metrics=[DataDriftPreset()])
+    report.run(reference_data=reference, current_data=current)
+    expected = scores_from_report_dict(report.as_dict())
+
+    scores = drift_scores(reference, current)
+
+    assert set(scores) == set(expected)
+    for column, score in scores.items():
+        assert score["stattest"] == expected[column]["stattest"]
+        assert score["drift_detected"] == expected[column]["drift_detected"]
+        assert score["drift_score"] == pytest.approx(expected[column]["drift_score"], rel=1e-9)
+
+def test_explicit_tests():
+    rng = np.random.default_rng(2)
+    reference, current = rng.normal(size=3000), rng.normal(0.5, 1, 2000)
+
+    assert column_drift(reference, current, stat_test="psi")["drift_detected"]
+    assert column_drift(reference, current, stat_test="ks")["drift_score"] < 1e-10
+    assert not column_drift(reference, reference, stat_test="jensenshannon")["drift_detected"]
+    with pytest.raises(ValueError):
+        column_drift(np.array([np.nan]), current)
+
+def test_prediction_report_backends_publish_the_same_scores(tmp_path):
+    log = tmp_path / "predictions.csv"
+    make_frame(2000, 0.0, 3)[["prediction"]].assign(probability=0.5).to_csv(log, index=False)
+    current = tmp_path / "current.csv"
+    make_frame(1500, 0.05, 4)[["prediction"]].assign(probability=0.6).to_csv(current, index=False)
+
+    published = {}
+    for backend in ("evidently", "numpy"):
+        scores_dir = tmp_path / backend
+        generate_prediction_drift_report(str(log), str(current), None, scores_dir=str(scores_dir),
+                                         drift_store_path=None, backend=backend)
+        published[backend] = json.loads((scores_dir / "prediction_drift.json").read_text())["scores"]
+
+    assert list(published["numpy"]) == ["prediction"]
+    assert published["numpy"]["prediction"]["drift_score"] == pytest.approx(published["evidently"]["prediction"]["drift_score"])
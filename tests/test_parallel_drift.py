@@ -0,0 +1,71 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import stats
+from monitoring.drift_stats import ecdf_distances
+from monitoring.numpy_drift import drift_scores
+from monitoring.parallel_drift import parallel_drift, generate_parallel_drift_summary
+
+def make_columns(n_rows=3000, seed=0):
+    rng = np.random.default_rng(seed)
+    reference = rng.normal(size=(n_rows, 4))
+    current = rng.normal(size=(n_rows, 4))
+    current[:, 1] += 0.5
+    return reference, current
+
+def test_ecdf_distances_match_scipy():
+    rng = np.random.default_rng(1)
+    reference, current = np.round(rng.normal(size=2000), 1), np.round(rng.normal(0.1, size=1500), 1)
+    ks_statistic, wasserstein = ecdf_distances(reference, current)
+
+    assert ks_statistic == pytest.approx(stats.ks_2samp(reference, current).statistic)
+    assert wasserstein == pytest.approx(stats.wasserstein_distance(reference, current))
+
+def test_worker_pool_matches_serial_scoring():
+    """Columns scored from shared memory in worker processes give the same results as in-process scoring."""
+    reference, current = make_columns()
+    columns = ["a", "b", "c", "d"]
+
+    serial = parallel_drift(reference, current, columns, n_workers=1)
+    pooled = parallel_drift(reference, current, columns, n_workers=2)
+
+    assert pooled == serial
+    assert [column for column, result in pooled["columns"].items() if result["drift_detected"]] == ["b"]
+    assert pooled["columns"]["a"]["stattest"] == "Wasserstein distance (normed)"
+    assert not pooled["dataset_drift"]
+
+def test_small_reference_uses_the_ks_test():
+    reference, current = make_columns(n_rows=500)
+    summary = parallel_drift(reference, current, ["a", "b", "c", "d"], n_workers=1)
+
+    assert summary["columns"]["b"]["stattest"] == "K-S p_value"
+    assert summary["columns"]["b"]["drift_score"] == pytest.approx(stats.ks_2samp(reference[:, 1], current[:, 1]).pvalue)
+
+def test_pool_scores_like_the_numpy_backend():
+    """The pool scores columns with numpy_drift.column_drift, so both engines store the same results."""
+    reference, current = make_columns(n_rows=2000)
+    reference[:, 3], current[:, 3] = np.arange(2000) % 2, np.arange(2000) % 3 == 0
+    columns = ["a", "b", "c", "d"]
+    summary = parallel_drift(reference, current, columns, n_workers=2, categorical=["d"])
+
+    expected = drift_scores(pd.DataFrame(reference, columns=columns), pd.DataFrame(current, columns=columns), categorical=["d"])
+    assert summary["columns"] == expected
+    assert summary["columns"]["d"]["stattest"] == "Jensen-Shannon distance"
+
+def test_summary_is_written_and_published(tmp_path):
+    reference, current = make_columns()
+    pd.DataFrame(reference, columns=["V1", "V2", "V3", "V4"]).to_csv(tmp_path / "reference.csv", index=False)
+    pd.DataFrame(current, columns=["V1", "V2", "V3", "V4"]).to_csv(tmp_path / "current.csv", index=False)
+
+    generate_parallel_drift_summary(str(tmp_path / "reference.csv"), str(tmp_path / "current.csv"),
+                                    str(tmp_path / "summary.json"), columns=["V1", "V2", "V3", "V4"], n_workers=2,
+                                    scores_dir=str(tmp_path / "scores"), drift_store_path=str(tmp_path / "drift.db"))
+
+    with open(tmp_path / "summary.json") as f:
+        summary = json.load(f)
+    with open(tmp_path / "scores" / "data_drift.json") as f:
+        scores = json.load(f)["scores"]
+    assert summary["n_drifted_columns"] == 1
+    assert scores["V2"]["drift_detected"] is True
@@ -0,0 +1,120 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.metrics import roc_auc_score, precision_score, recall_score
+from monitoring.performance_tracker import PerformanceTracker, update_from_files, join_key
+
+def make_predictions(n, seed=0):
+    rng = np.random.default_rng(seed)
+    actual = (rng.random(n) < 0.2).astype(int)
+    fraud_score = np.clip(rng.normal(0.3 + 0.4 * actual, 0.2), 0, 1)
+    predicted = (fraud_score >= 0.5).astype(int)
+    predictions = pd.DataFrame({
+        "prediction_timestamp": pd.Timestamp("2025-05-10T10:00:00") + pd.to_timedelta(np.arange(n) * 60, unit="s"),
+        "Amount": rng.uniform(1, 100, n),
+        "prediction": predicted,
+        "probability": np.where(predicted == 1, fraud_score, 1 - fraud_score),
+        "request_id": [f"r{i}" for i in range(n)],
+    })
+    return predictions, actual, fraud_score
+
+def test_metrics_match_full_join_regardless_of_arrival_order():
+    predictions, actual, fraud_score = make_predictions(600)
+    labels = pd.DataFrame({"request_id": predictions["request_id"], "Class": actual})
+
+    tracker = PerformanceTracker(window_seconds=3600, n_score_bins=1000)
+    tracker.add_labels(labels.iloc[:100])  # some labels arrive before their predictions
+    tracker.add_predictions(predictions)
+    tracker.add_labels(labels.iloc[100:].sample(frac=1, random_state=0))
+
+    assert not tracker.pending and not tracker.orphan_labels
+    assert len(tracker.windows) == 10
+    metrics = tracker.rolling(last_windows=10)
+    predicted = predictions["prediction"].to_numpy()
+    assert metrics["labelled"] == 600
+    assert metrics["precision"] == pytest.approx(precision_score(actual, predicted))
+    assert metrics["recall"] == pytest.approx(recall_score(actual, predicted))
+    assert metrics["auc"] == pytest.approx(roc_auc_score(actual, fraud_score), abs=0.005)
+    fraud = actual == 1
+    amounts = predictions["Amount"].to_numpy()
+    assert metrics["fraud_capture_rate"] == pytest.approx(amounts[fraud & (predicted == 1)].sum() / amounts[fraud].sum())
+
+def test_state_round_trip(tmp_path):
+    predictions, actual, _ = make_predictions(50)
+    tracker = PerformanceTracker()
+    tracker.add_predictions(predictions)
+    tracker.add_labels(pd.DataFrame({"request_id": predictions["request_id"][:30], "Class": actual[:30]}))
+    tracker.save(str(tmp_path / "state.npz"), extra={"labels_offset": 12})
+
+    restored, extra = PerformanceTracker.load(str(tmp_path / "state.npz"))
+    assert extra == {"labels_offset": 12}
+    assert restored.summary() == tracker.summary()
+    restored.add_labels(pd.DataFrame({"request_id": predictions["request_id"][30:], "Class": actual[30:]}))
+    assert restored.rolling(10)["labelled"] == 50
+
+def test_incremental_files_by_row_position(tmp_path):
+    predictions, actual, _ = make_predictions(20)
+    predictions_path, labels_path = tmp_path / "predictions.csv", tmp_path / "labels.csv"
+    predictions.drop(columns=["request_id"]).to_csv(predictions_path, index=False)
+    pd.DataFrame({"Class": actual[:5]}).to_csv(labels_path, index=False)
+    with open(labels_path, "a") as f:
+        f.write(str(actual[5]))  # a line still being written
+
+    tracker = PerformanceTracker(key="row")
+    offsets = update_from_files(tracker, str(predictions_path), str(labels_path), {})
+    assert tracker.rolling(10)["labelled"] == 5
+
+    with open(labels_path, "a") as f:
+        f.write("\n" + "\n".join(str(label) for label in actual[6:]) + "\n")
+    update_from_files(tracker, str(predictions_path), str(labels_path), offsets)
+    assert tracker.rolling(10)["labelled"] == 20
+    assert not tracker.pending
+
+def test_incremental_files_follow_rotation(tmp_path):
+    """A rotated prediction log is finished and the new one read from its start, without rows read twice."""
+    predictions, actual, _ = make_predictions(30)
+    predictions_path, labels_path = tmp_path / "predictions.csv", tmp_path / "labels.csv"
+    predictions.iloc[:10].to_csv(predictions_path, index=False)
+    pd.DataFrame({"request_id": predictions["request_id"], "Class": actual}).to_csv(labels_path, index=False)
+
+    tracker = PerformanceTracker()
+    offsets = update_from_files(tracker, str(predictions_path), str(labels_path), {})
+    assert tracker.rolling(10)["labelled"] == 10
+
+    predictions.iloc[10:20].to_csv(predictions_path, mode="a", header=False, index=False)
+    predictions_path.rename(tmp_path / "predictions.csv.1")
+    predictions.iloc[20:].to_csv(predictions_path, index=False)
+    offsets = update_from_files(tracker, str(predictions_path), str(labels_path), offsets)
+    offsets = update_from_files(tracker, str(predictions_path), str(labels_path), offsets)
+
+    assert tracker.rolling(10)["labelled"] == 30
+    assert not tracker.pending and not tracker.orphan_labels
+    assert offsets["labels"]["state"] == {"rows": 30}
+
+def test_rows_without_a_key_are_not_joined():
+    """Empty request ids (e.g. rows logged before request ids existed) never match each other."""
+    predictions, actual, _ = make_predictions(10)
+    predictions["request_id"] = [None] * 5 + predictions["request_id"].tolist()[5:]
+    tracker = PerformanceTracker()
+    tracker.add_predictions(predictions)
+    tracker.add_labels(pd.DataFrame({"request_id": [None, "", *predictions["request_id"][5:]], "Class": [1, 0, *actual[5:]]}))
+
+    assert tracker.rolling(10)["labelled"] == 5
+    assert not tracker.pending and not tracker.orphan_labels
+    assert tracker.dropped["missing_key"] == 7
+
+def test_waiting_entries_are_bounded(tmp_path):
+    predictions, _, _ = make_predictions(100)  # one per minute
+    tracker = PerformanceTracker(window_seconds=600, pending_ttl_seconds=1800, max_pending=20)
+    tracker.add_predictions(predictions)
+    tracker.add_labels(pd.DataFrame({"request_id": [f"x{i}" for i in range(30)], "Class": 0}))
+
+    assert min(entry[0] for entry in tracker.pending.values()) >= tracker.latest_window - 1800
+    assert len(tracker.pending) <= 20 and len(tracker.orphan_labels) == 20
+    assert list(tracker.orphan_labels)[0] == "x10"
+    tracker.save(str(tmp_path / "state.npz"))
+    restored, _ = PerformanceTracker.load(str(tmp_path / "state.npz"))
+    assert restored.dropped == tracker.dropped and restored.max_pending == 20
+
+def test_default_key_matches_the_bundled_labels():
+    assert join_key("data/predictions.csv", "data/incoming_labels.csv") == "row"
@@ -0,0 +1,92 @@
+import pytest
+from app.prediction_store import (CsvPredictionSink, ParquetPredictionSink, create_sink, read_predictions, iter_predictions,
+                                  LOG_COLUMNS)
+from app.binary_log import BinaryPredictionSink
+
+pytest.importorskip("pyarrow")
+
+def make_rows():
+    """Three predictions spread over two hours; the last one was answered from the prediction cache."""
+    return [
+        ("2025-05-10T10:15:00.000001", *([1.0] * 30), 0, 0.99, "a" * 32, 0),
+        ("2025-05-10T10:45:00.000002", *([2.0] * 30), 1, 0.75, "b" * 32, 0),
+        ("2025-05-10T11:05:00.000003", *([3.0] * 30), 0, 0.90, "c" * 32, 1),
+    ]
+
+def write_store(tmp_path, sink_kind) -> str:
+    """Write make_rows() with the given sink and return the path to read it back from."""
+    if sink_kind == "csv":
+        path = str(tmp_path / "predictions.csv")
+        CsvPredictionSink(path).write(make_rows())
+        return path
+    sink = ParquetPredictionSink(str(tmp_path)) if sink_kind == "parquet" else BinaryPredictionSink(str(tmp_path))
+    sink.write(make_rows())
+    return str(tmp_path)
+
+def test_parquet_sink_partitions_by_hour(tmp_path):
+    """Each hour gets its own partition directory with float32 features."""
+    ParquetPredictionSink(str(tmp_path)).write(make_rows())
+
+    assert sorted(p.name for p in (tmp_path / "date=2025-05-10").iterdir()) == ["hour=10", "hour=11"]
+    data = read_predictions(str(tmp_path))
+    assert list(data.columns) == LOG_COLUMNS
+    assert len(data) == 3
+    assert str(data["V1"].dtype) == "float32"
+
+@pytest.mark.parametrize("sink_kind", ["csv", "parquet", "binary"])
+def test_read_predictions_projects_columns_and_window(tmp_path, sink_kind):
+    """Both stores return only the requested columns and the [start, end) window."""
+    path = write_store(tmp_path, sink_kind)
+
+    data = read_predictions(path, columns=["Amount", "prediction"], start="2025-05-10T10:30:00", end="2025-05-10T11:00:00")
+
+    assert list(data.columns) == ["Amount", "prediction"]
+    assert data["Amount"].tolist() == [2.0]
+    assert data["prediction"].tolist() == [1]
+
+@pytest.mark.parametrize("sink_kind", ["csv", "parquet", "binary"])
+def test_iter_predictions_matches_read_predictions(tmp_path, sink_kind):
+    """Chunked reads select the same rows as a full read."""
+    path = write_store(tmp_path, sink_kind)
+
+    chunks = list(iter_predictions(path, columns=["Amount"], start="2025-05-10T10:30:00", chunk_size=1))
+
+    assert all(len(chunk) == 1 for chunk in chunks)
+    assert [chunk["Amount"].item() for chunk in chunks] == [2.0, 3.0]
+
+@pytest.mark.parametrize("sink_kind", ["csv", "parquet", "binary"])
+def test_duplicates_can_be_left_out(tmp_path, sink_kind):
+    """Rows answered from the prediction cache are skipped when asked, without reading the flag column back."""
+    path = write_store(tmp_path, sink_kind)
+
+    data = read_predictions(path, columns=["Amount"], drop_duplicates=True)
+    chunks = list(iter_predictions(path, columns=["Amount"], drop_duplicates=True))
+
+    assert list(data.columns) == ["Amount"]
+    assert data["Amount"].tolist() == [1.0, 2.0]
+    assert [value for chunk in chunks for value in chunk["Amount"].tolist()] == [1.0, 2.0]
+
+def test_csv_sink_refuses_a_different_header(tmp_path):
+    """Appending to a log written with another column layout fails instead of misaligning rows."""
+    path = tmp_path / "predictions.csv"
+    path.write_text("prediction_timestamp,Time,prediction,probability\n")
+    # The error names the command that moves the old log aside
+    with pytest.raises(ValueError, match="mv .*predictions.legacy.csv"):
+        CsvPredictionSink(str(path))
+
+def test_create_sink_moves_a_legacy_log_aside(tmp_path, capsys):
+    """A log with an older column layout is renamed to *.legacy.csv and a new log is started in its place."""
+    path = tmp_path / "predictions.csv"
+    path.write_text("prediction_timestamp,Time,prediction,probability\n2025-05-10T10:00:00,0.0,0,0.9\n")
+    (tmp_path / "predictions.legacy.csv").write_text("older\n")
+
+    sink = create_sink("csv", str(path))
+    assert "predictions.legacy-1.csv" in capsys.readouterr().out
+    assert (tmp_path / "predictions.legacy-1.csv").read_text().startswith("prediction_timestamp,Time,prediction")
+    sink.write(make_rows())
+    assert list(read_predictions(str(path)).columns) == LOG_COLUMNS
+
+    # A log that already has the current columns stays where it is
+    create_sink("csv", str(path))
+    assert len(read_predictions(str(path))) == 3
+    assert not (tmp_path / "predictions.legacy-2.csv").exists()
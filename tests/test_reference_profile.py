@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+import pytest
+from monitoring.reference_profile import load_reference_profile, build_reference_profile
+from monitoring.streaming_drift import StreamingDriftEngine
+
+@pytest.fixture
+def reference_csv(tmp_path):
+    rng = np.random.default_rng(0)
+    path = tmp_path / "reference.csv"
+    pd.DataFrame({"V1": rng.normal(size=1000), "Amount": rng.exponential(50, size=1000)}).to_csv(path, index=False)
+    return path
+
+def test_profile_is_built_once_and_reused(reference_csv, tmp_path):
+    """The second call loads the cached artifact instead of rebuilding it."""
+    cache_dir = tmp_path / "cache"
+    first = load_reference_profile(str(reference_csv), str(cache_dir), sample_size=100)
+    artifacts = sorted(p.name for p in cache_dir.glob("reference-*.npz"))
+    second = load_reference_profile(str(reference_csv), str(cache_dir), sample_size=100)
+
+    assert len(artifacts) == 1
+    assert sorted(p.name for p in cache_dir.glob("reference-*.npz")) == artifacts
+    assert second.digest == first.digest
+    assert second.n_rows == 1000
+    assert len(second.sample_frame()) == 100
+    np.testing.assert_array_equal(second.counts, first.counts)
+    assert second.mean == pytest.approx(first.mean)
+
+def test_changed_reference_gets_a_new_profile(reference_csv, tmp_path):
+    """Editing the reference file changes its content hash and invalidates the cached profile."""
+    cache_dir = tmp_path / "cache"
+    first = load_reference_profile(str(reference_csv), str(cache_dir))
+    pd.DataFrame({"V1": [0.0, 1.0], "Amount": [1.0, 2.0]}).to_csv(reference_csv, index=False)
+    second = load_reference_profile(str(reference_csv), str(cache_dir))
+
+    assert second.digest != first.digest
+    assert second.n_rows == 2
+    assert len(list(cache_dir.glob("reference-*.npz"))) == 2
+
+def test_store_directories_can_be_profiled(tmp_path):
+    """A binary store directory is hashed from its segment list; a new segment invalidates the profile."""
+    from app.binary_log import BinaryPredictionSink
+    sink = BinaryPredictionSink(str(tmp_path / "store"), segment_bytes=1)
+    rows = [(f"2025-05-10T10:00:0{i}", *([float(i)] * 30), 0, 0.5, f"{i + 1:032x}", 0) for i in range(3)]
+    sink.write(rows[:2])
+    cache_dir = str(tmp_path / "cache")
+
+    first = load_reference_profile(str(tmp_path / "store"), cache_dir, columns=["V1", "Amount"])
+    sink.write(rows[2:])
+    second = load_reference_profile(str(tmp_path / "store"), cache_dir, columns=["V1", "Amount"])
+
+    assert first.n_rows == 2 and second.n_rows == 3
+    assert second.digest != first.digest
+
+def test_profile_feeds_the_streaming_engine(reference_csv):
+    """An engine built from the profile matches one built from the raw reference."""
+    profile = build_reference_profile(str(reference_csv))
+    from_profile = StreamingDriftEngine.from_profile(profile)
+    from_reference = StreamingDriftEngine.from_reference(pd.read_csv(reference_csv))
+
+    assert from_profile.columns == from_reference.columns == ["V1", "Amount"]
+    np.testing.assert_array_equal(from_profile.reference_counts, from_reference.reference_counts)
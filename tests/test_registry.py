@@ -0,0 +1,57 @@
+import time
+import numpy as np
+import pytest
+from app.registry import ModelRegistry
+
+MODEL_PATH = "models/rfc_model.pkl"
+
+def wait_until_ready(registry, version, timeout=30):
+    deadline = time.monotonic() + timeout
+    while registry.get(version).status == "loading":
+        assert time.monotonic() < deadline, "model did not finish loading"
+        time.sleep(0.05)
+    return registry.get(version)
+
+def test_background_load_promote_and_unload():
+    registry = ModelRegistry(backend="compiled", warmup_rows=16)
+    registry.load("v1", MODEL_PATH)
+    registry.promote("v1")
+    previous = registry.primary()
+
+    entry = registry.load_in_background("v2", MODEL_PATH, promote=True)
+    assert entry.status == "loading"
+    assert registry.primary() is previous  # still answering while v2 loads
+    assert wait_until_ready(registry, "v2").status == "ready"
+    assert registry.primary().version == "v2"
+    assert entry.warmup_seconds is not None
+
+    labels, probabilities = registry.primary().score(np.zeros((3, 30)))
+    assert len(labels) == len(probabilities) == 3
+
+    with pytest.raises(ValueError):
+        registry.unload("v2")  # the primary cannot be unloaded
+    registry.unload("v1")
+    assert [v["version"] for v in registry.describe()["versions"]] == ["v2"]
+
+def test_failed_load_is_reported():
+    registry = ModelRegistry()
+    wait_until_ready(registry, registry.load_in_background("broken", "models/missing.pkl").version)
+    assert registry.get("broken").status == "failed"
+    with pytest.raises(ValueError):
+        registry.promote("broken")
+    with pytest.raises(KeyError):
+        registry.promote("unknown")
+
+def test_canary_routing():
+    registry = ModelRegistry(seed=0)
+    registry.register("v1", object())
+    registry.register("v2", object())
+    registry.promote("v1")
+    registry.set_canary("v2", 0.25)
+
+    routed = [registry.route().version for _ in range(4000)]
+    assert routed.count("v2") / len(routed) == pytest.approx(0.25, abs=0.03)
+
+    registry.promote("v2")  # promoting the canary ends the canary
+    assert registry.describe()["canary"] is None
+    assert {registry.route().version for _ in range(100)} == {"v2"}
@@ -0,0 +1,98 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+from monitoring.drift_stats import ks_statistic
+from monitoring.sampling import ReservoirSampler, draw_sample, dkw_epsilon, sampling_bounds, bounds_path
+from monitoring.generate_prediction_drift_report import generate_prediction_drift_report
+
+@pytest.fixture
+def prediction_log(tmp_path):
+    """10,000 logged predictions, 0.5% of them fraud."""
+    rng = np.random.default_rng(0)
+    n_rows = 10000
+    path = tmp_path / "predictions.csv"
+    pd.DataFrame({
+        "prediction_timestamp": pd.date_range("2025-05-10", periods=n_rows, freq="s").strftime("%Y-%m-%dT%H:%M:%S"),
+        "Amount": rng.exponential(50, size=n_rows),
+        "prediction": (np.arange(n_rows) % 200 == 0).astype(int),
+        "probability": rng.uniform(0.5, 1.0, size=n_rows),
+    }).to_csv(path, index=False)
+    return path
+
+def test_reservoir_sample_is_uniform_across_chunks():
+    """Rows from early and late chunks are kept at the same rate."""
+    sampler = ReservoirSampler(1000, n_columns=1, seed=0)
+    for start in range(0, 100000, 7000):
+        sampler.add(np.arange(start, min(start + 7000, 100000), dtype=np.float64)[:, None])
+
+    sample = sampler.sample()[:, 0]
+    assert sampler.n_seen == 100000
+    assert len(np.unique(sample)) == 1000
+    assert abs(np.mean(sample < 50000) - 0.5) < 0.06
+
+def test_stratified_sample_keeps_the_rare_class(prediction_log):
+    """Stratified sampling keeps the fraud share of the window exactly and only reads the window once."""
+    sample, n_rows = draw_sample(str(prediction_log), ["Amount", "prediction"], 400, stratify=True, chunk_size=1000)
+
+    assert n_rows == 10000
+    assert len(sample) == 400
+    assert sample["prediction"].dtype == np.int64
+    assert sample["prediction"].sum() == 2
+
+def test_sample_respects_the_window_and_small_windows_are_complete(prediction_log):
+    sample, n_rows = draw_sample(str(prediction_log), ["Amount"], 5000, start="2025-05-10T00:00:00", end="2025-05-10T00:01:40")
+
+    assert n_rows == 100
+    assert len(sample) == 100
+    assert dkw_epsilon(len(sample), n_rows, 0.05) == 0.0
+
+def test_bounds_contain_the_full_data_statistic(prediction_log):
+    """The KS interval computed on samples contains the KS distance of the full datasets."""
+    full = pd.read_csv(prediction_log)
+    reference, current = full.iloc[:5000], full.iloc[5000:].assign(Amount=lambda d: d["Amount"] * 1.2)
+    exact = ks_statistic(reference[["Amount"]].to_numpy(), current[["Amount"]].to_numpy())[0]
+
+    bounds = sampling_bounds(reference.sample(1000, random_state=0), current.sample(1000, random_state=1),
+                             len(reference), len(current))
+
+    column = bounds["columns"]["Amount"]
+    assert column["ks_lower"] <= exact <= column["ks_upper"]
+    assert bounds["current"]["dkw_epsilon"] > 0
+
+def test_sampled_prediction_report_writes_bounds(prediction_log, tmp_path):
+    output_path = tmp_path / "reports" / "prediction_drift.html"
+    generate_prediction_drift_report(str(prediction_log), str(prediction_log), str(output_path),
+                                     scores_dir=str(tmp_path / "scores"), sample_size=500, stratify=True,
+                                     drift_store_path=str(tmp_path / "drift.db"))
+
+    with open(bounds_path(str(output_path))) as f:
+        bounds = json.load(f)
+    assert bounds["current"]["sample_rows"] == 500
+    assert bounds["current"]["population_rows"] == 10000
+    assert set(bounds["columns"]) == {"prediction", "probability"}
+
+def test_sampling_bounds_are_stored_with_a_run_without_report(prediction_log, tmp_path):
+    """Runs that only store their results (no HTML) keep their bounds in the drift store."""
+    from app.drift_store import DriftStore
+
+    store_path = str(tmp_path / "drift.db")
+    generate_prediction_drift_report(str(prediction_log), str(prediction_log), None, scores_dir=None,
+                                     sample_size=500, drift_store_path=store_path, backend="numpy")
+
+    bounds = DriftStore(store_path).runs()[0]["params"]["sampling_bounds"]
+    assert bounds["current"]["sample_rows"] == 500
+    assert set(bounds["columns"]) == {"prediction", "probability"}
+    assert not list(tmp_path.glob("*.sampling.json"))
+
+def test_stratified_sampling_of_a_features_only_reference(tmp_path):
+    """A reference without the prediction column (training data) is sampled uniformly instead of failing."""
+    from app.schema import FEATURE_NAMES
+
+    path = tmp_path / "train.csv"
+    pd.DataFrame(np.random.default_rng(0).normal(size=(1000, len(FEATURE_NAMES))), columns=FEATURE_NAMES).to_csv(path, index=False)
+    sample, n_rows = draw_sample(str(path), FEATURE_NAMES, 100, stratify=True)
+
+    assert n_rows == 1000
+    assert list(sample.columns) == FEATURE_NAMES and len(sample) == 100
@@ -1,6 +1,8 @@
 import pytest
+import numpy as np
+import pandas as pd
 from pydantic import ValidationError
-from app.schema import InputData
+from app.schema import InputData, FEATURE_NAMES, parse_feature_vector, parse_feature_matrix, validate_feature_frame
 
 valid_data = {
     "Time": 100000.0,
@@ -50,3 +52,38 @@ def test_wrong_type():
     bad_data["Amount"] = "fifty"
     with pytest.raises(ValidationError):
         InputData(**bad_data)
+
+def test_parse_feature_vector_matches_inputdata():
+    features = parse_feature_vector(valid_data)
+    assert features.dtype == np.float64
+    assert features.tolist() == [getattr(InputData(**valid_data), name) for name in FEATURE_NAMES]
+
+def test_parse_feature_vector_falls_back_to_inputdata_rules():
+    coerced = valid_data.copy()
+    coerced["Amount"] = "50.0"  # numeric strings are accepted like InputData does
+    assert parse_feature_vector(coerced)[-1] == 50.0
+
+    bad_data = valid_data.copy()
+    bad_data["Amount"] = "fifty"
+    with pytest.raises(ValidationError):
+        parse_feature_vector(bad_data)
+
+def test_parse_feature_matrix():
+    features = parse_feature_matrix({"transactions": [valid_data, valid_data]})
+    assert features.shape == (2, len(FEATURE_NAMES))
+
+    bad_data = valid_data.copy()
+    del bad_data["V12"]
+    with pytest.raises(ValidationError):
+        parse_feature_matrix({"transactions": [valid_data, bad_data]})
+
+def test_validate_feature_frame():
+    frame = pd.DataFrame([valid_data] * 3)
+    frame["Amount"] = ["50.0", "fifty", "7"]
+    features, valid = validate_feature_frame(frame)
+    assert valid.tolist() == [True, False, True]
+    assert features[0].tolist() == parse_feature_vector(valid_data).tolist()
+    assert features[2, -1] == 7.0
+
+    with pytest.raises(ValueError):
+        validate_feature_frame(frame.drop(columns=["V12"]))
@@ -0,0 +1,78 @@
+import numpy as np
+import pandas as pd
+from app.registry import ModelRegistry
+from app.shadow import ShadowScorer, SHADOW_COLUMNS, SHADOW_ROWS_DISCARDED
+
+class ConstantModel:
+    """Predicts class 1 with a fixed probability for every row."""
+    classes_ = np.array([0, 1])
+
+    def __init__(self, p):
+        self.p = p
+
+    def predict_proba(self, X):
+        return np.tile([1 - self.p, self.p], (len(X), 1))
+
+def make_registry():
+    registry = ModelRegistry()
+    registry.register("v1", ConstantModel(0.9))
+    registry.register("v2", ConstantModel(0.7))
+    registry.promote("v1")
+    return registry
+
+def test_shadow_rows_logged_next_to_primary(tmp_path):
+    registry = make_registry()
+    registry.set_shadow("v2")
+    path = tmp_path / "shadow.csv"
+    scorer = ShadowScorer(registry, str(path), batch_size=4)
+    scorer.start()
+    for i in range(10):
+        features = np.full((2, 30), float(i))
+        labels, probabilities = registry.primary().score(features)
+        assert scorer.offer(features, labels, probabilities, f"2025-05-10T10:00:0{i}", [f"{i}-a", f"{i}-b"])
+    scorer.close()
+
+    logged = pd.read_csv(path)
+    assert list(logged.columns) == SHADOW_COLUMNS
+    assert len(logged) == 20
+    assert (logged["probability"] == 0.9).all()
+    assert (logged["shadow_probability"] == 0.7).all()
+    assert (logged["shadow_version"] == "v2").all()
+    assert sorted(logged["Time"].unique()) == list(range(10))
+
+def test_full_queue_sheds_without_blocking(tmp_path):
+    registry = make_registry()
+    registry.set_shadow("v2")
+    scorer = ShadowScorer(registry, str(tmp_path / "shadow.csv"), max_queue_size=1)  # workers not started
+    features = np.zeros((1, 30))
+    assert scorer.offer(features, np.array([1]), np.array([0.9]), "2025-05-10T10:00:00", ["a"])
+    assert not scorer.offer(features, np.array([1]), np.array([0.9]), "2025-05-10T10:00:00", ["b"])
+    assert scorer.queue_depth() == 1
+
+def test_no_shadow_version_discards_rows(tmp_path):
+    registry = make_registry()
+    path = tmp_path / "shadow.csv"
+    scorer = ShadowScorer(registry, str(path))
+    discarded_before = SHADOW_ROWS_DISCARDED.value
+    scorer.start()
+    scorer.offer(np.zeros((1, 30)), np.array([1]), np.array([0.9]), "2025-05-10T10:00:00", ["a"])
+    scorer.close()
+    assert not path.exists()
+    assert SHADOW_ROWS_DISCARDED.value - discarded_before == 1
+
+def test_workers_share_the_sink_safely(tmp_path):
+    """Several workers writing to a new file produce one header and whole rows."""
+    registry = make_registry()
+    registry.set_shadow("v2")
+    path = tmp_path / "shadow.csv"
+    scorer = ShadowScorer(registry, str(path), batch_size=1, n_workers=4)
+    scorer.start()
+    for i in range(200):
+        features = np.full((5, 30), float(i))
+        labels, probabilities = registry.primary().score(features)
+        scorer.offer(features, labels, probabilities, "2025-05-10T10:00:00", [f"{i}-{j}" for j in range(5)])
+    scorer.close()
+
+    logged = pd.read_csv(path)
+    assert list(logged.columns) == SHADOW_COLUMNS
+    assert len(logged) == 1000 and logged["request_id"].nunique() == 1000
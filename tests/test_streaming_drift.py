@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+import pytest
+from monitoring.drift_stats import psi, jensen_shannon, ks_from_histograms, histogram_edges
+from monitoring.streaming_drift import StreamingDriftEngine
+
+@pytest.fixture
+def reference():
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({"V1": rng.normal(size=20000), "prediction": rng.integers(0, 2, size=20000)})
+
+def make_window(start, n_rows, shift, seed):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "prediction_timestamp": pd.date_range(start, periods=n_rows, freq="s"),
+        "V1": rng.normal(loc=shift, size=n_rows),
+        "prediction": rng.integers(0, 2, size=n_rows),
+    })
+
+def test_identical_histograms_score_zero():
+    """All three statistics are zero when both histograms have the same shape."""
+    counts = np.array([[10, 20, 30], [5, 5, 5]])
+    assert psi(counts, counts * 3) == pytest.approx([0, 0])
+    assert jensen_shannon(counts, counts * 3) == pytest.approx([0, 0])
+    assert ks_from_histograms(counts, counts * 3) == pytest.approx([0, 0])
+
+def test_discrete_columns_get_one_bin_per_value():
+    """A binary column is split between its two values instead of collapsing into one quantile bin."""
+    edges = histogram_edges(np.array([0, 0, 0, 1]), n_bins=10)
+    assert edges[0] == 0.5
+    assert np.all(np.isinf(edges[1:]))
+
+def test_shift_is_detected_only_in_drifted_window(reference):
+    """The tumbling window reflects the newest bucket; the sliding window mixes in older ones."""
+    engine = StreamingDriftEngine.from_reference(reference, bucket_seconds=600, n_buckets=3)
+    engine.update_frame(make_window("2025-05-10 10:00", 600, shift=0.0, seed=1))
+    engine.update_frame(make_window("2025-05-10 10:10", 600, shift=2.0, seed=2))
+
+    tumbling = engine.scores("tumbling")
+    sliding = engine.scores("sliding")
+
+    assert tumbling["V1"]["drift_detected"]
+    assert not tumbling["prediction"]["drift_detected"]
+    assert sliding["V1"]["count"] == 1200
+    assert tumbling["V1"]["count"] == 600
+    assert sliding["V1"]["psi"] < tumbling["V1"]["psi"]
+
+def test_memory_stays_bounded_and_late_rows_are_dropped(reference):
+    """Old buckets are recycled and rows older than the sliding window are ignored."""
+    engine = StreamingDriftEngine.from_reference(reference, bucket_seconds=60, n_buckets=2)
+    for minute in range(10):
+        engine.update_frame(make_window(f"2025-05-10 10:{minute:02d}", 60, shift=0.0, seed=minute))
+    engine.update_frame(make_window("2025-05-10 10:00", 60, shift=0.0, seed=99))
+
+    assert engine._counts.shape[0] == 2
+    assert engine.scores("sliding")["V1"]["count"] == 120
+    assert engine.late_rows == 60
@@ -0,0 +1,85 @@
+import numpy as np
+import pytest
+from sklearn.datasets import make_classification
+from sklearn.ensemble import RandomForestClassifier, ExtraTreesClassifier
+from sklearn.tree import DecisionTreeClassifier
+from app.tree_engine import CompiledForest
+from app.model import load_model, predict_batch
+
+def make_data(n_classes, seed=0):
+    X, y = make_classification(n_samples=600, n_features=30, n_informative=8, n_classes=n_classes, random_state=seed)
+    return X, y
+
+@pytest.mark.parametrize("estimator", [
+    RandomForestClassifier(n_estimators=25, random_state=0),
+    RandomForestClassifier(n_estimators=10, max_depth=4, random_state=1),
+    ExtraTreesClassifier(n_estimators=15, random_state=2),
+    DecisionTreeClassifier(random_state=3),
+])
+@pytest.mark.parametrize("n_classes", [2, 3])
+def test_predict_proba_matches_sklearn(estimator, n_classes):
+    """The compiled tables reproduce scikit-learn's probabilities on fresh data."""
+    X, y = make_data(n_classes)
+    estimator.fit(X[:400], y[:400])
+    compiled = CompiledForest.from_sklearn(estimator)
+
+    X_test = np.vstack([X[400:], np.random.default_rng(0).normal(scale=3, size=(200, 30))])
+    np.testing.assert_allclose(compiled.predict_proba(X_test), estimator.predict_proba(X_test), atol=1e-12)
+    np.testing.assert_array_equal(compiled.predict(X_test), estimator.predict(X_test))
+
+def test_threshold_ties_go_left_like_sklearn():
+    """Samples sitting exactly on a split threshold follow the same branch as in scikit-learn."""
+    X, y = make_data(2, seed=1)
+    forest = RandomForestClassifier(n_estimators=10, random_state=0).fit(X, y)
+    compiled = CompiledForest.from_sklearn(forest)
+
+    # Put every sample exactly on some split threshold of the first tree
+    tree = forest.estimators_[0].tree_
+    split_nodes = np.flatnonzero(tree.children_left != -1)[:50]
+    X_ties = X[:len(split_nodes)].copy()
+    X_ties[np.arange(len(split_nodes)), tree.feature[split_nodes]] = tree.threshold[split_nodes]
+
+    np.testing.assert_allclose(compiled.predict_proba(X_ties), forest.predict_proba(X_ties), atol=1e-12)
+
+def test_compiled_backend_plugs_into_predict_batch():
+    """load_model(backend="compiled") yields a model the serving path can score with."""
+    model = load_model("models/rfc_model.pkl", backend="compiled")
+    features = np.random.default_rng(0).normal(size=(5, 30))
+
+    labels, probabilities = predict_batch(model, features)
+
+    assert isinstance(model, CompiledForest)
+    assert set(labels) <= {0, 1}
+    assert np.all((probabilities >= 0.5) & (probabilities <= 1.0))
+    np.testing.assert_allclose(model.predict_proba(features).sum(axis=1), 1.0)
+
+def test_unsupported_models_are_rejected():
+    """Models that are not tree classifiers cannot be compiled."""
+    with pytest.raises(ValueError):
+        CompiledForest.from_sklearn(object())
+    with pytest.raises(ValueError):
+        load_model("models/rfc_model.pkl", backend="onnx")
+
+def test_save_and_memory_map(tmp_path):
+    """Tables saved once are memory-mapped read-only and score exactly like the in-memory forest."""
+    X, y = make_data(2)
+    compiled = CompiledForest.from_sklearn(RandomForestClassifier(n_estimators=10, random_state=0).fit(X, y))
+    compiled.save(str(tmp_path / "forest"))
+    mapped = CompiledForest.load(str(tmp_path / "forest"), mmap_mode="r")
+
+    assert not mapped.value.flags.writeable
+    np.testing.assert_array_equal(mapped.predict_proba(X), compiled.predict_proba(X))
+    with pytest.raises(OSError):
+        compiled.save(str(tmp_path / "forest"))
+
+def test_load_model_from_shared_tables(tmp_path):
+    """load_model(mmap_dir=...) builds the tables on first use and reuses them afterwards."""
+    mmap_dir = tmp_path / "mmap"
+    first = load_model("models/rfc_model.pkl", backend="compiled", mmap_dir=str(mmap_dir))
+    second = load_model("models/rfc_model.pkl", backend="compiled", mmap_dir=str(mmap_dir))
+
+    assert len(list(mmap_dir.iterdir())) == 1
+    X = np.random.default_rng(0).normal(size=(50, 30))
+    np.testing.assert_array_equal(predict_batch(first, X)[0], predict_batch(second, X)[0])
+    with pytest.raises(ValueError):
+        load_model("models/rfc_model.pkl", backend="sklearn", mmap_dir=str(mmap_dir))